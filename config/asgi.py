@@ -12,6 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Признак ASGI для settings: постоянные соединения с БД по умолчанию выключены
+os.environ.setdefault('DJANGO_ASGI', 'True')
 
 application = get_asgi_application()
 
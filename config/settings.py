@@ -37,11 +37,13 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'excel_parser',
 ]
 
 MIDDLEWARE = [
+    'excel_parser.profiling.QueryProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -49,6 +51,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'excel_parser.db_routing.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -83,9 +86,61 @@ DATABASES = {
         'PASSWORD': os.environ.get('DB_PASSWORD', 'postgres'),
         'HOST': os.environ.get('DB_HOST', 'localhost'),
         'PORT': os.environ.get('DB_PORT', '5432'),
+        # Persistent connections: reuse a connection for up to N seconds (0 = per request).
+        # Under ASGI (config.asgi) every request runs its ORM calls in its own thread and
+        # persistent connections would pile up, so the default there is 0
+        'CONN_MAX_AGE': int(os.environ.get(
+            'DB_CONN_MAX_AGE', '0' if os.environ.get('DJANGO_ASGI') == 'True' else '60'
+        )),
+        # Check a reused connection before the request instead of failing mid-request
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
     }
 }
 
+# SQLite вместо PostgreSQL (тесты и локальный запуск без сервера БД): DB_ENGINE=sqlite
+# Поиск, JSONB-индексы и реплики на SQLite не используются
+if os.environ.get('DB_ENGINE') == 'sqlite':
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('DB_SQLITE_PATH', str(BASE_DIR / 'db.sqlite3')),
+    }
+
+# Connection pool (requires psycopg 3: pip install "psycopg[binary,pool]")
+# Incompatible with persistent connections, so CONN_MAX_AGE is forced to 0
+if os.environ.get('DB_POOL', 'False') == 'True':
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '2')),
+        'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', '10')),
+        'timeout': int(os.environ.get('DB_POOL_TIMEOUT', '10')),
+    }
+
+# PgBouncer in transaction pooling mode: server-side cursors (QuerySet.iterator())
+# don't survive between transactions, so Django must not use them
+if os.environ.get('DB_PGBOUNCER', 'False') == 'True':
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+
+# Read replicas for analytics (optional)
+# DB_REPLICA_HOSTS: comma-separated host[:port] list, e.g. "replica1,replica2:5433"
+REPLICA_DATABASES = []
+for index, replica_host in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), start=1):
+    replica_host, _, replica_port = replica_host.strip().partition(':')
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        'HOST': replica_host,
+        'PORT': replica_port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['excel_parser.db_routing.ReplicaRouter']
+
+# Seconds to skip an unreachable replica before trying it again
+REPLICA_RETRY_SECONDS = int(os.environ.get('DB_REPLICA_RETRY_SECONDS', '30'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -143,16 +198,128 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Версия данных для HTML-страниц (справочники фильтров) кэшируется на N секунд;
+# условные GET API (ETag/304) всегда считают ее заново. 0 - без кэша
+DATA_VERSION_CACHE_SECONDS = int(os.environ.get('DATA_VERSION_CACHE_SECONDS', '10'))
+
+# Query profiling (excel_parser.profiling.QueryProfilingMiddleware)
+QUERY_PROFILING = os.environ.get('QUERY_PROFILING', 'False') == 'True'
+# Requests slower than this are logged as structured JSON lines
+SLOW_REQUEST_MS = int(os.environ.get('SLOW_REQUEST_MS', '500'))
+# Same SQL executed this many times in one request is reported as an N+1 hint
+DUPLICATE_QUERY_THRESHOLD = int(os.environ.get('DUPLICATE_QUERY_THRESHOLD', '5'))
+# Requests kept per route for rolling percentiles (/api/profiling/)
+QUERY_PROFILING_WINDOW = int(os.environ.get('QUERY_PROFILING_WINDOW', '500'))
+
+# Доступ к /metrics: токен (заголовок Authorization: Bearer <токен>) и/или адреса и сети
+# сборщика через запятую (сравниваются с REMOTE_ADDR). Если не задано ни то, ни другое,
+# метрики доступны только при DEBUG=True
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+METRICS_ALLOWED_IPS = [
+    address.strip() for address in os.environ.get('METRICS_ALLOWED_IPS', '').split(',') if address.strip()
+]
+
+# Logging
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {
+            'format': '%(asctime)s %(levelname)s %(name)s %(message)s',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'simple',
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': 'WARNING',
+    },
+    'loggers': {
+        'excel_parser': {
+            'handlers': ['console'],
+            'level': os.environ.get('LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+        # Every SQL statement (Django logs them only when DEBUG=True)
+        'django.db.backends': {
+            'handlers': ['console'],
+            'level': 'DEBUG' if os.environ.get('LOG_SQL', 'False') == 'True' else 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 # Celery Configuration (optional)
 CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
+# Периодическая обработка очереди задач Jira (celery beat)
+CELERY_BEAT_SCHEDULE = {
+    'process-jira-outbox': {
+        'task': 'excel_parser.tasks.process_jira_outbox',
+        'schedule': float(os.environ.get('JIRA_OUTBOX_INTERVAL', 60)),
+    },
+    # Удаление брошенных загрузок частями
+    'cleanup-uploads': {
+        'task': 'excel_parser.tasks.cleanup_uploads',
+        'schedule': 3600.0,
+    },
+}
 
 # Jira Configuration
 JIRA_URL = os.environ.get('JIRA_URL', 'https://your-jira-instance.atlassian.net')
 JIRA_EMAIL = os.environ.get('JIRA_EMAIL', '')
 JIRA_API_TOKEN = os.environ.get('JIRA_API_TOKEN', '')
+# Таймауты (подключение, чтение) в секундах
+JIRA_CONNECT_TIMEOUT = float(os.environ.get('JIRA_CONNECT_TIMEOUT', 5))
+JIRA_READ_TIMEOUT = float(os.environ.get('JIRA_READ_TIMEOUT', 30))
+# Задач в одном запросе /rest/api/3/issue/bulk (максимум Jira - 50)
+JIRA_BULK_CHUNK_SIZE = int(os.environ.get('JIRA_BULK_CHUNK_SIZE', 50))
+# Параллельных запросов к Jira при пакетном создании задач
+JIRA_MAX_WORKERS = int(os.environ.get('JIRA_MAX_WORKERS', 4))
+# Ограничение частоты запросов к Jira на процесс (запросов в секунду и размер всплеска)
+JIRA_RATE_LIMIT = float(os.environ.get('JIRA_RATE_LIMIT', 10))
+JIRA_RATE_BURST = int(os.environ.get('JIRA_RATE_BURST', 10))
+# Повторы при 429 (Retry-After соблюдается), а для поиска - и при 5xx и сетевых ошибках:
+# экспоненциальная задержка с jitter. Создание задач после 5xx и сетевых ошибок не повторяется
+JIRA_MAX_RETRIES = int(os.environ.get('JIRA_MAX_RETRIES', 5))
+JIRA_BACKOFF_BASE = float(os.environ.get('JIRA_BACKOFF_BASE', 0.5))
+JIRA_BACKOFF_MAX = float(os.environ.get('JIRA_BACKOFF_MAX', 60))
+# Circuit breaker: после N ошибок подряд запросы не выполняются RESET_TIMEOUT секунд
+JIRA_CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get('JIRA_CIRCUIT_FAILURE_THRESHOLD', 5))
+JIRA_CIRCUIT_RESET_TIMEOUT = float(os.environ.get('JIRA_CIRCUIT_RESET_TIMEOUT', 30))
+# Значение для пустых и отсутствующих в строке полей шаблонов заголовка и описания
+JIRA_TEMPLATE_MISSING_VALUE = os.environ.get('JIRA_TEMPLATE_MISSING_VALUE', '')
+# Очередь создания задач (JiraOutbox): записей в пачке (не больше 50), срок блокировки записи
+# воркером, число попыток и префикс метки задачи с ключом идемпотентности
+JIRA_OUTBOX_BATCH_SIZE = int(os.environ.get('JIRA_OUTBOX_BATCH_SIZE', 50))
+JIRA_OUTBOX_LEASE_SECONDS = int(os.environ.get('JIRA_OUTBOX_LEASE_SECONDS', 300))
+JIRA_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('JIRA_OUTBOX_MAX_ATTEMPTS', 10))
+JIRA_OUTBOX_LABEL_PREFIX = os.environ.get('JIRA_OUTBOX_LABEL_PREFIX', 'payroll-outbox-')
 
 # File Upload Settings
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10 MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10 MB
 
+
+# Кэш разобранных файлов загрузки (Parquet, нужен pyarrow) по sha256 файла;
+# каталог - вне MEDIA_ROOT, чтобы файлы кэша не были доступны для записи через медиа
+IMPORT_CACHE_ENABLED = os.environ.get('IMPORT_CACHE_ENABLED', 'True') == 'True'
+IMPORT_CACHE_DIR = os.environ.get('IMPORT_CACHE_DIR', str(BASE_DIR / 'var' / 'import_cache'))
+# Разбор больших xlsx в нескольких процессах: число процессов (1 - в текущем процессе)
+# и число строк, от которого лист делится между процессами по диапазонам строк
+IMPORT_PARSE_WORKERS = int(os.environ.get('IMPORT_PARSE_WORKERS', 1))
+IMPORT_PARSE_MIN_ROWS = int(os.environ.get('IMPORT_PARSE_MIN_ROWS', 20000))
+
+# Загрузка больших файлов частями (/api/uploads/): каталог частично полученных файлов
+# (общий для всех экземпляров приложения; вне MEDIA_ROOT - при DEBUG медиа раздаются),
+# максимальный размер файла и одной части, срок хранения незавершенных загрузок
+UPLOAD_TEMP_DIR = os.environ.get('UPLOAD_TEMP_DIR', str(BASE_DIR / 'var' / 'uploads'))
+UPLOAD_MAX_FILE_SIZE = int(os.environ.get('UPLOAD_MAX_FILE_SIZE', 1024 * 1024 * 1024))  # 1 GB
+UPLOAD_CHUNK_MAX_SIZE = int(os.environ.get('UPLOAD_CHUNK_MAX_SIZE', 8 * 1024 * 1024))  # 8 MB
+UPLOAD_SESSION_TTL_HOURS = int(os.environ.get('UPLOAD_SESSION_TTL_HOURS', 24))
+# Импорт загруженного частями файла задачей Celery (иначе - в запросе complete)
+UPLOAD_IMPORT_ASYNC = os.environ.get('UPLOAD_IMPORT_ASYNC', 'False') == 'True'
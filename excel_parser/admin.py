@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Department, Division, Group, Employee, SalaryHistory
+from .models import Department, Division, Group, Employee, SalaryHistory, JiraOutbox, ImportRecord, UploadSession
 
 
 @admin.register(Department)
@@ -34,13 +34,13 @@ class EmployeeAdmin(admin.ModelAdmin):
     ]
     list_filter = ['department', 'division', 'group', 'is_active', 'hire_date']
     search_fields = ['full_name', 'login', 'position']
-    readonly_fields = ['created_at', 'updated_at', 'current_income']
+    readonly_fields = ['created_at', 'updated_at', 'current_income', 'org_path_names']
     fieldsets = (
         ('Основная информация', {
             'fields': ('full_name', 'login', 'position', 'hire_date', 'is_active')
         }),
         ('Организационная структура', {
-            'fields': ('department', 'division', 'group')
+            'fields': ('department', 'division', 'group', 'org_path_names')
         }),
         ('Руководители', {
             'fields': ('functional_manager', 'line_manager')
@@ -73,3 +73,30 @@ class SalaryHistoryAdmin(admin.ModelAdmin):
         'total_income_diff', 'created_at'
     ]
     date_hierarchy = 'change_date'
+
+
+@admin.register(JiraOutbox)
+class JiraOutboxAdmin(admin.ModelAdmin):
+    list_display = [
+        'excel_row', 'status', 'attempts', 'jira_key', 'next_attempt_at', 'updated_at'
+    ]
+    list_filter = ['status', 'created_at']
+    search_fields = ['excel_row__id', 'jira_key', 'idempotency_key']
+    raw_id_fields = ['excel_row']
+    readonly_fields = ['idempotency_key', 'created_at', 'updated_at']
+
+
+@admin.register(ImportRecord)
+class ImportRecordAdmin(admin.ModelAdmin):
+    list_display = ['loader', 'file_name', 'file_size', 'created_at']
+    list_filter = ['loader', 'created_at']
+    search_fields = ['file_name', 'file_hash']
+    readonly_fields = ['file_hash', 'data_version', 'created_at']
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ['file_name', 'loader', 'file_size', 'received', 'status', 'created_at']
+    list_filter = ['status', 'loader']
+    search_fields = ['file_name', 'checksum']
+    readonly_fields = ['id', 'checksum', 'received', 'import_record', 'result', 'created_at', 'updated_at']
@@ -1,7 +1,11 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ExcelParserConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'excel_parser'
 
+    def ready(self):
+        from . import signals
+        post_migrate.connect(signals.backfill_org_paths, sender=self)
@@ -0,0 +1,150 @@
+"""
+Маршрутизация запросов к БД: реплики для чтения аналитики, primary для записи
+"""
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.db.utils import OperationalError
+from asgiref.local import Local
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+# Состояние маршрутизации текущего запроса (поток или async-контекст)
+_state = Local()
+
+# Реплика -> время (time.monotonic), до которого она считается недоступной
+_unavailable_until = {}
+
+
+def get_replica_aliases():
+    """Алиасы реплик из settings.REPLICA_DATABASES"""
+    return list(getattr(settings, 'REPLICA_DATABASES', []))
+
+
+def is_sticky():
+    """Была ли в текущем запросе запись (тогда чтение только с primary)"""
+    return getattr(_state, 'sticky', False)
+
+
+def mark_sticky():
+    """Пометить текущий запрос: дальнейшие чтения идут на primary"""
+    _state.sticky = True
+
+
+def reset_state():
+    """Сбросить состояние маршрутизации (начало/конец запроса)"""
+    _state.use_replicas = False
+    _state.sticky = False
+    _state.replica = None
+
+
+@contextmanager
+def use_replicas():
+    """
+    Контекст, в котором чтение (до первой записи) направляется на реплики
+
+    Реплика выбирается при первом чтении и используется до конца внешнего блока.
+    """
+    previous = getattr(_state, 'use_replicas', False)
+    if not previous:
+        _state.replica = None
+    _state.use_replicas = True
+    try:
+        yield
+    finally:
+        _state.use_replicas = previous
+        if not previous:
+            _state.replica = None
+
+
+def _is_available(alias):
+    """Проверить соединение с репликой; недоступную реплику пропускаем REPLICA_RETRY_SECONDS"""
+    if _unavailable_until.get(alias, 0) > time.monotonic():
+        return False
+    try:
+        connections[alias].ensure_connection()
+        return True
+    except OperationalError as e:
+        retry = getattr(settings, 'REPLICA_RETRY_SECONDS', 30)
+        _unavailable_until[alias] = time.monotonic() + retry
+        logger.warning(f"Replica {alias} is unavailable, falling back to primary for {retry}s: {e}")
+        return False
+
+
+def choose_replica():
+    """Случайная доступная реплика или primary, если доступных нет"""
+    replicas = get_replica_aliases()
+    random.shuffle(replicas)
+    for alias in replicas:
+        if _is_available(alias):
+            return alias
+    return DEFAULT_DB_ALIAS
+
+
+def get_current_replica():
+    """
+    Реплика текущего запроса
+
+    Выбирается (с проверкой соединения) один раз, при первом чтении: все чтения
+    запроса идут на одну реплику и не проверяют соединение заново.
+    """
+    alias = getattr(_state, 'replica', None)
+    if alias is None:
+        alias = _state.replica = choose_replica()
+    return alias
+
+
+class ReplicaRouter:
+    """
+    Router для primary/replica
+
+    Чтение идет на реплику только внутри use_replicas() и только до первой
+    записи в рамках запроса (sticky-after-write). Запись и миграции - всегда primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if getattr(_state, 'use_replicas', False) and not is_sticky():
+            return get_current_replica()
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        mark_sticky()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in get_replica_aliases()
+
+
+class ReplicaRoutingMiddleware:
+    """Изолирует состояние маршрутизации (sticky-флаг) между запросами"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        reset_state()
+        try:
+            return self.get_response(request)
+        finally:
+            reset_state()
+
+    async def __acall__(self, request):
+        reset_state()
+        try:
+            return await self.get_response(request)
+        finally:
+            reset_state()
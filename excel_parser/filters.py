@@ -0,0 +1,16 @@
+"""
+Filter backends for REST API
+"""
+from rest_framework import filters
+from .services.search import EmployeeSearchService
+
+
+class EmployeeSearchFilter(filters.SearchFilter):
+    """Поиск сотрудников через EmployeeSearchService вместо icontains по search_fields"""
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        return EmployeeSearchService.search(queryset, query)
+
+    def get_search_fields(self, view, request):
+        return ['full_name', 'login', 'position']
@@ -0,0 +1,334 @@
+"""
+Management command для бенчмарков загрузки, аналитики и API на синтетических данных
+"""
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import (
+    setup_databases, teardown_databases, setup_test_environment, teardown_test_environment
+)
+from django.urls import reverse
+from datetime import date, datetime, timezone as dt_timezone
+import io
+import json
+import platform
+import statistics
+import subprocess
+import time
+
+import django
+import pandas as pd
+
+from excel_parser.models import Department, Employee
+from excel_parser.services import (
+    AnalyticsService, DataLoaderService, ManagementChainService, OrgTreeService, SyntheticDataService
+)
+
+
+# Масштаб -> количество сотрудников
+SCALES = {
+    '1k': 1_000,
+    '10k': 10_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+}
+
+
+class QueryCounter:
+    """execute_wrapper, считающий SQL-запросы (без накопления текста, как в CaptureQueriesContext)"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        'Бенчмарк загрузчиков, отчетов аналитики и API на синтетических данных заданного масштаба. '
+        'Работает во временной тестовой БД, результат - JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scales',
+            nargs='+',
+            choices=list(SCALES),
+            default=['1k'],
+            help='Масштабы данных (по умолчанию 1k)',
+        )
+        parser.add_argument(
+            '--history-depth',
+            type=int,
+            default=3,
+            help='Записей истории зарплаты на сотрудника (по умолчанию 3)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Seed генерации данных (по умолчанию 42)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Повторов каждого измерения аналитики и API (по умолчанию 5)',
+        )
+        parser.add_argument(
+            '--loader-rows',
+            type=int,
+            default=500,
+            help='Строк сотрудников в файле для бенчмарка загрузчика (по умолчанию 500)',
+        )
+        parser.add_argument(
+            '--output',
+            help='Файл для JSON-результата (по умолчанию stdout)',
+        )
+        parser.add_argument(
+            '--compare',
+            help='JSON-результат предыдущего запуска: вывести изменения медиан',
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=1.2,
+            help='Отношение медиан, начиная с которого изменение считается регрессией (по умолчанию 1.2)',
+        )
+
+    def handle(self, *args, **options):
+        self.repeat = max(1, options['repeat'])
+        results = []
+
+        setup_test_environment()
+        old_config = setup_databases(
+            verbosity=0,
+            interactive=False,
+            aliases=set(connections),
+            serialized_aliases=set(),
+        )
+        try:
+            for scale in options['scales']:
+                call_command('flush', interactive=False, verbosity=0)
+                results.extend(self._run_scale(scale, options))
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            'meta': self._meta(options),
+            'results': results,
+        }
+        payload = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(payload)
+            self.stderr.write(self.style.SUCCESS(f"Результаты сохранены в {options['output']}"))
+        else:
+            self.stdout.write(payload)
+
+        if options['compare']:
+            self._compare(options['compare'], results, options['threshold'])
+
+    def _run_scale(self, scale, options):
+        employees = SCALES[scale]
+        results = []
+        self.stderr.write(f'[{scale}] Генерация {employees} сотрудников...')
+
+        counter = QueryCounter()
+        started = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            stats = SyntheticDataService.generate(
+                employees,
+                history_depth=options['history_depth'],
+                seed=options['seed'],
+            )
+        duration = time.perf_counter() - started
+        results.append(self._result(scale, 'generate', 'synthetic_data', [duration], counter.count,
+                                    rows=stats['employees'] + stats['salary_history']))
+
+        self.stderr.write(f'[{scale}] Загрузчики...')
+        results.extend(self._bench_loaders(scale, options['loader_rows']))
+        self.stderr.write(f'[{scale}] Аналитика...')
+        results.extend(self._bench_analytics(scale))
+        self.stderr.write(f'[{scale}] API...')
+        results.extend(self._bench_api(scale))
+        return results
+
+    def _bench_loaders(self, scale, rows):
+        """
+        Загрузка файлов каждого уровня: новые узлы и rows новых сотрудников
+
+        Загрузчики ищут отделы и группы по имени без учета родителя, поэтому сотрудники
+        привязываются к только что загруженным узлам с уникальными именами.
+        """
+        department = Department.objects.order_by('id').first()
+        manager = Employee.objects.filter(department=department).order_by('id').first()
+
+        files = [
+            ('load_departments_from_file', DataLoaderService.load_departments_from_file, [
+                {'Название': f'Бенчмарк {i}'} for i in range(20)
+            ]),
+            ('load_divisions_from_file', DataLoaderService.load_divisions_from_file, [
+                {'Департамент': department.name, 'Название': f'Бенчмарк {i}'} for i in range(20)
+            ]),
+            ('load_groups_from_file', DataLoaderService.load_groups_from_file, [
+                {'Отдел': f'Бенчмарк {i}', 'Название': f'Бенчмарк группа {i}'} for i in range(20)
+            ]),
+            ('load_employees_from_file', DataLoaderService.load_employees_from_file, [
+                {
+                    'Логин': f'bench_{i:06d}',
+                    'ФИО': f'Бенчмарк Сотрудник {i}',
+                    'Должность': 'Разработчик',
+                    'Департамент': department.name,
+                    'Отдел': 'Бенчмарк 0',
+                    'Группа': 'Бенчмарк группа 0',
+                    'Линейный руководитель': manager.login,
+                    'Дата принятия': '2020-01-01',
+                    'Оклад': 100000 + i,
+                    'Квартальная премия': 10000,
+                    'Месячная премия': 5000,
+                    'Годовая премия': 50000,
+                }
+                for i in range(rows)
+            ]),
+        ]
+
+        results = []
+        for name, loader, data in files:
+            buffer = io.BytesIO()
+            pd.DataFrame(data).to_excel(buffer, index=False, engine='openpyxl')
+            counter = QueryCounter()
+            buffer.seek(0)
+            started = time.perf_counter()
+            with connection.execute_wrapper(counter):
+                loader(buffer)
+            duration = time.perf_counter() - started
+            results.append(self._result(scale, 'loader', name, [duration], counter.count, rows=len(data)))
+        return results
+
+    def _bench_analytics(self, scale):
+        department = Department.objects.order_by('id').first()
+        top_manager = Employee.objects.filter(line_manager__isnull=True, line_subordinates__isnull=False) \
+            .order_by('id').first()
+        year = date.today().year
+        date_from = date(year - 3, 1, 1).isoformat()
+        date_to = date.today().isoformat()
+
+        cases = [
+            ('AnalyticsService.get_department_delta',
+             lambda: AnalyticsService.get_department_delta(department.id, year - 1, year)),
+            ('AnalyticsService.get_custom_report',
+             lambda: AnalyticsService.get_custom_report(
+                 group_by=['department', 'division'],
+                 metrics=['total_income', 'avg_income', 'count', 'total_salary', 'avg_salary']
+             )),
+            ('AnalyticsService.get_salary_history_report',
+             lambda: AnalyticsService.get_salary_history_report(date_from=date_from, date_to=date_to)),
+            ('AnalyticsService.get_fot_summary',
+             lambda: AnalyticsService.get_fot_summary(date_from, date_to)),
+            ('OrgTreeService.build_tree', OrgTreeService.build_tree),
+        ]
+        if top_manager:
+            cases.append(('ManagementChainService.get_chain_stats',
+                          lambda: ManagementChainService.get_chain_stats(top_manager.id)))
+
+        return [self._measure(scale, 'analytics', name, func) for name, func in cases]
+
+    def _bench_api(self, scale):
+        client = Client(HTTP_ACCEPT='application/json')
+        urls = [
+            reverse('department-list'),
+            reverse('employee-list'),
+            reverse('employee-list') + '?ordering=-current_income',
+            reverse('salaryhistory-list'),
+            reverse('department-tree'),
+            reverse('analytics-fot-summary'),
+            reverse('employees_list'),
+        ]
+
+        def request(url):
+            response = client.get(url)
+            if response.status_code != 200:
+                raise CommandError(f'{url} returned {response.status_code}')
+
+        return [self._measure(scale, 'api', f'GET {url}', lambda url=url: request(url)) for url in urls]
+
+    def _measure(self, scale, group, name, func):
+        """Выполнить func repeat раз; запросы считаются по первому (холодному) выполнению"""
+        durations = []
+        queries = None
+        for _ in range(self.repeat):
+            counter = QueryCounter()
+            started = time.perf_counter()
+            with connection.execute_wrapper(counter):
+                func()
+            durations.append(time.perf_counter() - started)
+            if queries is None:
+                queries = counter.count
+        return self._result(scale, group, name, durations, queries)
+
+    def _result(self, scale, group, name, durations, queries, rows=None):
+        durations_ms = [duration * 1000 for duration in durations]
+        result = {
+            'scale': scale,
+            'group': group,
+            'name': name,
+            'runs': len(durations_ms),
+            'min_ms': round(min(durations_ms), 2),
+            'median_ms': round(statistics.median(durations_ms), 2),
+            'max_ms': round(max(durations_ms), 2),
+            'queries': queries,
+        }
+        if rows is not None:
+            result['rows'] = rows
+            result['rows_per_sec'] = round(rows / sum(durations), 1) if sum(durations) else None
+        self.stderr.write(f"  {name}: median {result['median_ms']} ms, {queries} queries")
+        return result
+
+    def _meta(self, options):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', 'HEAD'],
+                cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            'timestamp': datetime.now(dt_timezone.utc).isoformat(),
+            'git_commit': commit,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'scales': options['scales'],
+            'history_depth': options['history_depth'],
+            'seed': options['seed'],
+            'repeat': self.repeat,
+            'loader_rows': options['loader_rows'],
+        }
+
+    def _compare(self, path, results, threshold):
+        """Сравнить медианы с предыдущим запуском (совпадение по scale и name)"""
+        with open(path, encoding='utf-8') as f:
+            baseline = {(r['scale'], r['name']): r for r in json.load(f)['results']}
+
+        self.stderr.write(f'\nСравнение с {path}:')
+        regressions = 0
+        for result in results:
+            previous = baseline.get((result['scale'], result['name']))
+            if not previous or not previous['median_ms']:
+                continue
+            ratio = result['median_ms'] / previous['median_ms']
+            line = (f"  [{result['scale']}] {result['name']}: {previous['median_ms']} -> "
+                    f"{result['median_ms']} ms (x{ratio:.2f}), queries {previous['queries']} -> {result['queries']}")
+            if ratio >= threshold or (result['queries'] or 0) > (previous['queries'] or 0):
+                regressions += 1
+                self.stderr.write(self.style.ERROR(line))
+            else:
+                self.stderr.write(line)
+        if regressions:
+            self.stderr.write(self.style.WARNING(f'Регрессий: {regressions}'))
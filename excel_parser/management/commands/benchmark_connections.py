@@ -0,0 +1,88 @@
+"""
+Management command для сравнения задержки запросов с новым и постоянным соединением к БД
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, close_old_connections, DEFAULT_DB_ALIAS
+from django.test import Client
+import statistics
+import time
+
+
+class Command(BaseCommand):
+    help = 'Измеряет задержку запросов к API при CONN_MAX_AGE=0 и с постоянными соединениями'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            default='/api/departments/',
+            help='URL для запросов (по умолчанию /api/departments/)',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Количество запросов в каждом режиме (по умолчанию 200)',
+        )
+        parser.add_argument(
+            '--max-age',
+            type=int,
+            default=60,
+            help='CONN_MAX_AGE для режима постоянных соединений (по умолчанию 60)',
+        )
+
+    def handle(self, *args, **options):
+        url = options['url']
+        count = options['requests']
+        connection = connections[DEFAULT_DB_ALIAS]
+        original_max_age = connection.settings_dict['CONN_MAX_AGE']
+
+        if connection.settings_dict.get('OPTIONS', {}).get('pool'):
+            self.stdout.write(self.style.WARNING(
+                'Включен пул соединений (DB_POOL): режим "new connection" тоже берет соединение из пула'
+            ))
+
+        # Тестовый клиент по умолчанию ходит с Host: testserver
+        hosts = [host for host in settings.ALLOWED_HOSTS if host and host != '*' and not host.startswith('.')]
+        client = Client(HTTP_HOST=hosts[0] if hosts else 'testserver', HTTP_ACCEPT='application/json')
+
+        results = {}
+        try:
+            for mode, max_age in (('new connection', 0), ('persistent', options['max_age'])):
+                connection.close()
+                connection.settings_dict['CONN_MAX_AGE'] = max_age
+                results[mode] = self._run(client, url, count)
+        finally:
+            connection.close()
+            connection.settings_dict['CONN_MAX_AGE'] = original_max_age
+
+        self.stdout.write(f'{url}, {count} запросов в каждом режиме')
+        for mode, timings in results.items():
+            timings.sort()
+            self.stdout.write(
+                f'  {mode:<15} median={statistics.median(timings):.2f} ms  '
+                f'p95={timings[int(len(timings) * 0.95) - 1]:.2f} ms  '
+                f'mean={statistics.mean(timings):.2f} ms'
+            )
+
+        saved = statistics.median(results['new connection']) - statistics.median(results['persistent'])
+        self.stdout.write(self.style.SUCCESS(f'Экономия на запрос (median): {saved:.2f} ms'))
+
+    def _run(self, client, url, count):
+        """Выполнить запросы и вернуть список задержек в миллисекундах"""
+        # Первый запрос прогревает URLConf, сериализаторы и соединение
+        client.get(url)
+        close_old_connections()
+
+        timings = []
+        for _ in range(count):
+            started = time.perf_counter()
+            # Тестовый клиент не закрывает соединения по request_started/request_finished,
+            # поэтому жизненный цикл обработчика воспроизводим явно
+            close_old_connections()
+            response = client.get(url)
+            close_old_connections()
+            timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                raise CommandError(f'{url} returned {response.status_code}')
+        return timings
@@ -0,0 +1,27 @@
+"""
+Management command для удаления брошенных загрузок частями (без Celery)
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from excel_parser.services.chunked_upload import ChunkedUploadService
+
+
+class Command(BaseCommand):
+    help = 'Удаляет незавершенные загрузки частями и их временные файлы (то же, что задача Celery cleanup_uploads)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=int,
+            default=None,
+            help='Удалять загрузки без изменений дольше N часов (по умолчанию UPLOAD_SESSION_TTL_HOURS)',
+        )
+
+    def handle(self, *args, **options):
+        if options['hours'] is not None and options['hours'] < 0:
+            raise CommandError('--hours не может быть отрицательным')
+
+        count = ChunkedUploadService.cleanup(options['hours'])
+        hours = settings.UPLOAD_SESSION_TTL_HOURS if options['hours'] is None else options['hours']
+        self.stdout.write(self.style.SUCCESS(f'Удалено загрузок старше {hours} ч: {count}'))
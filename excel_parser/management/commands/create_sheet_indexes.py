@@ -0,0 +1,49 @@
+"""
+Management command для создания JSONB-индексов по строкам загруженных листов
+"""
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from excel_parser.services.sheet_query import SheetQueryService
+
+
+class Command(BaseCommand):
+    help = (
+        'Создает GIN-индекс по ExcelRow.data и индексы по выражению для колонок из '
+        'ExcelColumnMapping (только PostgreSQL)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            type=int,
+            default=None,
+            help='ID файла: индексы только по его колонкам (по умолчанию - колонки всех файлов)',
+        )
+        parser.add_argument(
+            '--column',
+            action='append',
+            dest='columns',
+            default=None,
+            help='Колонка для индекса (можно указать несколько раз)',
+        )
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            help='Алиас БД (по умолчанию default)',
+        )
+
+    def handle(self, *args, **options):
+        if not SheetQueryService.is_indexed(options['database']):
+            self.stdout.write(self.style.WARNING('JSONB-индексы создаются только на PostgreSQL'))
+            return
+
+        created = SheetQueryService.create_indexes(
+            excel_file_id=options['file'],
+            columns=options['columns'],
+            using=options['database'],
+        )
+        if created:
+            self.stdout.write(self.style.SUCCESS(f"Созданы индексы: {', '.join(created)}"))
+        else:
+            self.stdout.write('Все индексы уже существуют')
@@ -0,0 +1,267 @@
+"""
+Management command для генерации файлов загрузки (нагрузочное тестирование импорта)
+"""
+from django.core.management.base import BaseCommand, CommandError
+from datetime import date, timedelta
+import json
+import math
+import os
+import random
+import time
+
+from openpyxl import Workbook
+
+from excel_parser.services.synthetic_data import (
+    DEPARTMENTS, FIRST_NAMES, LAST_NAMES, MIDDLE_NAMES, POSITIONS
+)
+
+
+# Сотрудников на одну копию шаблона оргструктуры (как в SyntheticDataService)
+EMPLOYEES_PER_ORG_COPY = 5000
+
+DEPARTMENT_HEADERS = ['Название']
+DIVISION_HEADERS = ['Департамент', 'Название']
+GROUP_HEADERS = ['Отдел', 'Название']
+EMPLOYEE_HEADERS = [
+    'Логин', 'ФИО', 'Должность', 'Департамент', 'Отдел', 'Группа',
+    'Функциональный руководитель', 'Линейный руководитель', 'Дата принятия',
+    'Оклад', 'Квартальная премия', 'Месячная премия', 'Годовая премия',
+]
+
+# Листы книги для --workbook (как ожидает WorkbookLoaderService)
+SHEET_TITLES = {
+    'departments': 'Департаменты',
+    'divisions': 'Отделы',
+    'groups': 'Группы',
+    'employees': 'Сотрудники',
+}
+
+# Виды ошибочных строк сотрудников
+ERROR_KINDS = {
+    # Загрузчик отклоняет строку
+    'missing_login': 'Логин из пробелов',
+    'org_mismatch': 'Отдел не входит в департамент',
+    'self_manager': 'Сотрудник - собственный линейный руководитель',
+    # Загрузчик принимает строку, подставляя значения по умолчанию
+    'bad_date': 'Некорректная дата принятия',
+    'bad_number': 'Нечисловой оклад',
+    'unknown_manager': 'Несуществующий логин руководителя',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует файлы департаментов, отделов, групп и сотрудников в формате загрузчиков '
+        '(потоковая запись) и manifest.json с ошибочными строками'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=10000,
+            help='Количество строк сотрудников (по умолчанию 10000)',
+        )
+        parser.add_argument(
+            '--output-dir',
+            default='upload_files',
+            help='Каталог для файлов (по умолчанию upload_files)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=None,
+            help='Seed генератора (по умолчанию случайный)',
+        )
+        parser.add_argument(
+            '--error-rate',
+            type=float,
+            default=0.01,
+            help='Доля ошибочных строк сотрудников (по умолчанию 0.01)',
+        )
+        parser.add_argument(
+            '--workbook',
+            action='store_true',
+            help='Записать все листы в одну книгу workbook.xlsx (для /api/import/workbook/)',
+        )
+        parser.add_argument(
+            '--login-prefix',
+            default='load_',
+            help='Префикс логинов (по умолчанию load_, чтобы не пересекаться с generate_test_data)',
+        )
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        if rows < 1:
+            raise CommandError('--rows должно быть больше 0')
+        if not 0 <= options['error_rate'] <= 1:
+            raise CommandError('--error-rate должно быть в диапазоне 0..1')
+
+        rng = random.Random(options['seed'])
+        output_dir = options['output_dir']
+        os.makedirs(output_dir, exist_ok=True)
+
+        departments, divisions, groups = self._build_org_structure(rows)
+        errors = []
+        files = {}
+        sheets = [
+            ('departments', DEPARTMENT_HEADERS, ([name] for name in departments)),
+            ('divisions', DIVISION_HEADERS, ([department, name] for name, department in divisions.items())),
+            ('groups', GROUP_HEADERS, ([division, name] for name, division in groups)),
+            ('employees', EMPLOYEE_HEADERS,
+             self._employee_rows(rng, rows, groups, divisions, options, errors)),
+        ]
+        if options['workbook']:
+            path = os.path.join(output_dir, 'workbook.xlsx')
+            started = time.perf_counter()
+            written = self._write_workbook(path, sheets)
+            files['workbook'] = {'path': path, 'rows': written}
+            self.stdout.write(f'  {path}: {sum(written.values())} строк за {time.perf_counter() - started:.1f} с')
+        else:
+            for name, headers, data in sheets:
+                path = os.path.join(output_dir, f'{name}.xlsx')
+                started = time.perf_counter()
+                written = self._write(path, headers, data)
+                files[name] = {'path': path, 'rows': written}
+                self.stdout.write(f'  {path}: {written} строк за {time.perf_counter() - started:.1f} с')
+
+        manifest = {
+            'seed': options['seed'],
+            'files': files,
+            'error_kinds': ERROR_KINDS,
+            # Номер строки - как в ошибках загрузчика (с учетом заголовка)
+            'errors': errors,
+        }
+        manifest_path = os.path.join(output_dir, 'manifest.json')
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        order = (
+            'одним файлом: POST /api/import/workbook/' if options['workbook']
+            else 'по порядку: departments, divisions, groups, employees'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Файлы записаны в {output_dir}, ошибочных строк: {len(errors)} (см. {manifest_path})\n'
+            f'Загружайте {order}'
+        ))
+
+    def _build_org_structure(self, rows):
+        """
+        Оргструктура по шаблону DEPARTMENTS
+
+        Загрузчики ищут отдел и группу только по имени, поэтому имена уникальны во всех копиях.
+
+        Returns:
+            (список департаментов, {отдел: департамент}, [(группа, отдел)])
+        """
+        copies = max(1, math.ceil(rows / EMPLOYEES_PER_ORG_COPY))
+        departments = []
+        divisions = {}
+        groups = []
+        for copy in range(1, copies + 1):
+            suffix = '' if copy == 1 else f' {copy}'
+            for department, division_names in DEPARTMENTS.items():
+                departments.append(f'{department}{suffix}')
+                for division in division_names:
+                    # «Аналитика» - и департамент, и отдел; отделы отличаются от департаментов префиксом
+                    division_name = f'Отдел {division}{suffix}'
+                    divisions[division_name] = f'{department}{suffix}'
+                    for i in range(1, 3):
+                        groups.append((f'{division_name} / Группа {i}', division_name))
+        return departments, divisions, groups
+
+    def _employee_rows(self, rng, rows, groups, divisions, options, errors):
+        """
+        Строки сотрудников (генератор)
+
+        Первые строки - руководители групп, поэтому руководитель всегда встречается
+        в файле раньше подчиненного, а цепочки идут вверх по оргструктуре.
+        """
+        prefix = options['login_prefix']
+        error_rate = options['error_rate']
+        error_kinds = list(ERROR_KINDS)
+        division_names = list(divisions)
+        heads = {}
+        division_heads = {}
+        department_heads = {}
+
+        for number in range(1, rows + 1):
+            login = f'{prefix}{number:07d}'
+            if number <= len(groups):
+                group, division = groups[number - 1]
+                department = divisions[division]
+                line_manager = division_heads.get(division) or department_heads.get(department)
+                functional_manager = None
+                heads[group] = login
+                division_heads.setdefault(division, login)
+                department_heads.setdefault(department, login)
+            else:
+                group, division = rng.choice(groups[:len(heads)])
+                department = divisions[division]
+                line_manager = heads[group]
+                # 30% сотрудников имеют функционального руководителя - руководителя отдела
+                functional_manager = division_heads[division] if rng.random() < 0.3 else None
+
+            salary = rng.randint(50000, 500000)
+            row = [
+                login,
+                f'{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)} {rng.choice(MIDDLE_NAMES)}',
+                rng.choice(POSITIONS),
+                department,
+                division,
+                group,
+                functional_manager,
+                line_manager,
+                date.today() - timedelta(days=rng.randint(365, 365 * 10)),
+                salary,
+                rng.randint(0, int(salary * 0.5)),
+                rng.randint(0, int(salary * 0.3)),
+                rng.randint(0, int(salary * 2.0)),
+            ]
+
+            # Ошибки только в рядовых сотрудниках: на руководителей ссылаются другие строки
+            if number > len(groups) and rng.random() < error_rate:
+                kind = rng.choice(error_kinds)
+                if kind == 'missing_login':
+                    # Пустая ячейка читается pandas как NaN и превращается в логин 'nan'
+                    row[0] = ' '
+                elif kind == 'org_mismatch':
+                    row[4] = rng.choice([name for name in division_names if divisions[name] != department])
+                    row[5] = None
+                elif kind == 'self_manager':
+                    row[7] = login
+                elif kind == 'bad_date':
+                    row[8] = '31.02.2020'
+                elif kind == 'bad_number':
+                    row[9] = 'сто тысяч'
+                elif kind == 'unknown_manager':
+                    row[7] = f'{prefix}missing_{number}'
+                errors.append({'row': number + 1, 'login': login, 'kind': kind})
+
+            yield row
+
+    def _write_workbook(self, path, sheets):
+        """Все листы в одну книгу (потоковая запись, листы пишутся по очереди)"""
+        written = {}
+        workbook = Workbook(write_only=True)
+        for name, headers, rows in sheets:
+            sheet = workbook.create_sheet(SHEET_TITLES[name])
+            sheet.append(headers)
+            written[name] = 0
+            for row in rows:
+                sheet.append(row)
+                written[name] += 1
+        workbook.save(path)
+        return written
+
+    def _write(self, path, headers, rows):
+        """Потоковая запись: строки не накапливаются в памяти"""
+        written = 0
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(headers)
+        for row in rows:
+            sheet.append(row)
+            written += 1
+        workbook.save(path)
+        return written
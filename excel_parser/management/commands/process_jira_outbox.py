@@ -0,0 +1,35 @@
+"""
+Management command для обработки очереди создания задач Jira (без Celery)
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+
+from excel_parser.models import JiraOutbox
+from excel_parser.services.jira_outbox import JiraOutboxService
+
+
+class Command(BaseCommand):
+    help = 'Создает задачи Jira из очереди JiraOutbox (то же, что задача Celery process_jira_outbox)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            default=None,
+            help='Максимум пачек за запуск (по умолчанию - пока в очереди есть готовые записи)',
+        )
+
+    def handle(self, *args, **options):
+        if options['max_batches'] is not None and options['max_batches'] < 1:
+            raise CommandError('--max-batches должно быть больше 0')
+
+        stats = JiraOutboxService.process_pending(max_batches=options['max_batches'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Обработано записей: {stats['claimed']} (создано задач: {stats['created']}, "
+            f"найдено при сверке: {stats['reconciled']}, ошибок: {stats['failed']}, "
+            f"отложено: {stats['retry']})"
+        ))
+        counts = dict(JiraOutbox.objects.values_list('status').annotate(count=Count('id')))
+        self.stdout.write('Очередь: ' + ', '.join(
+            f'{label}: {counts.get(status, 0)}' for status, label in JiraOutbox.STATUS_CHOICES
+        ))
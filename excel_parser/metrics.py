@@ -0,0 +1,148 @@
+"""
+Метрики Prometheus: загрузка данных, аналитика, кэш и интеграция с Jira
+
+prometheus_client - необязательная зависимость: без нее метрики не собираются,
+а /metrics отвечает 501.
+"""
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+from asgiref.sync import iscoroutinefunction
+import time
+
+try:
+    from prometheus_client import Counter, Histogram
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
+
+class _NoopMetric:
+    """Заглушка метрики, когда prometheus_client не установлен"""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, amount=1):
+        pass
+
+    def observe(self, amount):
+        pass
+
+
+if PROMETHEUS_AVAILABLE:
+    IMPORT_ROWS = Counter(
+        'payroll_import_rows_total',
+        'Строки, обработанные загрузчиками (rate() дает строки в секунду)',
+        ['loader', 'result'],
+    )
+    IMPORT_STAGE_DURATION = Histogram(
+        'payroll_import_stage_duration_seconds',
+        'Длительность этапов загрузки файла: read, normalize, write',
+        ['loader', 'stage'],
+        buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+    )
+    ANALYTICS_DURATION = Histogram(
+        'payroll_analytics_query_duration_seconds',
+        'Длительность построения отчетов AnalyticsService',
+        ['report'],
+    )
+    CACHE_REQUESTS = Counter(
+        'payroll_cache_requests_total',
+        'Обращения к кэшу (hit/miss)',
+        ['cache', 'result'],
+    )
+    JIRA_REQUEST_DURATION = Histogram(
+        'payroll_jira_request_duration_seconds',
+        'Длительность запросов к Jira API',
+        ['operation'],
+    )
+    JIRA_REQUESTS = Counter(
+        'payroll_jira_requests_total',
+        'Запросы к Jira API по результату (success/error)',
+        ['operation', 'outcome'],
+    )
+    JIRA_RETRIES = Counter(
+        'payroll_jira_retries_total',
+        'Повторы запросов к Jira по причине (rate_limited/server_error/connection)',
+        ['operation', 'reason'],
+    )
+else:
+    IMPORT_ROWS = IMPORT_STAGE_DURATION = ANALYTICS_DURATION = _NoopMetric()
+    CACHE_REQUESTS = JIRA_REQUEST_DURATION = JIRA_REQUESTS = JIRA_RETRIES = _NoopMetric()
+
+
+class ImportMetrics:
+    """
+    Метрики одной загрузки файла
+
+    Время этапов накапливается построчно и записывается в гистограмму один раз
+    на файл в finish().
+    """
+
+    def __init__(self, loader):
+        self.loader = loader
+        self.durations = defaultdict(float)
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[name] += time.perf_counter() - started
+
+    def rows(self, result, count=1):
+        """Учесть строки: created, updated или rejected"""
+        if count:
+            IMPORT_ROWS.labels(self.loader, result).inc(count)
+
+    def finish(self):
+        for stage, duration in self.durations.items():
+            IMPORT_STAGE_DURATION.labels(self.loader, stage).observe(duration)
+
+
+def observe_report(report):
+    """Декоратор: длительность отчета AnalyticsService (sync и async)"""
+    def decorator(func):
+        if iscoroutinefunction(func):
+            @wraps(func)
+            async def inner(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    ANALYTICS_DURATION.labels(report).observe(time.perf_counter() - started)
+        else:
+            @wraps(func)
+            def inner(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    ANALYTICS_DURATION.labels(report).observe(time.perf_counter() - started)
+        return inner
+    return decorator
+
+
+def record_cache(cache_name, hit):
+    """Учесть обращение к кэшу"""
+    CACHE_REQUESTS.labels(cache_name, 'hit' if hit else 'miss').inc()
+
+
+@contextmanager
+def observe_jira_request(operation):
+    """Длительность и результат запроса к Jira API"""
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        yield
+        outcome = 'success'
+    finally:
+        JIRA_REQUEST_DURATION.labels(operation).observe(time.perf_counter() - started)
+        JIRA_REQUESTS.labels(operation, outcome).inc()
+
+
+def record_jira_retry(operation, reason):
+    """Учесть повтор запроса к Jira"""
+    JIRA_RETRIES.labels(operation, reason).inc()
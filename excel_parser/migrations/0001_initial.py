@@ -0,0 +1,328 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:04
+
+import django.core.validators
+import django.db.models.deletion
+import django.db.models.expressions
+import django.utils.timezone
+import uuid
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Department',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Название')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+            ],
+            options={
+                'verbose_name': 'Департамент',
+                'verbose_name_plural': 'Департаменты',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ExcelFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.CharField(max_length=255, verbose_name='Имя файла')),
+                ('file_path', models.FileField(upload_to='excel_files/', verbose_name='Файл')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает обработки'), ('processing', 'Обрабатывается'), ('completed', 'Обработан'), ('failed', 'Ошибка')], default='pending', max_length=20, verbose_name='Статус')),
+                ('total_rows', models.PositiveIntegerField(default=0, verbose_name='Всего строк')),
+                ('processed_rows', models.PositiveIntegerField(default=0, verbose_name='Обработано строк')),
+                ('error_message', models.TextField(blank=True, default='', verbose_name='Ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата загрузки')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+            ],
+            options={
+                'verbose_name': 'Excel-файл',
+                'verbose_name_plural': 'Excel-файлы',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Division',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, verbose_name='Название')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+                ('department', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='divisions', to='excel_parser.department', verbose_name='Департамент')),
+            ],
+            options={
+                'verbose_name': 'Отдел',
+                'verbose_name_plural': 'Отделы',
+                'ordering': ['department', 'name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Employee',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('full_name', models.CharField(max_length=255, verbose_name='ФИО')),
+                ('login', models.CharField(max_length=100, unique=True, verbose_name='Логин')),
+                ('position', models.CharField(blank=True, max_length=255, null=True, verbose_name='Должность')),
+                ('org_path', models.CharField(blank=True, db_index=True, default='', editable=False, max_length=100, verbose_name='Путь в оргструктуре')),
+                ('org_path_names', models.CharField(blank=True, default='', editable=False, max_length=800, verbose_name='Оргструктура')),
+                ('hire_date', models.DateField(verbose_name='Дата принятия на работу')),
+                ('current_salary', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Текущий оклад, гросс')),
+                ('current_quarterly_bonus', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Текущая квартальная премия, гросс')),
+                ('current_monthly_bonus', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Текущая месячная премия, гросс')),
+                ('current_yearly_bonus', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Текущая годовая премия, гросс')),
+                ('current_income', models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.F('current_salary'), '+', models.F('current_quarterly_bonus')), '+', models.F('current_monthly_bonus')), '+', models.F('current_yearly_bonus')), output_field=models.DecimalField(decimal_places=2, max_digits=12), verbose_name='Текущий доход, гросс')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Активен')),
+                ('department', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='employees', to='excel_parser.department', verbose_name='Департамент')),
+                ('division', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='employees', to='excel_parser.division', verbose_name='Отдел')),
+                ('functional_manager', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='functional_subordinates', to='excel_parser.employee', verbose_name='Функциональный руководитель')),
+                ('line_manager', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='line_subordinates', to='excel_parser.employee', verbose_name='Линейный руководитель')),
+            ],
+            options={
+                'verbose_name': 'Сотрудник',
+                'verbose_name_plural': 'Сотрудники',
+                'ordering': ['full_name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='division',
+            name='manager',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='managed_divisions', to='excel_parser.employee', verbose_name='Руководитель'),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='manager',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='managed_departments', to='excel_parser.employee', verbose_name='Руководитель'),
+        ),
+        migrations.CreateModel(
+            name='ExcelRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('row_number', models.PositiveIntegerField(verbose_name='Номер строки')),
+                ('data', models.JSONField(default=dict, verbose_name='Данные')),
+                ('jira_key', models.CharField(blank=True, max_length=50, null=True, verbose_name='Ключ задачи Jira')),
+                ('jira_url', models.URLField(blank=True, null=True, verbose_name='Ссылка на задачу Jira')),
+                ('jira_created_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата создания задачи')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('excel_file', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rows', to='excel_parser.excelfile', verbose_name='Файл')),
+            ],
+            options={
+                'verbose_name': 'Строка Excel',
+                'verbose_name_plural': 'Строки Excel',
+                'ordering': ['excel_file', 'row_number'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Group',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, verbose_name='Название')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+                ('division', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='groups', to='excel_parser.division', verbose_name='Отдел')),
+                ('manager', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='managed_groups', to='excel_parser.employee', verbose_name='Руководитель')),
+            ],
+            options={
+                'verbose_name': 'Группа',
+                'verbose_name_plural': 'Группы',
+                'ordering': ['division', 'name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='group',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='employees', to='excel_parser.group', verbose_name='Группа'),
+        ),
+        migrations.CreateModel(
+            name='ImportRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('loader', models.CharField(choices=[('departments', 'Департаменты'), ('divisions', 'Отделы'), ('groups', 'Группы'), ('employees', 'Сотрудники'), ('workbook', 'Книга (все листы)')], max_length=20, verbose_name='Загрузчик')),
+                ('file_hash', models.CharField(max_length=64, verbose_name='SHA-256 файла')),
+                ('file_name', models.CharField(blank=True, default='', max_length=255, verbose_name='Имя файла')),
+                ('file_size', models.BigIntegerField(default=0, verbose_name='Размер файла (байт)')),
+                ('options', models.JSONField(blank=True, default=dict, verbose_name='Параметры загрузки')),
+                ('result', models.JSONField(default=dict, verbose_name='Результат')),
+                ('data_version', models.CharField(blank=True, default='', max_length=32, verbose_name='Версия данных')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата загрузки')),
+            ],
+            options={
+                'verbose_name': 'Загрузка файла',
+                'verbose_name_plural': 'Загрузки файлов',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['file_hash', 'loader'], name='excel_parse_file_ha_aff163_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='JiraOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('idempotency_key', models.CharField(max_length=64, unique=True, verbose_name='Ключ идемпотентности')),
+                ('project_key', models.CharField(blank=True, default='', max_length=50, verbose_name='Проект Jira')),
+                ('issue_type', models.CharField(default='Task', max_length=50, verbose_name='Тип задачи')),
+                ('summary_template', models.TextField(blank=True, default='', verbose_name='Шаблон заголовка')),
+                ('description_template', models.TextField(blank=True, default='', verbose_name='Шаблон описания')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает отправки'), ('in_flight', 'Отправляется'), ('done', 'Задача создана'), ('failed', 'Ошибка')], default='pending', max_length=20, verbose_name='Статус')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Попыток отправки')),
+                ('last_error', models.TextField(blank=True, default='', verbose_name='Последняя ошибка')),
+                ('jira_key', models.CharField(blank=True, default='', max_length=50, verbose_name='Ключ задачи Jira')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Следующая попытка')),
+                ('locked_until', models.DateTimeField(blank=True, null=True, verbose_name='Заблокирована до')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+                ('excel_row', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jira_outbox', to='excel_parser.excelrow', verbose_name='Строка Excel')),
+            ],
+            options={
+                'verbose_name': 'Задача Jira в очереди',
+                'verbose_name_plural': 'Очередь задач Jira',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SalaryHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('change_date', models.DateField(verbose_name='Дата изменения')),
+                ('salary_before', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Оклад до изменения')),
+                ('salary_after', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Оклад после изменения')),
+                ('salary_diff', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Изменение оклада (diff)')),
+                ('quarterly_bonus_before', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Квартальная премия до')),
+                ('quarterly_bonus_after', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Квартальная премия после')),
+                ('quarterly_bonus_diff', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Изменение квартальной премии (diff)')),
+                ('monthly_bonus_before', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Месячная премия до')),
+                ('monthly_bonus_after', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Месячная премия после')),
+                ('monthly_bonus_diff', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Изменение месячной премии (diff)')),
+                ('yearly_bonus_before', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Годовая премия до')),
+                ('yearly_bonus_after', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Годовая премия после')),
+                ('yearly_bonus_diff', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Изменение годовой премии (diff)')),
+                ('total_income_before', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Общий доход до')),
+                ('total_income_after', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Общий доход после')),
+                ('total_income_diff', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Изменение общего дохода (diff)')),
+                ('comment', models.TextField(blank=True, null=True, verbose_name='Комментарий')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания записи')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='salary_history', to='excel_parser.employee', verbose_name='Сотрудник')),
+            ],
+            options={
+                'verbose_name': 'История изменения зарплаты',
+                'verbose_name_plural': 'История изменений зарплаты',
+                'ordering': ['-change_date', '-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('loader', models.CharField(choices=[('departments', 'Департаменты'), ('divisions', 'Отделы'), ('groups', 'Группы'), ('employees', 'Сотрудники'), ('workbook', 'Книга (все листы)')], max_length=20, verbose_name='Загрузчик')),
+                ('file_name', models.CharField(blank=True, default='', max_length=255, verbose_name='Имя файла')),
+                ('file_size', models.BigIntegerField(verbose_name='Размер файла (байт)')),
+                ('checksum', models.CharField(max_length=64, verbose_name='SHA-256 файла')),
+                ('options', models.JSONField(blank=True, default=dict, verbose_name='Параметры загрузки')),
+                ('received', models.BigIntegerField(default=0, verbose_name='Получено (байт)')),
+                ('status', models.CharField(choices=[('uploading', 'Загружается'), ('importing', 'Импортируется'), ('done', 'Загружен'), ('failed', 'Ошибка')], default='uploading', max_length=20, verbose_name='Статус')),
+                ('result', models.JSONField(blank=True, default=dict, verbose_name='Результат')),
+                ('error', models.TextField(blank=True, default='', verbose_name='Ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+                ('import_record', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='upload_sessions', to='excel_parser.importrecord', verbose_name='Загрузка')),
+            ],
+            options={
+                'verbose_name': 'Загрузка частями',
+                'verbose_name_plural': 'Загрузки частями',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='division',
+            unique_together={('department', 'name')},
+        ),
+        migrations.CreateModel(
+            name='ExcelColumnMapping',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('excel_column', models.CharField(max_length=255, verbose_name='Колонка Excel')),
+                ('db_field', models.CharField(max_length=255, verbose_name='Поле')),
+                ('order', models.PositiveIntegerField(default=0, verbose_name='Порядок')),
+                ('excel_file', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='column_mappings', to='excel_parser.excelfile', verbose_name='Файл')),
+            ],
+            options={
+                'verbose_name': 'Колонка файла',
+                'verbose_name_plural': 'Колонки файлов',
+                'ordering': ['excel_file', 'order'],
+                'constraints': [models.UniqueConstraint(fields=('excel_file', 'excel_column'), name='unique_excel_file_column')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='excelrow',
+            index=models.Index(fields=['excel_file', 'row_number'], name='excel_parse_excel_f_68938d_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='group',
+            unique_together={('division', 'name')},
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['login'], name='excel_parse_login_9415c2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['department', 'division', 'group'], name='excel_parse_departm_f2445a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['hire_date'], name='excel_parse_hire_da_dc0522_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['updated_at'], name='excel_parse_updated_61f0e9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['full_name', 'id'], name='employee_active_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['hire_date', 'id'], name='employee_active_hire_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['current_salary', 'id'], name='employee_active_salary_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['current_income', 'id'], name='employee_active_income_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['org_path_names', 'full_name', 'id'], name='employee_active_org_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jiraoutbox',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='excel_parse_status_cecc10_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salaryhistory',
+            index=models.Index(fields=['employee', 'change_date'], name='excel_parse_employe_3aa9ac_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salaryhistory',
+            index=models.Index(fields=['change_date'], name='excel_parse_change__5f6cd1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salaryhistory',
+            index=models.Index(fields=['created_at'], name='excel_parse_created_7b957f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='uploadsession',
+            index=models.Index(fields=['status', 'updated_at'], name='excel_parse_status_072b08_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+"""
+Поиск сотрудников: расширение pg_trgm и GIN-индексы (только PostgreSQL)
+
+Индексы не объявлены в Employee.Meta.indexes, чтобы схема оставалась совместимой
+с SQLite: на других СУБД миграция ничего не делает.
+"""
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.operations import TrigramExtension
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import F
+
+# Поля и конфигурация - как в services/search.py
+SEARCH_CONFIG = 'russian'
+TRIGRAM_FIELDS = ['full_name', 'login', 'position']
+FULLTEXT_FIELDS = ['full_name', 'position']
+
+
+def search_indexes():
+    indexes = [
+        GinIndex(OpClass(F(field), name='gin_trgm_ops'), name=f'employee_{field}_trgm')
+        for field in TRIGRAM_FIELDS
+    ]
+    indexes.append(GinIndex(SearchVector(*FULLTEXT_FIELDS, config=SEARCH_CONFIG), name='employee_search_fts'))
+    return indexes
+
+
+def create_search_indexes(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    Employee = apps.get_model('excel_parser', 'Employee')
+    with connection.cursor() as cursor:
+        existing = connection.introspection.get_constraints(cursor, Employee._meta.db_table)
+    for index in search_indexes():
+        # Индексы могли быть созданы прежним обработчиком post_migrate
+        if index.name not in existing:
+            schema_editor.add_index(Employee, index)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Employee = apps.get_model('excel_parser', 'Employee')
+    for index in search_indexes():
+        schema_editor.remove_index(Employee, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('excel_parser', '0001_initial'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -2,9 +2,12 @@
 Models for Payroll BI - ФОТ (Фонд оплаты труда)
 """
 from django.db import models
-from django.db.models import F, Sum, DecimalField, ExpressionWrapper
+from django.db.models import F, Q
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 from decimal import Decimal
+import uuid
 
 
 class Department(models.Model):
@@ -100,32 +103,128 @@ class Group(models.Model):
         return f"{self.division.department.name} - {self.division.name} - {self.name}"
 
 
+ORG_PATH_NAMES_SEPARATOR = ' / '
+
+
+def build_org_path(department_id=None, division_id=None, group_id=None):
+    """Путь вида '/<департамент>/<отдел>/<группа>/' (пустая строка вне оргструктуры)"""
+    ids = [str(pk) for pk in (department_id, division_id, group_id) if pk]
+    return f"/{'/'.join(ids)}/" if ids else ''
+
+
+def resolve_org_unit(department_id=None, division_id=None, group_id=None):
+    """
+    Согласовать узел оргструктуры по иерархии и получить его путь
+
+    Недостающие родители берутся из иерархии (группа -> отдел -> департамент).
+    Выполняет не более одного запроса - к самому глубокому заданному узлу.
+
+    Returns:
+        dict с ключами department_id, division_id, group_id, org_path, org_path_names
+
+    Raises:
+        ValidationError: если узлы не существуют или не принадлежат друг другу
+    """
+    department = division = group = None
+    errors = {}
+
+    if group_id:
+        group = Group.objects.select_related('division__department').filter(pk=group_id).first()
+        if group is None:
+            raise ValidationError({'group': f"Группа {group_id} не найдена"})
+        division = group.division
+        department = division.department
+        if division_id and division_id != division.pk:
+            errors['group'] = f"Группа «{group.name}» не входит в выбранный отдел"
+        elif department_id and department_id != department.pk:
+            errors['group'] = f"Группа «{group.name}» не входит в выбранный департамент"
+    elif division_id:
+        division = Division.objects.select_related('department').filter(pk=division_id).first()
+        if division is None:
+            raise ValidationError({'division': f"Отдел {division_id} не найден"})
+        department = division.department
+        if department_id and department_id != department.pk:
+            errors['division'] = f"Отдел «{division.name}» не входит в выбранный департамент"
+    elif department_id:
+        department = Department.objects.filter(pk=department_id).first()
+        if department is None:
+            raise ValidationError({'department': f"Департамент {department_id} не найден"})
+
+    if errors:
+        raise ValidationError(errors)
+
+    nodes = [node for node in (department, division, group) if node is not None]
+    ids = [node.pk if node is not None else None for node in (department, division, group)]
+    return {
+        'department_id': ids[0],
+        'division_id': ids[1],
+        'group_id': ids[2],
+        'org_path': build_org_path(*ids),
+        'org_path_names': ORG_PATH_NAMES_SEPARATOR.join(node.name for node in nodes),
+    }
+
+
 class EmployeeQuerySet(models.QuerySet):
-    """Кастомный QuerySet для Employee с поддержкой current_income в запросах"""
-    
-    def with_current_income(self):
-        """Добавляет вычисляемое поле current_income через annotate"""
-        # Используем другое имя для annotate, чтобы не конфликтовать с property
-        return self.annotate(
-            _annotated_current_income=ExpressionWrapper(
-                F('current_salary') + 
-                F('current_quarterly_bonus') + 
-                F('current_monthly_bonus') + 
-                F('current_yearly_bonus'),
-                output_field=DecimalField(max_digits=12, decimal_places=2)
+    """QuerySet сотрудников с фильтрами по денормализованному пути оргструктуры"""
+
+    def in_org_unit(self, department_id=None, division_id=None, group_id=None):
+        """
+        Сотрудники поддерева узла оргструктуры одним префиксным условием по org_path
+
+        Несогласованная комбинация узлов дает пустой QuerySet.
+        """
+        if not (department_id or division_id or group_id):
+            return self
+        try:
+            unit = resolve_org_unit(
+                int(department_id) if department_id else None,
+                int(division_id) if division_id else None,
+                int(group_id) if group_id else None,
             )
-        )
+        except (ValidationError, ValueError):
+            return self.none()
+        return self.filter(org_path__startswith=unit['org_path'])
 
+    def refresh_org_paths(self, batch_size=1000):
+        """
+        Пересчитать org_path и org_path_names из FK
 
-class EmployeeManager(models.Manager):
-    """Кастомный Manager для Employee"""
-    
-    def get_queryset(self):
-        return EmployeeQuerySet(self.model, using=self._db)
-    
-    def with_current_income(self):
-        """Возвращает QuerySet с вычисляемым полем current_income"""
-        return self.get_queryset().with_current_income()
+        Нужен после переименования/удаления узлов и после bulk_create/update,
+        которые обходят Employee.save(). Названия узлов загружаются тремя запросами.
+
+        Returns:
+            int: количество обновленных сотрудников
+        """
+        department_names = dict(Department.objects.values_list('id', 'name'))
+        division_names = dict(Division.objects.values_list('id', 'name'))
+        group_names = dict(Group.objects.values_list('id', 'name'))
+
+        changed = []
+        updated = 0
+        employees = self.only(
+            'id', 'department_id', 'division_id', 'group_id', 'org_path', 'org_path_names'
+        ).order_by('id')
+        for employee in employees.iterator(chunk_size=batch_size):
+            ids = (employee.department_id, employee.division_id, employee.group_id)
+            org_path = build_org_path(*ids)
+            org_path_names = ORG_PATH_NAMES_SEPARATOR.join(
+                names[pk]
+                for names, pk in zip((department_names, division_names, group_names), ids)
+                if pk in names
+            )
+            if employee.org_path != org_path or employee.org_path_names != org_path_names:
+                employee.org_path = org_path
+                employee.org_path_names = org_path_names
+                changed.append(employee)
+            if len(changed) >= batch_size:
+                self.model.objects.bulk_update(changed, ['org_path', 'org_path_names'])
+                updated += len(changed)
+                changed = []
+
+        if changed:
+            self.model.objects.bulk_update(changed, ['org_path', 'org_path_names'])
+            updated += len(changed)
+        return updated
 
 
 class Employee(models.Model):
@@ -161,6 +260,23 @@ class Employee(models.Model):
     )
     position = models.CharField(max_length=255, blank=True, null=True, verbose_name="Должность")
     
+    # Денормализованный путь в оргструктуре, поддерживается в save()
+    org_path = models.CharField(
+        max_length=100,
+        blank=True,
+        default='',
+        db_index=True,
+        editable=False,
+        verbose_name="Путь в оргструктуре"
+    )
+    org_path_names = models.CharField(
+        max_length=800,
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name="Оргструктура"
+    )
+    
     # Руководители
     functional_manager = models.ForeignKey(
         'self',
@@ -212,30 +328,25 @@ class Employee(models.Model):
         verbose_name="Текущая годовая премия, гросс"
     )
     
-    # Метод для вычисления текущего дохода
-    def _get_current_income(self):
-        """Текущий доход, гросс - сумма оклада и всех премий"""
-        # Если есть annotate поле (из with_current_income()), используем его
-        if '_annotated_current_income' in self.__dict__:
-            return self.__dict__['_annotated_current_income']
-        
-        # Иначе вычисляем вручную
-        return (
-            self.current_salary +
-            self.current_quarterly_bonus +
-            self.current_monthly_bonus +
-            self.current_yearly_bonus
-        )
-    
-    current_income = property(_get_current_income)
+    # Текущий доход - хранимая генерируемая колонка, вычисляется СУБД
+    current_income = models.GeneratedField(
+        expression=(
+            F('current_salary') +
+            F('current_quarterly_bonus') +
+            F('current_monthly_bonus') +
+            F('current_yearly_bonus')
+        ),
+        output_field=models.DecimalField(max_digits=12, decimal_places=2),
+        db_persist=True,
+        verbose_name="Текущий доход, гросс"
+    )
     
     # Метаданные
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата обновления")
     is_active = models.BooleanField(default=True, verbose_name="Активен")
     
-    # Кастомный менеджер
-    objects = EmployeeManager()
+    objects = EmployeeQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Сотрудник"
@@ -245,23 +356,110 @@ class Employee(models.Model):
             models.Index(fields=['login']),
             models.Index(fields=['department', 'division', 'group']),
             models.Index(fields=['hire_date']),
+            models.Index(fields=['updated_at']),
+            # Индексы для сортировок списка активных сотрудников (EMPLOYEE_SORTS)
+            models.Index(
+                fields=['full_name', 'id'],
+                condition=Q(is_active=True),
+                name='employee_active_name_idx'
+            ),
+            models.Index(
+                fields=['hire_date', 'id'],
+                condition=Q(is_active=True),
+                name='employee_active_hire_idx'
+            ),
+            models.Index(
+                fields=['current_salary', 'id'],
+                condition=Q(is_active=True),
+                name='employee_active_salary_idx'
+            ),
+            models.Index(
+                fields=['current_income', 'id'],
+                condition=Q(is_active=True),
+                name='employee_active_income_idx'
+            ),
+            models.Index(
+                fields=['org_path_names', 'full_name', 'id'],
+                condition=Q(is_active=True),
+                name='employee_active_org_idx'
+            ),
         ]
 
     def __str__(self):
         return f"{self.full_name} ({self.login})"
 
-    def __setattr__(self, name, value):
-        """Перехватываем попытки установить current_income и перенаправляем на _annotated_current_income"""
-        if name == 'current_income':
-            # Если пытаются установить current_income (из annotate), устанавливаем _annotated_current_income
-            # и сохраняем в __dict__ напрямую, чтобы обойти property
-            self.__dict__['_annotated_current_income'] = value
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем загруженных руководителей, чтобы проверять циклы только при их изменении
+        instance._loaded_manager_ids = {
+            'line': instance.__dict__.get('line_manager_id'),
+            'functional': instance.__dict__.get('functional_manager_id'),
+        }
+        instance._loaded_org_ids = (
+            instance.__dict__.get('department_id'),
+            instance.__dict__.get('division_id'),
+            instance.__dict__.get('group_id'),
+        )
+        return instance
+
+    def sync_org_path(self):
+        """
+        Проверить согласованность департамента/отдела/группы и обновить org_path
+
+        Недостающие родители заполняются по иерархии.
+
+        Raises:
+            ValidationError: если отдел не входит в департамент или группа в отдел
+        """
+        org_ids = (self.department_id, self.division_id, self.group_id)
+        if org_ids == getattr(self, '_loaded_org_ids', None) and self.org_path == build_org_path(*org_ids):
             return
-        super().__setattr__(name, value)
-    
+
+        unit = resolve_org_unit(*org_ids)
+        for field in ('department_id', 'division_id', 'group_id'):
+            if getattr(self, field) != unit[field]:
+                setattr(self, field, unit[field])
+        self.org_path = unit['org_path']
+        self.org_path_names = unit['org_path_names']
+
+    def get_manager_cycle_errors(self, using=None):
+        """Ошибки для руководителей, назначение которых замкнет цепочку подчинения"""
+        from .services.management_chain import ManagementChainService
+
+        using = using or self._state.db or 'default'
+        loaded = getattr(self, '_loaded_manager_ids', {})
+        errors = {}
+        for relation, field_name in ManagementChainService.RELATIONS.items():
+            manager_id = getattr(self, f'{field_name}_id')
+            if manager_id is None or loaded.get(relation) == manager_id:
+                continue
+            if ManagementChainService.would_create_cycle(self.pk, manager_id, relation, using):
+                errors[field_name] = "Назначение руководителя создает цикл в цепочке подчинения"
+        return errors
+
+    def clean(self):
+        super().clean()
+        self.sync_org_path()
+        errors = self.get_manager_cycle_errors()
+        if errors:
+            raise ValidationError(errors)
+
     def save(self, *args, **kwargs):
+        self.sync_org_path()
+        errors = self.get_manager_cycle_errors(using=kwargs.get('using'))
+        if errors:
+            raise ValidationError(errors)
         # При сохранении можно автоматически обновлять историю зарплаты
         super().save(*args, **kwargs)
+        self._loaded_manager_ids = {
+            'line': self.line_manager_id,
+            'functional': self.functional_manager_id,
+        }
+        self._loaded_org_ids = (self.department_id, self.division_id, self.group_id)
+        # current_income пересчитан СУБД: сбрасываем значение в памяти,
+        # чтобы при следующем обращении оно было лениво загружено из БД
+        self.__dict__.pop('current_income', None)
 
 
 class SalaryHistory(models.Model):
@@ -384,6 +582,7 @@ class SalaryHistory(models.Model):
         indexes = [
             models.Index(fields=['employee', 'change_date']),
             models.Index(fields=['change_date']),
+            models.Index(fields=['created_at']),
         ]
 
     def __str__(self):
@@ -391,6 +590,11 @@ class SalaryHistory(models.Model):
 
     def save(self, *args, **kwargs):
         # Автоматически вычисляем diff при сохранении
+        self.calculate_diffs()
+        super().save(*args, **kwargs)
+
+    def calculate_diffs(self):
+        """Вычислить разницы и итоговый доход до/после (для bulk_create, который не вызывает save)"""
         self.salary_diff = self.salary_after - self.salary_before
         self.quarterly_bonus_diff = self.quarterly_bonus_after - self.quarterly_bonus_before
         self.monthly_bonus_diff = self.monthly_bonus_after - self.monthly_bonus_before
@@ -409,5 +613,253 @@ class SalaryHistory(models.Model):
             self.yearly_bonus_after
         )
         self.total_income_diff = self.total_income_after - self.total_income_before
-        
-        super().save(*args, **kwargs)
+
+
+class ExcelFile(models.Model):
+    """Загруженный Excel-файл, строки которого хранятся в ExcelRow"""
+    STATUS_CHOICES = [
+        ('pending', 'Ожидает обработки'),
+        ('processing', 'Обрабатывается'),
+        ('completed', 'Обработан'),
+        ('failed', 'Ошибка'),
+    ]
+
+    file_name = models.CharField(max_length=255, verbose_name="Имя файла")
+    file_path = models.FileField(upload_to='excel_files/', verbose_name="Файл")
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending',
+        verbose_name="Статус"
+    )
+    total_rows = models.PositiveIntegerField(default=0, verbose_name="Всего строк")
+    processed_rows = models.PositiveIntegerField(default=0, verbose_name="Обработано строк")
+    error_message = models.TextField(blank=True, default='', verbose_name="Ошибка")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата загрузки")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата обновления")
+
+    class Meta:
+        verbose_name = "Excel-файл"
+        verbose_name_plural = "Excel-файлы"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return self.file_name
+
+
+class ExcelColumnMapping(models.Model):
+    """Колонка загруженного листа (ключ в ExcelRow.data) и ее порядок в файле"""
+    excel_file = models.ForeignKey(
+        ExcelFile,
+        on_delete=models.CASCADE,
+        related_name='column_mappings',
+        verbose_name="Файл"
+    )
+    excel_column = models.CharField(max_length=255, verbose_name="Колонка Excel")
+    db_field = models.CharField(max_length=255, verbose_name="Поле")
+    order = models.PositiveIntegerField(default=0, verbose_name="Порядок")
+
+    class Meta:
+        verbose_name = "Колонка файла"
+        verbose_name_plural = "Колонки файлов"
+        ordering = ['excel_file', 'order']
+        constraints = [
+            models.UniqueConstraint(fields=['excel_file', 'excel_column'], name='unique_excel_file_column'),
+        ]
+
+    def __str__(self):
+        return f"{self.excel_file_id}: {self.excel_column}"
+
+
+class ExcelRow(models.Model):
+    """
+    Строка загруженного листа
+
+    Значения хранятся в data (JSONB в PostgreSQL) по названиям колонок;
+    индексы по data создает команда create_sheet_indexes.
+    """
+    excel_file = models.ForeignKey(
+        ExcelFile,
+        on_delete=models.CASCADE,
+        related_name='rows',
+        verbose_name="Файл"
+    )
+    row_number = models.PositiveIntegerField(verbose_name="Номер строки")
+    data = models.JSONField(default=dict, verbose_name="Данные")
+
+    # Задача Jira, созданная по строке
+    jira_key = models.CharField(max_length=50, blank=True, null=True, verbose_name="Ключ задачи Jira")
+    jira_url = models.URLField(blank=True, null=True, verbose_name="Ссылка на задачу Jira")
+    jira_created_at = models.DateTimeField(blank=True, null=True, verbose_name="Дата создания задачи")
+
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+
+    class Meta:
+        verbose_name = "Строка Excel"
+        verbose_name_plural = "Строки Excel"
+        ordering = ['excel_file', 'row_number']
+        indexes = [
+            models.Index(fields=['excel_file', 'row_number']),
+        ]
+
+    def __str__(self):
+        return f"{self.excel_file_id}: строка {self.row_number}"
+
+    def get_data_preview(self, length=100):
+        """Значения строки одной строкой для таблицы"""
+        preview = ', '.join(f"{key}: {value}" for key, value in self.data.items())
+        return preview if len(preview) <= length else preview[:length] + '...'
+
+
+class JiraOutbox(models.Model):
+    """
+    Очередь создания задач Jira (outbox)
+
+    Запись создается до обращения к Jira, поэтому после сбоя известно, какие задачи
+    могли быть отправлены. Ключ идемпотентности передается в Jira меткой задачи:
+    перед повторной отправкой задача ищется по этой метке.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_IN_FLIGHT = 'in_flight'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Ожидает отправки'),
+        (STATUS_IN_FLIGHT, 'Отправляется'),
+        (STATUS_DONE, 'Задача создана'),
+        (STATUS_FAILED, 'Ошибка'),
+    ]
+
+    # Строка может быть удалена после создания задачи: запись остается в истории очереди
+    excel_row = models.ForeignKey(
+        ExcelRow,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='jira_outbox',
+        verbose_name="Строка Excel"
+    )
+    idempotency_key = models.CharField(max_length=64, unique=True, verbose_name="Ключ идемпотентности")
+    project_key = models.CharField(max_length=50, blank=True, default='', verbose_name="Проект Jira")
+    issue_type = models.CharField(max_length=50, default='Task', verbose_name="Тип задачи")
+    summary_template = models.TextField(blank=True, default='', verbose_name="Шаблон заголовка")
+    description_template = models.TextField(blank=True, default='', verbose_name="Шаблон описания")
+
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        verbose_name="Статус"
+    )
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Попыток отправки")
+    last_error = models.TextField(blank=True, default='', verbose_name="Последняя ошибка")
+    jira_key = models.CharField(max_length=50, blank=True, default='', verbose_name="Ключ задачи Jira")
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name="Следующая попытка")
+    # Срок, до которого запись обрабатывает воркер; после него запись забирает другой воркер
+    locked_until = models.DateTimeField(null=True, blank=True, verbose_name="Заблокирована до")
+
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата обновления")
+
+    class Meta:
+        verbose_name = "Задача Jira в очереди"
+        verbose_name_plural = "Очередь задач Jira"
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"Строка {self.excel_row_id}: {self.get_status_display()}"
+
+
+class ImportRecord(models.Model):
+    """
+    Результат загрузки файла
+
+    Повторная загрузка того же файла (тот же sha256 и параметры) возвращает сохраненный
+    результат, если данные не менялись после этой загрузки (data_version).
+    """
+    LOADER_CHOICES = [
+        ('departments', 'Департаменты'),
+        ('divisions', 'Отделы'),
+        ('groups', 'Группы'),
+        ('employees', 'Сотрудники'),
+        ('workbook', 'Книга (все листы)'),
+    ]
+
+    loader = models.CharField(max_length=20, choices=LOADER_CHOICES, verbose_name="Загрузчик")
+    file_hash = models.CharField(max_length=64, verbose_name="SHA-256 файла")
+    file_name = models.CharField(max_length=255, blank=True, default='', verbose_name="Имя файла")
+    file_size = models.BigIntegerField(default=0, verbose_name="Размер файла (байт)")
+    options = models.JSONField(default=dict, blank=True, verbose_name="Параметры загрузки")
+    result = models.JSONField(default=dict, verbose_name="Результат")
+    # Версия данных (DataVersionService) сразу после загрузки
+    data_version = models.CharField(max_length=32, blank=True, default='', verbose_name="Версия данных")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата загрузки")
+
+    class Meta:
+        verbose_name = "Загрузка файла"
+        verbose_name_plural = "Загрузки файлов"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['file_hash', 'loader']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_loader_display()}: {self.file_name} ({self.created_at:%d.%m.%Y %H:%M})"
+
+
+class UploadSession(models.Model):
+    """
+    Загрузка файла частями (с возобновлением)
+
+    Части дописываются во временный файл в UPLOAD_TEMP_DIR по смещению. После получения
+    всех байт sha256 файла сверяется с заявленным клиентом, и файл передается загрузчику
+    по пути (DataLoaderService.import_file), не проходя через память воркера.
+    """
+    STATUS_UPLOADING = 'uploading'
+    STATUS_IMPORTING = 'importing'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_UPLOADING, 'Загружается'),
+        (STATUS_IMPORTING, 'Импортируется'),
+        (STATUS_DONE, 'Загружен'),
+        (STATUS_FAILED, 'Ошибка'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    loader = models.CharField(max_length=20, choices=ImportRecord.LOADER_CHOICES, verbose_name="Загрузчик")
+    file_name = models.CharField(max_length=255, blank=True, default='', verbose_name="Имя файла")
+    file_size = models.BigIntegerField(verbose_name="Размер файла (байт)")
+    checksum = models.CharField(max_length=64, verbose_name="SHA-256 файла")
+    options = models.JSONField(default=dict, blank=True, verbose_name="Параметры загрузки")
+    # Сколько байт от начала файла получено (смещение следующей части)
+    received = models.BigIntegerField(default=0, verbose_name="Получено (байт)")
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default=STATUS_UPLOADING, verbose_name="Статус"
+    )
+    import_record = models.ForeignKey(
+        ImportRecord,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='upload_sessions',
+        verbose_name="Загрузка"
+    )
+    result = models.JSONField(default=dict, blank=True, verbose_name="Результат")
+    error = models.TextField(blank=True, default='', verbose_name="Ошибка")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата обновления")
+
+    class Meta:
+        verbose_name = "Загрузка частями"
+        verbose_name_plural = "Загрузки частями"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.file_name} ({self.received}/{self.file_size}, {self.get_status_display()})"
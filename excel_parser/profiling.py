@@ -0,0 +1,207 @@
+"""
+Профилирование запросов: число SQL-запросов, время SQL, дубликаты (N+1) и
+скользящие перцентили длительности по маршрутам
+"""
+from collections import Counter, deque
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from asgiref.local import Local
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+import json
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Профиль текущего запроса (поток или async-контекст; виден и в потоках sync_to_async)
+_current = Local()
+
+
+class RequestProfile:
+    """SQL-статистика одного запроса"""
+
+    def __init__(self):
+        self.query_count = 0
+        self.sql_time = 0.0
+        self.statements = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, sql, duration):
+        with self._lock:
+            self.query_count += 1
+            self.sql_time += duration
+            self.statements[sql] += 1
+
+    def get_duplicates(self, threshold):
+        """SQL, выполненные не меньше threshold раз (признак N+1), по убыванию числа повторов"""
+        return [(sql, count) for sql, count in self.statements.most_common() if count >= threshold]
+
+
+def profile_execute(execute, sql, params, many, context):
+    """execute_wrapper: учитывает запрос в профиле текущего HTTP-запроса"""
+    profile = getattr(_current, 'profile', None)
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.record(sql, time.perf_counter() - started)
+
+
+def install_execute_wrapper(connection, **kwargs):
+    """Подключить profile_execute к соединению (обработчик connection_created)"""
+    if profile_execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(profile_execute)
+
+
+def percentile(sorted_values, percent):
+    """Перцентиль по методу ближайшего ранга"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class RouteStats:
+    """
+    Скользящее окно последних запросов по маршрутам
+
+    Хранится в памяти процесса: при нескольких воркерах gunicorn у каждого своя статистика.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def add(self, route, view_name, duration_ms, query_count, sql_ms, duplicates):
+        with self._lock:
+            samples = self._samples.setdefault(route, {
+                'view_name': view_name,
+                'samples': deque(maxlen=self.window),
+            })
+            samples['samples'].append((duration_ms, query_count, sql_ms, duplicates))
+
+    def snapshot(self):
+        """Перцентили длительности и средние показатели SQL по каждому маршруту"""
+        with self._lock:
+            items = [(route, data['view_name'], list(data['samples'])) for route, data in self._samples.items()]
+
+        routes = []
+        for route, view_name, samples in items:
+            durations = sorted(sample[0] for sample in samples)
+            routes.append({
+                'route': route,
+                'view_name': view_name,
+                'count': len(samples),
+                'p50_ms': round(percentile(durations, 50), 2),
+                'p95_ms': round(percentile(durations, 95), 2),
+                'p99_ms': round(percentile(durations, 99), 2),
+                'max_ms': round(durations[-1], 2),
+                'avg_queries': round(sum(sample[1] for sample in samples) / len(samples), 2),
+                'avg_sql_ms': round(sum(sample[2] for sample in samples) / len(samples), 2),
+                'max_duplicates': max(sample[3] for sample in samples),
+            })
+        return sorted(routes, key=lambda item: item['p95_ms'], reverse=True)
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+
+route_stats = RouteStats(getattr(settings, 'QUERY_PROFILING_WINDOW', 500))
+
+
+class QueryProfilingMiddleware:
+    """
+    Middleware профилирования (включается QUERY_PROFILING = True)
+
+    Для каждого запроса считает SQL-запросы и их суммарное время, ищет
+    повторяющиеся запросы, добавляет заголовок Server-Timing и сохраняет
+    длительность в route_stats. Медленные запросы (SLOW_REQUEST_MS) и запросы
+    с дубликатами пишутся в лог одной JSON-строкой.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_PROFILING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_request_ms = getattr(settings, 'SLOW_REQUEST_MS', 500)
+        self.duplicate_threshold = getattr(settings, 'DUPLICATE_QUERY_THRESHOLD', 5)
+        connection_created.connect(install_execute_wrapper, dispatch_uid='excel_parser_query_profiling')
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = self._start()
+        try:
+            response = self.get_response(request)
+        finally:
+            profile = self._stop()
+        self._finish(request, response, profile, started)
+        return response
+
+    async def __acall__(self, request):
+        started = self._start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profile = self._stop()
+        self._finish(request, response, profile, started)
+        return response
+
+    def _start(self):
+        # Соединения, открытые до подключения сигнала (например, постоянные)
+        for connection in connections.all(initialized_only=True):
+            install_execute_wrapper(connection)
+        _current.profile = RequestProfile()
+        return time.perf_counter()
+
+    def _stop(self):
+        profile = _current.profile
+        _current.profile = None
+        return profile
+
+    def _finish(self, request, response, profile, started):
+        duration_ms = (time.perf_counter() - started) * 1000
+        sql_ms = profile.sql_time * 1000
+        duplicates = profile.get_duplicates(self.duplicate_threshold)
+
+        match = getattr(request, 'resolver_match', None)
+        # У маршрутов DRF router это регулярное выражение: убираем якоря ^ и $
+        route = f"{request.method} /{match.route.replace('^', '').replace('$', '')}" if match else \
+            f"{request.method} <unresolved>"
+        view_name = match.view_name if match else None
+
+        route_stats.add(route, view_name, duration_ms, profile.query_count, sql_ms,
+                        duplicates[0][1] if duplicates else 0)
+
+        response.headers['Server-Timing'] = (
+            f'app;dur={duration_ms:.1f}, db;dur={sql_ms:.1f};desc="{profile.query_count} queries"'
+        )
+
+        if duration_ms >= self.slow_request_ms or duplicates:
+            logger.warning(json.dumps({
+                'event': 'slow_request' if duration_ms >= self.slow_request_ms else 'duplicate_queries',
+                'method': request.method,
+                'path': request.path,
+                'route': route,
+                'view_name': view_name,
+                'status': response.status_code,
+                'duration_ms': round(duration_ms, 2),
+                'query_count': profile.query_count,
+                'sql_ms': round(sql_ms, 2),
+                'duplicates': [
+                    {'sql': sql[:300], 'count': count}
+                    for sql, count in duplicates[:5]
+                ],
+            }, ensure_ascii=False))
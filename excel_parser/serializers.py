@@ -1,8 +1,12 @@
 """
 Serializers for REST API
 """
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
-from .models import Department, Division, Group, Employee, SalaryHistory
+from .models import (
+    Department, Division, Group, Employee, SalaryHistory, UploadSession, resolve_org_unit
+)
+from .services.management_chain import ManagementChainService
 
 
 class DepartmentSerializer(serializers.ModelSerializer):
@@ -74,6 +78,7 @@ class EmployeeSerializer(serializers.ModelSerializer):
             'division', 'division_name',
             'group', 'group_name',
             'position',
+            'org_path', 'org_path_names',
             'functional_manager', 'functional_manager_name',
             'line_manager', 'line_manager_name',
             'hire_date',
@@ -82,7 +87,33 @@ class EmployeeSerializer(serializers.ModelSerializer):
             'current_income',
             'is_active', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['created_at', 'updated_at', 'current_income']
+        read_only_fields = ['created_at', 'updated_at', 'current_income', 'org_path', 'org_path_names']
+    
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        employee_id = self.instance.pk if self.instance else None
+        
+        org_ids = []
+        for field_name in ('department', 'division', 'group'):
+            if field_name in attrs:
+                node = attrs[field_name]
+                org_ids.append(node.pk if node else None)
+            else:
+                org_ids.append(getattr(self.instance, f'{field_name}_id', None))
+        try:
+            resolve_org_unit(*org_ids)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.message_dict)
+        
+        for relation, field_name in ManagementChainService.RELATIONS.items():
+            manager = attrs.get(field_name)
+            if manager is not None and ManagementChainService.would_create_cycle(
+                employee_id, manager.pk, relation
+            ):
+                raise serializers.ValidationError({
+                    field_name: 'Назначение руководителя создает цикл в цепочке подчинения'
+                })
+        return attrs
 
 
 class SalaryHistorySerializer(serializers.ModelSerializer):
@@ -106,3 +137,17 @@ class SalaryHistorySerializer(serializers.ModelSerializer):
             'yearly_bonus_diff', 'total_income_before', 'total_income_after',
             'total_income_diff', 'created_at'
         ]
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """Состояние загрузки частями; offset - смещение следующей части"""
+    offset = serializers.IntegerField(source='received', read_only=True)
+    import_id = serializers.IntegerField(source='import_record_id', read_only=True)
+
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'loader', 'file_name', 'file_size', 'offset', 'status',
+            'import_id', 'result', 'error', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
@@ -1,4 +1,11 @@
 from .data_loader import DataLoaderService
 from .analytics import AnalyticsService
+from .data_version import DataVersionService
+from .search import EmployeeSearchService
+from .org_tree import OrgTreeService
+from .management_chain import ManagementChainService
+from .synthetic_data import SyntheticDataService
 
-__all__ = ['DataLoaderService', 'AnalyticsService']
+__all__ = ['DataLoaderService', 'AnalyticsService', 'DataVersionService',
+           'EmployeeSearchService', 'OrgTreeService', 'ManagementChainService',
+           'SyntheticDataService']
@@ -8,12 +8,14 @@ from django.db.models.functions import ExtractYear, ExtractQuarter, TruncDate
 from decimal import Decimal
 from datetime import date, datetime
 from ..models import Employee, Department, Division, Group, SalaryHistory
+from ..metrics import observe_report
 
 
 class AnalyticsService:
     """Сервис для аналитики ФОТ"""
     
     @staticmethod
+    @observe_report('department_delta')
     def get_department_delta(department_id, year_from, year_to):
         """
         Получить дельту повышения департамента между годами
@@ -31,36 +33,59 @@ class AnalyticsService:
         except Department.DoesNotExist:
             return None
         
-        # Получаем сотрудников департамента с вычисляемым current_income
-        employees = Employee.objects.filter(department=department, is_active=True).with_current_income()
-        
-        # Получаем историю изменений за указанные годы
-        history_from = SalaryHistory.objects.filter(
-            employee__in=employees,
-            change_date__year=year_from
-        ).aggregate(
-            total_income=Sum('total_income_after'),
-            avg_income=Avg('total_income_after'),
-            count=Count('id')
+        history_from, history_to, current_stats = [
+            queryset.aggregate(**aggregates)
+            for queryset, aggregates in AnalyticsService._department_delta_queries(department, year_from, year_to)
+        ]
+        return AnalyticsService._department_delta_result(
+            department, year_from, year_to, history_from, history_to, current_stats
         )
+    
+    @staticmethod
+    @observe_report('department_delta')
+    async def aget_department_delta(department_id, year_from, year_to):
+        """Асинхронный вариант get_department_delta (async ORM)"""
+        try:
+            department = await Department.objects.aget(id=department_id)
+        except Department.DoesNotExist:
+            return None
         
-        history_to = SalaryHistory.objects.filter(
-            employee__in=employees,
-            change_date__year=year_to
-        ).aggregate(
-            total_income=Sum('total_income_after'),
-            avg_income=Avg('total_income_after'),
-            count=Count('id')
+        history_from, history_to, current_stats = [
+            await queryset.aaggregate(**aggregates)
+            for queryset, aggregates in AnalyticsService._department_delta_queries(department, year_from, year_to)
+        ]
+        return AnalyticsService._department_delta_result(
+            department, year_from, year_to, history_from, history_to, current_stats
         )
+    
+    @staticmethod
+    def _department_delta_queries(department, year_from, year_to):
+        """Запросы для дельты департамента: список пар (queryset, агрегаты)"""
+        # Получаем сотрудников департамента
+        employees = Employee.objects.filter(department=department, is_active=True)
         
-        # Текущие показатели сотрудников
-        current_stats = employees.with_current_income().aggregate(
-            total_current=Sum('_annotated_current_income'),
-            avg_current=Avg('_annotated_current_income'),
-            count=Count('id')
-        )
+        def history_aggregates():
+            return {
+                'total_income': Sum('total_income_after'),
+                'avg_income': Avg('total_income_after'),
+                'count': Count('id'),
+            }
         
-        # Вычисляем дельту
+        return [
+            # История изменений за указанные годы
+            (SalaryHistory.objects.filter(employee__in=employees, change_date__year=year_from), history_aggregates()),
+            (SalaryHistory.objects.filter(employee__in=employees, change_date__year=year_to), history_aggregates()),
+            # Текущие показатели сотрудников
+            (employees, {
+                'total_current': Sum('current_income'),
+                'avg_current': Avg('current_income'),
+                'count': Count('id'),
+            }),
+        ]
+    
+    @staticmethod
+    def _department_delta_result(department, year_from, year_to, history_from, history_to, current_stats):
+        """Вычислить дельту по агрегатам истории и текущих показателей"""
         total_from = history_from['total_income'] or Decimal('0.00')
         total_to = history_to['total_income'] or current_stats['total_current'] or Decimal('0.00')
         delta_total = total_to - total_from
@@ -84,6 +109,7 @@ class AnalyticsService:
         }
     
     @staticmethod
+    @observe_report('custom_report')
     def get_custom_report(filters=None, group_by=None, metrics=None):
         """
         Создать произвольный отчет с различными разрезами
@@ -103,16 +129,15 @@ class AnalyticsService:
         if metrics is None:
             metrics = ['total_income', 'count']
         
-        # Базовый queryset с вычисляемым current_income
-        queryset = Employee.objects.filter(is_active=True).with_current_income()
+        # Базовый queryset
+        queryset = Employee.objects.filter(is_active=True)
         
         # Применяем фильтры
-        if filters.get('department'):
-            queryset = queryset.filter(department_id=filters['department'])
-        if filters.get('division'):
-            queryset = queryset.filter(division_id=filters['division'])
-        if filters.get('group'):
-            queryset = queryset.filter(group_id=filters['group'])
+        queryset = queryset.in_org_unit(
+            filters.get('department'),
+            filters.get('division'),
+            filters.get('group')
+        )
         if filters.get('date_from'):
             queryset = queryset.filter(hire_date__gte=filters['date_from'])
         if filters.get('date_to'):
@@ -123,9 +148,9 @@ class AnalyticsService:
         
         # Метрики
         if 'total_income' in metrics:
-            annotations['total_income'] = Sum('_annotated_current_income')
+            annotations['total_income'] = Sum('current_income')
         if 'avg_income' in metrics:
-            annotations['avg_income'] = Avg('_annotated_current_income')
+            annotations['avg_income'] = Avg('current_income')
         if 'count' in metrics:
             annotations['count'] = Count('id')
         if 'total_salary' in metrics:
@@ -155,6 +180,7 @@ class AnalyticsService:
         }
     
     @staticmethod
+    @observe_report('salary_history_report')
     def get_salary_history_report(employee_id=None, department_id=None, date_from=None, date_to=None):
         """
         Отчет по истории изменений зарплаты
@@ -168,6 +194,35 @@ class AnalyticsService:
         Returns:
             dict с данными отчета
         """
+        history_by_period = AnalyticsService._salary_history_by_period(
+            employee_id, department_id, date_from, date_to
+        )
+        return {
+            'period': {
+                'from': date_from,
+                'to': date_to
+            },
+            'data': list(history_by_period)
+        }
+    
+    @staticmethod
+    @observe_report('salary_history_report')
+    async def aget_salary_history_report(employee_id=None, department_id=None, date_from=None, date_to=None):
+        """Асинхронный вариант get_salary_history_report (async ORM)"""
+        history_by_period = AnalyticsService._salary_history_by_period(
+            employee_id, department_id, date_from, date_to
+        )
+        return {
+            'period': {
+                'from': date_from,
+                'to': date_to
+            },
+            'data': [row async for row in history_by_period]
+        }
+    
+    @staticmethod
+    def _salary_history_by_period(employee_id=None, department_id=None, date_from=None, date_to=None):
+        """Изменения зарплаты по годам и кварталам (ленивый QuerySet)"""
         queryset = SalaryHistory.objects.all()
         
         if employee_id:
@@ -180,7 +235,7 @@ class AnalyticsService:
             queryset = queryset.filter(change_date__lte=date_to)
         
         # Группировка по годам и кварталам
-        history_by_period = queryset.annotate(
+        return queryset.annotate(
             year=ExtractYear('change_date'),
             quarter=ExtractQuarter('change_date')
         ).values('year', 'quarter').annotate(
@@ -190,16 +245,9 @@ class AnalyticsService:
             avg_salary_increase=Avg('salary_diff'),
             avg_income_increase=Avg('total_income_diff')
         ).order_by('year', 'quarter')
-        
-        return {
-            'period': {
-                'from': date_from,
-                'to': date_to
-            },
-            'data': list(history_by_period)
-        }
     
     @staticmethod
+    @observe_report('fot_summary')
     def get_fot_summary(date_from=None, date_to=None):
         """
         Сводный отчет по ФОТ
@@ -211,41 +259,80 @@ class AnalyticsService:
         Returns:
             dict с сводными данными
         """
-        employees = Employee.objects.filter(is_active=True).with_current_income()
-        
-        # Текущий ФОТ
-        current_fot = employees.aggregate(
-            total=Sum('_annotated_current_income'),
-            avg=Avg('_annotated_current_income'),
-            count=Count('id')
+        employees, history = AnalyticsService._fot_summary_queries(date_from, date_to)
+        history_changes = None
+        if history is not None:
+            history_changes = history.aggregate(**AnalyticsService._fot_history_aggregates())
+        return AnalyticsService._fot_summary_result(
+            date_from,
+            date_to,
+            current_fot=employees.aggregate(**AnalyticsService._fot_aggregates()),
+            fot_by_department=list(AnalyticsService._fot_by_department(employees)),
+            history_changes=history_changes,
         )
-        
-        # ФОТ по департаментам
-        fot_by_department = employees.values('department__name').annotate(
-            total=Sum('_annotated_current_income'),
-            avg=Avg('_annotated_current_income'),
-            count=Count('id')
-        ).order_by('-total')
-        
-        # Изменения за период
+    
+    @staticmethod
+    @observe_report('fot_summary')
+    async def aget_fot_summary(date_from=None, date_to=None):
+        """Асинхронный вариант get_fot_summary (async ORM)"""
+        employees, history = AnalyticsService._fot_summary_queries(date_from, date_to)
         history_changes = None
+        if history is not None:
+            history_changes = await history.aaggregate(**AnalyticsService._fot_history_aggregates())
+        return AnalyticsService._fot_summary_result(
+            date_from,
+            date_to,
+            current_fot=await employees.aaggregate(**AnalyticsService._fot_aggregates()),
+            fot_by_department=[row async for row in AnalyticsService._fot_by_department(employees)],
+            history_changes=history_changes,
+        )
+    
+    @staticmethod
+    def _fot_summary_queries(date_from=None, date_to=None):
+        """Активные сотрудники и (если задан период) изменения зарплаты за период"""
+        employees = Employee.objects.filter(is_active=True)
+        history = None
         if date_from and date_to:
-            history_changes = SalaryHistory.objects.filter(
+            history = SalaryHistory.objects.filter(
                 change_date__gte=date_from,
                 change_date__lte=date_to
-            ).aggregate(
-                total_increase=Sum('total_income_diff'),
-                avg_increase=Avg('total_income_diff'),
-                changes_count=Count('id')
             )
-        
+        return employees, history
+    
+    @staticmethod
+    def _fot_aggregates():
+        """Агрегаты текущего ФОТ"""
+        return {
+            'total': Sum('current_income'),
+            'avg': Avg('current_income'),
+            'count': Count('id'),
+        }
+    
+    @staticmethod
+    def _fot_history_aggregates():
+        """Агрегаты изменений ФОТ за период"""
+        return {
+            'total_increase': Sum('total_income_diff'),
+            'avg_increase': Avg('total_income_diff'),
+            'changes_count': Count('id'),
+        }
+    
+    @staticmethod
+    def _fot_by_department(employees):
+        """ФОТ по департаментам"""
+        return employees.values('department__name').annotate(
+            **AnalyticsService._fot_aggregates()
+        ).order_by('-total')
+    
+    @staticmethod
+    def _fot_summary_result(date_from, date_to, current_fot, fot_by_department, history_changes):
+        """Собрать ответ сводного отчета"""
         return {
             'current_fot': current_fot,
-            'fot_by_department': list(fot_by_department),
+            'fot_by_department': fot_by_department,
             'period_changes': history_changes,
             'period': {
                 'from': date_from,
                 'to': date_to
             }
         }
-
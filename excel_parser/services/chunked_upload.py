@@ -0,0 +1,238 @@
+"""
+Загрузка больших файлов частями с возобновлением
+"""
+from datetime import timedelta
+import logging
+import os
+import re
+
+from django.conf import settings
+from django.utils import timezone
+
+from ..models import UploadSession
+from .data_loader import DataLoaderService
+from .import_cache import ImportCacheService
+
+logger = logging.getLogger(__name__)
+
+# Размер блока при копировании части из запроса в файл
+COPY_BLOCK_SIZE = 64 * 1024
+
+SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class UploadConflict(Exception):
+    """Часть не с текущего смещения (повтор или параллельная отправка); offset - ожидаемое смещение"""
+
+    def __init__(self, message, offset):
+        super().__init__(message)
+        self.offset = offset
+
+
+class ChunkedUploadService:
+    """
+    Загрузка файла частями: create -> write_chunk (по порядку) -> complete
+
+    Часть записывается в файл по своему смещению, смещение сессии сдвигается условным
+    UPDATE (received = offset), поэтому повтор уже принятой части или параллельная
+    отправка получают UploadConflict с текущим смещением, с которого клиент продолжает.
+    Файл целиком проверяется по sha256 в complete() и передается загрузчику по пути.
+    """
+
+    @staticmethod
+    def file_path(session):
+        return os.path.join(settings.UPLOAD_TEMP_DIR, f'{session.pk}.part')
+
+    @staticmethod
+    def create(loader, file_name, file_size, checksum, options=None):
+        """
+        Начать загрузку
+
+        Args:
+            loader: ключ DataLoaderService.LOADERS
+            file_size: размер файла в байтах
+            checksum: sha256 файла (hex)
+            options: параметры загрузчика (например, update_salary_history)
+
+        Raises:
+            ValueError: неизвестный загрузчик, некорректный размер или контрольная сумма
+        """
+        if loader not in DataLoaderService.LOADERS:
+            raise ValueError(f"Unknown loader {loader!r}, expected one of {', '.join(DataLoaderService.LOADERS)}")
+        file_size = int(file_size)
+        if not 0 < file_size <= settings.UPLOAD_MAX_FILE_SIZE:
+            raise ValueError(f"size must be 1..{settings.UPLOAD_MAX_FILE_SIZE} bytes")
+        checksum = str(checksum or '').lower()
+        if not SHA256_RE.match(checksum):
+            raise ValueError("sha256 must be a hex SHA-256 digest of the file")
+        if options is not None and not isinstance(options, dict):
+            raise ValueError("options must be an object")
+
+        session = UploadSession.objects.create(
+            loader=loader,
+            file_name=(file_name or '')[:255],
+            file_size=file_size,
+            checksum=checksum,
+            options=options or {},
+        )
+        os.makedirs(settings.UPLOAD_TEMP_DIR, exist_ok=True)
+        open(ChunkedUploadService.file_path(session), 'wb').close()
+        return session
+
+    @staticmethod
+    def write_chunk(session, offset, length, stream):
+        """
+        Записать часть файла из потока (тело запроса читается блоками, не целиком)
+
+        Args:
+            offset: смещение части в файле
+            length: размер части
+            stream: файловый объект с данными части
+
+        Returns:
+            int: смещение следующей части
+
+        Raises:
+            UploadConflict: offset не равен полученному размеру или загрузка уже не принимает части
+            ValueError: часть больше UPLOAD_CHUNK_MAX_SIZE, выходит за размер файла или получена не полностью
+        """
+        if session.status != UploadSession.STATUS_UPLOADING:
+            raise UploadConflict(f"Upload is {session.status}", session.received)
+        if offset != session.received:
+            raise UploadConflict(f"Expected chunk at offset {session.received}", session.received)
+        if not 0 < length <= settings.UPLOAD_CHUNK_MAX_SIZE:
+            raise ValueError(f"Chunk size must be 1..{settings.UPLOAD_CHUNK_MAX_SIZE} bytes")
+        if offset + length > session.file_size:
+            raise ValueError(f"Chunk exceeds file size {session.file_size}")
+
+        written = 0
+        with open(ChunkedUploadService.file_path(session), 'r+b') as f:
+            f.seek(offset)
+            while written < length:
+                block = stream.read(min(COPY_BLOCK_SIZE, length - written))
+                if not block:
+                    break
+                f.write(block)
+                written += len(block)
+        if written != length:
+            # Обрыв соединения: смещение не сдвигается, клиент повторяет часть
+            raise ValueError(f"Incomplete chunk: received {written} of {length} bytes")
+
+        updated = UploadSession.objects.filter(
+            pk=session.pk, received=offset, status=UploadSession.STATUS_UPLOADING
+        ).update(received=offset + length, updated_at=timezone.now())
+        if not updated:
+            session.refresh_from_db()
+            raise UploadConflict(f"Expected chunk at offset {session.received}", session.received)
+        session.received = offset + length
+        return session.received
+
+    @staticmethod
+    def complete(session, force=False):
+        """
+        Проверить файл и загрузить его
+
+        С UPLOAD_IMPORT_ASYNC загрузка ставится в Celery (статус importing),
+        иначе выполняется сразу.
+
+        Raises:
+            UploadConflict: получены не все части или загрузка уже завершается
+        """
+        if session.status != UploadSession.STATUS_UPLOADING or session.received != session.file_size:
+            raise UploadConflict(
+                f"Upload is {session.status}, received {session.received} of {session.file_size} bytes",
+                session.received
+            )
+        updated = UploadSession.objects.filter(
+            pk=session.pk, status=UploadSession.STATUS_UPLOADING
+        ).update(status=UploadSession.STATUS_IMPORTING, updated_at=timezone.now())
+        if not updated:
+            session.refresh_from_db()
+            raise UploadConflict(f"Upload is {session.status}", session.received)
+        session.status = UploadSession.STATUS_IMPORTING
+
+        file_hash = ImportCacheService.hash_file(ChunkedUploadService.file_path(session))[0]
+        if file_hash != session.checksum:
+            ChunkedUploadService._finish(
+                session, UploadSession.STATUS_FAILED,
+                error=f"Checksum mismatch: expected {session.checksum}, got {file_hash}"
+            )
+            return session
+
+        if settings.UPLOAD_IMPORT_ASYNC:
+            from ..tasks import import_upload
+            import_upload.delay(str(session.pk), force=force)
+            return session
+        return ChunkedUploadService.run_import(session, force=force)
+
+    @staticmethod
+    def run_import(session, force=False):
+        """Загрузить проверенный файл загрузчиком сессии (статус importing)"""
+        try:
+            result = DataLoaderService.import_file(
+                session.loader, ChunkedUploadService.file_path(session), force=force,
+                file_name=session.file_name, file_hash=session.checksum, **session.options
+            )
+        except Exception as e:
+            logger.error(f"Error importing upload {session.pk}: {str(e)}")
+            ChunkedUploadService._finish(session, UploadSession.STATUS_FAILED, error=str(e))
+        else:
+            ChunkedUploadService._finish(
+                session, UploadSession.STATUS_DONE, result=result, import_record_id=result['import_id']
+            )
+        return session
+
+    @staticmethod
+    def cancel(session):
+        """Отменить загрузку и удалить полученные части"""
+        ChunkedUploadService._remove_file(session)
+        session.delete()
+
+    @staticmethod
+    def cleanup(max_age_hours=None):
+        """
+        Удалить незавершенные загрузки старше UPLOAD_SESSION_TTL_HOURS и их файлы
+
+        Returns:
+            int: число удаленных загрузок
+        """
+        hours = settings.UPLOAD_SESSION_TTL_HOURS if max_age_hours is None else max_age_hours
+        cutoff = timezone.now() - timedelta(hours=hours)
+        expired = UploadSession.objects.filter(
+            status__in=[UploadSession.STATUS_UPLOADING, UploadSession.STATUS_FAILED],
+            updated_at__lt=cutoff,
+        )
+        count = 0
+        for session in expired.iterator():
+            ChunkedUploadService.cancel(session)
+            count += 1
+
+        # Файлы без загрузки (например, после удаления записи вручную)
+        if os.path.isdir(settings.UPLOAD_TEMP_DIR):
+            active = {
+                str(pk) for pk in UploadSession.objects.filter(
+                    status__in=[UploadSession.STATUS_UPLOADING, UploadSession.STATUS_IMPORTING]
+                ).values_list('pk', flat=True)
+            }
+            for name in os.listdir(settings.UPLOAD_TEMP_DIR):
+                path = os.path.join(settings.UPLOAD_TEMP_DIR, name)
+                if (name.endswith('.part') and name[:-len('.part')] not in active
+                        and os.path.getmtime(path) < cutoff.timestamp()):
+                    os.remove(path)
+        return count
+
+    @staticmethod
+    def _finish(session, status, **fields):
+        # Файл больше не нужен: разобранные данные остаются в кэше загрузок по sha256
+        ChunkedUploadService._remove_file(session)
+        session.status = status
+        for name, value in fields.items():
+            setattr(session, name, value)
+        session.save(update_fields=['status', *fields, 'updated_at'])
+
+    @staticmethod
+    def _remove_file(session):
+        try:
+            os.remove(ChunkedUploadService.file_path(session))
+        except FileNotFoundError:
+            pass
@@ -3,12 +3,16 @@
 """
 import pandas as pd
 from django.core.files.uploadedfile import InMemoryUploadedFile
+from django.db import transaction
 from ..models import (
     Department, Division, Group, Employee, SalaryHistory
 )
+from ..metrics import ImportMetrics
+from .import_cache import ImportCacheService
 from django.utils import timezone
 from decimal import Decimal
 import logging
+import os
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -16,6 +20,15 @@ logger = logging.getLogger(__name__)
 
 class DataLoaderService:
     """Сервис для загрузки данных из файлов"""
+
+    # Загрузчики по ключу ImportRecord.loader
+    LOADERS = {
+        'departments': 'load_departments_from_file',
+        'divisions': 'load_divisions_from_file',
+        'groups': 'load_groups_from_file',
+        'employees': 'load_employees_from_file',
+        'workbook': 'load_workbook_from_file',
+    }
     
     @staticmethod
     def parse_date(date_value):
@@ -45,220 +58,355 @@ class DataLoaderService:
             return Decimal('0.00')
     
     @staticmethod
-    def load_departments_from_file(file):
-        """Загрузка департаментов из файла"""
+    def parse_text(value):
+        """Текст ячейки без пробелов по краям; пустая ячейка (NaN) - пустая строка"""
+        if value is None or (not isinstance(value, str) and pd.isna(value)):
+            return ''
+        return str(value).strip()
+
+    @staticmethod
+    def read_file(file, file_hash=None, sheets=False):
+        """
+        Прочитать файл загрузки в DataFrame
+
+        Args:
+            file: путь, файловый объект или уже прочитанный DataFrame (листы - при sheets=True)
+            file_hash: sha256 файла, если уже посчитан (для кэша разобранных файлов)
+            sheets: прочитать все листы книги в {имя листа: DataFrame}
+        """
+        if isinstance(file, (pd.DataFrame, dict)):
+            return file
+        return ImportCacheService.read_excel(file, file_hash, sheets=sheets)
+
+    @staticmethod
+    def import_file(loader, file, force=False, file_name=None, file_hash=None, dry_run=False, **options):
+        """
+        Загрузить файл загрузчиком loader с учетом прежних загрузок
+
+        Тот же файл (sha256) с теми же параметрами, загруженный после последнего
+        изменения данных, не загружается повторно: возвращается прежний результат
+        с duplicate=True. force=True загружает файл в любом случае.
+        dry_run=True только проверяет файл: прежние загрузки не учитываются, ImportRecord не создается.
+
+        Args:
+            loader: ключ из LOADERS ('departments', 'divisions', 'groups', 'employees', 'workbook')
+            file: путь или файловый объект
+            file_hash: sha256 уже проверенного файла (тогда file - путь, файл не хешируется повторно)
+            options: параметры загрузчика (например, update_salary_history)
+
+        Returns:
+            dict: результат загрузчика, import_id и duplicate (с dry_run - отчет проверки)
+        """
+        load = getattr(DataLoaderService, DataLoaderService.LOADERS[loader])
+        if dry_run:
+            # Разобранный файл остается в кэше: загрузка после проверки не читает Excel заново
+            data = DataLoaderService.read_file(file, file_hash, sheets=loader == 'workbook')
+            return load(data, dry_run=True, **options)
+
+        if file_hash is None:
+            file_hash, file_size = ImportCacheService.hash_file(file)
+        else:
+            file_size = os.path.getsize(file)
+        if file_name is None:
+            file_name = getattr(file, 'name', None) or str(file)
+
+        if not force:
+            previous = ImportCacheService.find_previous(loader, file_hash, options)
+            if previous is not None:
+                logger.info(f"File {file_name} ({file_hash[:12]}) was already imported as #{previous.id}")
+                return {**previous.result, 'import_id': previous.id, 'duplicate': True}
+
+        data = DataLoaderService.read_file(file, file_hash, sheets=loader == 'workbook')
+        result = load(data, **options)
+        record = ImportCacheService.record(loader, file_hash, file_size, file_name, options, result)
+        return {**result, 'import_id': record.id, 'duplicate': False}
+
+    @staticmethod
+    def validate_file(loader, file, **options):
+        """
+        Проверить файл загрузчика без записи в БД (dry_run)
+
+        Весь файл разбирается и сверяется с оргструктурой и сотрудниками в памяти
+        (см. WorkbookLoaderService.validate_sheet).
+
+        Returns:
+            dict: сколько строк было бы создано и обновлено, rejected, errors
+            (и warnings для сотрудников), dry_run=True
+        """
+        # Модуль импортирует DataLoaderService, поэтому подключается при вызове
+        from .workbook_loader import WorkbookLoaderService
+        return WorkbookLoaderService.validate_sheet(loader, DataLoaderService.read_file(file), **options)
+
+    @staticmethod
+    def load_workbook_from_file(file, update_salary_history=True, dry_run=False):
+        """Загрузка оргструктуры и сотрудников из листов одной книги (см. WorkbookLoaderService)"""
+        # Модуль импортирует DataLoaderService, поэтому подключается при вызове
+        from .workbook_loader import WorkbookLoaderService
+        return WorkbookLoaderService.load(file, update_salary_history=update_salary_history, dry_run=dry_run)
+
+    @staticmethod
+    def load_departments_from_file(file, dry_run=False):
+        """Загрузка департаментов из файла (dry_run - только проверка, см. validate_file)"""
+        if dry_run:
+            return DataLoaderService.validate_file('departments', file)
+        metrics = ImportMetrics('departments')
         try:
-            # Если это путь к файлу, используем его напрямую, иначе временный файл
-            if isinstance(file, str):
-                df = pd.read_excel(file, engine='openpyxl')
-            else:
-                df = pd.read_excel(file, engine='openpyxl')
+            with metrics.stage('read'):
+                df = DataLoaderService.read_file(file)
             created = 0
             updated = 0
             
             for _, row in df.iterrows():
-                name = str(row.get('Название', row.get('name', ''))).strip()
+                with metrics.stage('normalize'):
+                    name = str(row.get('Название', row.get('name', ''))).strip()
                 if not name:
+                    metrics.rows('rejected')
                     continue
                 
-                dept, created_flag = Department.objects.get_or_create(
-                    name=name,
-                    defaults={}
-                )
+                with metrics.stage('write'):
+                    dept, created_flag = Department.objects.get_or_create(
+                        name=name,
+                        defaults={}
+                    )
                 
                 if created_flag:
                     created += 1
                 else:
                     updated += 1
             
+            metrics.rows('created', created)
+            metrics.rows('updated', updated)
             return {'created': created, 'updated': updated}
         except Exception as e:
             logger.error(f"Error loading departments: {str(e)}")
             raise
+        finally:
+            metrics.finish()
     
     @staticmethod
-    def load_divisions_from_file(file):
-        """Загрузка отделов из файла"""
+    def load_divisions_from_file(file, dry_run=False):
+        """Загрузка отделов из файла (dry_run - только проверка, см. validate_file)"""
+        if dry_run:
+            return DataLoaderService.validate_file('divisions', file)
+        metrics = ImportMetrics('divisions')
         try:
-            df = pd.read_excel(file, engine='openpyxl')
+            with metrics.stage('read'):
+                df = DataLoaderService.read_file(file)
             created = 0
             updated = 0
             
             for _, row in df.iterrows():
-                dept_name = str(row.get('Департамент', row.get('department', ''))).strip()
-                div_name = str(row.get('Название', row.get('name', ''))).strip()
+                with metrics.stage('normalize'):
+                    dept_name = str(row.get('Департамент', row.get('department', ''))).strip()
+                    div_name = str(row.get('Название', row.get('name', ''))).strip()
                 
                 if not dept_name or not div_name:
+                    metrics.rows('rejected')
                     continue
                 
-                try:
-                    department = Department.objects.get(name=dept_name)
-                except Department.DoesNotExist:
-                    logger.warning(f"Department {dept_name} not found, skipping division {div_name}")
-                    continue
-                
-                div, created_flag = Division.objects.get_or_create(
-                    department=department,
-                    name=div_name,
-                    defaults={}
-                )
+                with metrics.stage('write'):
+                    try:
+                        department = Department.objects.get(name=dept_name)
+                    except Department.DoesNotExist:
+                        logger.warning(f"Department {dept_name} not found, skipping division {div_name}")
+                        metrics.rows('rejected')
+                        continue
+                    
+                    div, created_flag = Division.objects.get_or_create(
+                        department=department,
+                        name=div_name,
+                        defaults={}
+                    )
                 
                 if created_flag:
                     created += 1
                 else:
                     updated += 1
             
+            metrics.rows('created', created)
+            metrics.rows('updated', updated)
             return {'created': created, 'updated': updated}
         except Exception as e:
             logger.error(f"Error loading divisions: {str(e)}")
             raise
+        finally:
+            metrics.finish()
     
     @staticmethod
-    def load_groups_from_file(file):
-        """Загрузка групп из файла"""
+    def load_groups_from_file(file, dry_run=False):
+        """Загрузка групп из файла (dry_run - только проверка, см. validate_file)"""
+        if dry_run:
+            return DataLoaderService.validate_file('groups', file)
+        metrics = ImportMetrics('groups')
         try:
-            df = pd.read_excel(file, engine='openpyxl')
+            with metrics.stage('read'):
+                df = DataLoaderService.read_file(file)
             created = 0
             updated = 0
             
             for _, row in df.iterrows():
-                div_name = str(row.get('Отдел', row.get('division', ''))).strip()
-                group_name = str(row.get('Название', row.get('name', ''))).strip()
+                with metrics.stage('normalize'):
+                    div_name = str(row.get('Отдел', row.get('division', ''))).strip()
+                    group_name = str(row.get('Название', row.get('name', ''))).strip()
                 
                 if not div_name or not group_name:
+                    metrics.rows('rejected')
                     continue
                 
-                try:
-                    division = Division.objects.get(name=div_name)
-                except Division.DoesNotExist:
-                    logger.warning(f"Division {div_name} not found, skipping group {group_name}")
-                    continue
-                
-                group, created_flag = Group.objects.get_or_create(
-                    division=division,
-                    name=group_name,
-                    defaults={}
-                )
+                with metrics.stage('write'):
+                    try:
+                        division = Division.objects.get(name=div_name)
+                    except Division.DoesNotExist:
+                        logger.warning(f"Division {div_name} not found, skipping group {group_name}")
+                        metrics.rows('rejected')
+                        continue
+                    
+                    group, created_flag = Group.objects.get_or_create(
+                        division=division,
+                        name=group_name,
+                        defaults={}
+                    )
                 
                 if created_flag:
                     created += 1
                 else:
                     updated += 1
             
+            metrics.rows('created', created)
+            metrics.rows('updated', updated)
             return {'created': created, 'updated': updated}
         except Exception as e:
             logger.error(f"Error loading groups: {str(e)}")
             raise
+        finally:
+            metrics.finish()
     
     @staticmethod
-    def load_employees_from_file(file, update_salary_history=True):
-        """Загрузка сотрудников из файла"""
+    def load_employees_from_file(file, update_salary_history=True, dry_run=False):
+        """Загрузка сотрудников из файла (dry_run - только проверка, см. validate_file)"""
+        if dry_run:
+            return DataLoaderService.validate_file('employees', file, update_salary_history=update_salary_history)
+        metrics = ImportMetrics('employees')
         try:
-            df = pd.read_excel(file, engine='openpyxl')
+            with metrics.stage('read'):
+                df = DataLoaderService.read_file(file)
             created = 0
             updated = 0
             errors = []
             
             for idx, row in df.iterrows():
                 try:
-                    login = str(row.get('Логин', row.get('login', ''))).strip()
+                    with metrics.stage('normalize'):
+                        login = str(row.get('Логин', row.get('login', ''))).strip()
+                        full_name = str(row.get('ФИО', row.get('full_name', ''))).strip()
+                        position = str(row.get('Должность', row.get('position', ''))).strip() or None
+                        hire_date = DataLoaderService.parse_date(
+                            row.get('Дата принятия', row.get('hire_date'))
+                        ) or timezone.now().date()
+                        
+                        dept_name = str(row.get('Департамент', row.get('department', ''))).strip()
+                        div_name = str(row.get('Отдел', row.get('division', ''))).strip()
+                        group_name = str(row.get('Группа', row.get('group', ''))).strip()
+                        
+                        func_manager_login = str(row.get('Функциональный руководитель', row.get('functional_manager', ''))).strip()
+                        line_manager_login = str(row.get('Линейный руководитель', row.get('line_manager', ''))).strip()
+                        
+                        salary = DataLoaderService.parse_decimal(
+                            row.get('Оклад', row.get('salary', row.get('current_salary')))
+                        )
+                        quarterly_bonus = DataLoaderService.parse_decimal(
+                            row.get('Квартальная премия', row.get('quarterly_bonus'))
+                        )
+                        monthly_bonus = DataLoaderService.parse_decimal(
+                            row.get('Месячная премия', row.get('monthly_bonus'))
+                        )
+                        yearly_bonus = DataLoaderService.parse_decimal(
+                            row.get('Годовая премия', row.get('yearly_bonus'))
+                        )
+                    
                     if not login:
                         errors.append(f"Row {idx + 2}: Missing login")
                         continue
                     
-                    # Получаем или создаем сотрудника
-                    employee, employee_created = Employee.objects.get_or_create(
-                        login=login,
-                        defaults={
-                            'full_name': str(row.get('ФИО', row.get('full_name', ''))).strip(),
-                            'position': str(row.get('Должность', row.get('position', ''))).strip() or None,
-                            'hire_date': DataLoaderService.parse_date(
-                                row.get('Дата принятия', row.get('hire_date'))
-                            ) or timezone.now().date(),
-                        }
-                    )
-                    
-                    # Обновляем организационную структуру
-                    dept_name = str(row.get('Департамент', row.get('department', ''))).strip()
-                    div_name = str(row.get('Отдел', row.get('division', ''))).strip()
-                    group_name = str(row.get('Группа', row.get('group', ''))).strip()
-                    
-                    if dept_name:
-                        try:
-                            employee.department = Department.objects.get(name=dept_name)
-                        except Department.DoesNotExist:
-                            pass
-                    
-                    if div_name:
-                        try:
-                            employee.division = Division.objects.get(name=div_name)
-                        except Division.DoesNotExist:
-                            pass
-                    
-                    if group_name:
-                        try:
-                            employee.group = Group.objects.get(name=group_name)
-                        except Group.DoesNotExist:
-                            pass
-                    
-                    # Обновляем руководителей
-                    func_manager_login = str(row.get('Функциональный руководитель', row.get('functional_manager', ''))).strip()
-                    line_manager_login = str(row.get('Линейный руководитель', row.get('line_manager', ''))).strip()
-                    
-                    if func_manager_login:
-                        try:
-                            employee.functional_manager = Employee.objects.get(login=func_manager_login)
-                        except Employee.DoesNotExist:
-                            pass
-                    
-                    if line_manager_login:
-                        try:
-                            employee.line_manager = Employee.objects.get(login=line_manager_login)
-                        except Employee.DoesNotExist:
-                            pass
-                    
-                    # Сохраняем старые значения для истории
-                    old_salary = employee.current_salary
-                    old_quarterly = employee.current_quarterly_bonus
-                    old_monthly = employee.current_monthly_bonus
-                    old_yearly = employee.current_yearly_bonus
-                    
-                    # Обновляем финансовые показатели
-                    employee.current_salary = DataLoaderService.parse_decimal(
-                        row.get('Оклад', row.get('salary', row.get('current_salary')))
-                    )
-                    employee.current_quarterly_bonus = DataLoaderService.parse_decimal(
-                        row.get('Квартальная премия', row.get('quarterly_bonus'))
-                    )
-                    employee.current_monthly_bonus = DataLoaderService.parse_decimal(
-                        row.get('Месячная премия', row.get('monthly_bonus'))
-                    )
-                    employee.current_yearly_bonus = DataLoaderService.parse_decimal(
-                        row.get('Годовая премия', row.get('yearly_bonus'))
-                    )
-                    
-                    employee.save()
-                    
-                    # Создаем запись в истории, если были изменения
-                    if update_salary_history and (
-                        old_salary != employee.current_salary or
-                        old_quarterly != employee.current_quarterly_bonus or
-                        old_monthly != employee.current_monthly_bonus or
-                        old_yearly != employee.current_yearly_bonus
-                    ):
-                        SalaryHistory.objects.create(
-                            employee=employee,
-                            change_date=timezone.now().date(),
-                            salary_before=old_salary,
-                            salary_after=employee.current_salary,
-                            quarterly_bonus_before=old_quarterly,
-                            quarterly_bonus_after=employee.current_quarterly_bonus,
-                            monthly_bonus_before=old_monthly,
-                            monthly_bonus_after=employee.current_monthly_bonus,
-                            yearly_bonus_before=old_yearly,
-                            yearly_bonus_after=employee.current_yearly_bonus,
-                            comment=f"Загружено из файла"
+                    # Строка целиком или ничего: ошибка проверки в Employee.save() (оргструктура,
+                    # цикл руководителей) не должна оставлять созданного без них сотрудника
+                    with metrics.stage('write'), transaction.atomic():
+                        # Получаем или создаем сотрудника
+                        employee, employee_created = Employee.objects.get_or_create(
+                            login=login,
+                            defaults={
+                                'full_name': full_name,
+                                'position': position,
+                                'hire_date': hire_date,
+                            }
                         )
+                        
+                        # Обновляем организационную структуру
+                        if dept_name:
+                            try:
+                                employee.department = Department.objects.get(name=dept_name)
+                            except Department.DoesNotExist:
+                                pass
+                        
+                        if div_name:
+                            try:
+                                employee.division = Division.objects.get(name=div_name)
+                            except Division.DoesNotExist:
+                                pass
+                        
+                        if group_name:
+                            try:
+                                employee.group = Group.objects.get(name=group_name)
+                            except Group.DoesNotExist:
+                                pass
+                        
+                        # Обновляем руководителей
+                        if func_manager_login:
+                            try:
+                                employee.functional_manager = Employee.objects.get(login=func_manager_login)
+                            except Employee.DoesNotExist:
+                                pass
+                        
+                        if line_manager_login:
+                            try:
+                                employee.line_manager = Employee.objects.get(login=line_manager_login)
+                            except Employee.DoesNotExist:
+                                pass
+                        
+                        # Сохраняем старые значения для истории
+                        old_salary = employee.current_salary
+                        old_quarterly = employee.current_quarterly_bonus
+                        old_monthly = employee.current_monthly_bonus
+                        old_yearly = employee.current_yearly_bonus
+                        
+                        # Обновляем финансовые показатели
+                        employee.current_salary = salary
+                        employee.current_quarterly_bonus = quarterly_bonus
+                        employee.current_monthly_bonus = monthly_bonus
+                        employee.current_yearly_bonus = yearly_bonus
+                        
+                        employee.save()
+                        
+                        # Создаем запись в истории, если были изменения
+                        if update_salary_history and (
+                            old_salary != employee.current_salary or
+                            old_quarterly != employee.current_quarterly_bonus or
+                            old_monthly != employee.current_monthly_bonus or
+                            old_yearly != employee.current_yearly_bonus
+                        ):
+                            SalaryHistory.objects.create(
+                                employee=employee,
+                                change_date=timezone.now().date(),
+                                salary_before=old_salary,
+                                salary_after=employee.current_salary,
+                                quarterly_bonus_before=old_quarterly,
+                                quarterly_bonus_after=employee.current_quarterly_bonus,
+                                monthly_bonus_before=old_monthly,
+                                monthly_bonus_after=employee.current_monthly_bonus,
+                                yearly_bonus_before=old_yearly,
+                                yearly_bonus_after=employee.current_yearly_bonus,
+                                comment=f"Загружено из файла"
+                            )
                     
                     if employee_created:
                         created += 1
@@ -269,6 +417,9 @@ class DataLoaderService:
                     errors.append(f"Row {idx + 2}: {str(e)}")
                     logger.error(f"Error processing employee row {idx + 2}: {str(e)}")
             
+            metrics.rows('created', created)
+            metrics.rows('updated', updated)
+            metrics.rows('rejected', len(errors))
             return {
                 'created': created,
                 'updated': updated,
@@ -277,4 +428,5 @@ class DataLoaderService:
         except Exception as e:
             logger.error(f"Error loading employees: {str(e)}")
             raise
-
+        finally:
+            metrics.finish()
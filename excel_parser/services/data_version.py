@@ -0,0 +1,94 @@
+"""
+Сервис версий данных для условных GET-запросов (ETag/Last-Modified)
+"""
+import hashlib
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max, Count
+from ..models import Department, Division, Group, Employee, SalaryHistory
+
+
+class DataVersionService:
+    """Дешевые отпечатки состояния данных по updated_at и количеству строк"""
+
+    # Области данных: модель и поле с отметкой времени последнего изменения.
+    # Количество строк нужно, чтобы удаление тоже меняло версию.
+    SCOPES = {
+        'org': (
+            (Department, 'updated_at'),
+            (Division, 'updated_at'),
+            (Group, 'updated_at'),
+        ),
+        'employees': (
+            (Employee, 'updated_at'),
+        ),
+        'salary_history': (
+            (SalaryHistory, 'created_at'),
+        ),
+    }
+
+    @staticmethod
+    def get_state(*scopes):
+        """
+        Получить версию и время последнего изменения для областей данных
+
+        Args:
+            scopes: Имена областей из SCOPES ('org', 'employees', 'salary_history')
+
+        Returns:
+            tuple (version, last_modified): строка-хеш и datetime (или None)
+        """
+        stats = [
+            (model, model.objects.order_by().aggregate(last=Max(field), count=Count('pk')))
+            for scope in scopes
+            for model, field in DataVersionService.SCOPES[scope]
+        ]
+        return DataVersionService._build_state(stats)
+
+    @staticmethod
+    async def aget_state(*scopes):
+        """Асинхронный вариант get_state для async-view"""
+        stats = [
+            (model, await model.objects.order_by().aaggregate(last=Max(field), count=Count('pk')))
+            for scope in scopes
+            for model, field in DataVersionService.SCOPES[scope]
+        ]
+        return DataVersionService._build_state(stats)
+
+    @staticmethod
+    def _build_state(stats):
+        """Свернуть агрегаты (model, {last, count}) в версию и время последнего изменения"""
+        parts = []
+        last_modified = None
+
+        for model, model_stats in stats:
+            last = model_stats['last']
+            parts.append(f"{model._meta.label}:{model_stats['count']}:{last.isoformat() if last else '-'}")
+            if last and (last_modified is None or last > last_modified):
+                last_modified = last
+
+        version = hashlib.md5('|'.join(parts).encode('utf-8')).hexdigest()
+        return version, last_modified
+
+    @staticmethod
+    def get_version(*scopes):
+        """Получить только версию (хеш) для областей данных"""
+        return DataVersionService.get_state(*scopes)[0]
+
+    @staticmethod
+    def get_cached_version(*scopes):
+        """
+        Версия для HTML-страниц: из кэша, не старше DATA_VERSION_CACHE_SECONDS
+
+        Страницам не нужен 304, поэтому агрегаты по таблицам не считаются на каждый
+        показ; условные GET API используют get_state.
+        """
+        timeout = settings.DATA_VERSION_CACHE_SECONDS
+        if timeout <= 0:
+            return DataVersionService.get_version(*scopes)
+        cache_key = f"data_version:{','.join(scopes)}"
+        version = cache.get(cache_key)
+        if version is None:
+            version = DataVersionService.get_version(*scopes)
+            cache.set(cache_key, version, timeout)
+        return version
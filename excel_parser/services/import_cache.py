@@ -0,0 +1,307 @@
+"""
+Хеш загружаемых файлов, повторные загрузки и кэш разобранных файлов
+"""
+import datetime
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from ..metrics import record_cache
+from ..models import ImportRecord
+from .data_version import DataVersionService
+from .parallel_excel import ParallelExcelService
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    # Без pyarrow кэш разобранных файлов не используется
+    PARQUET_AVAILABLE = False
+
+# Версия чтения файла: увеличить при изменении параметров read_excel или формата кэша,
+# чтобы не использовать кэш, разобранный по-старому
+PARSER_VERSION = 2
+
+# Ключ метаданных Parquet с заголовками и колонками, записанными через encode_value
+CACHE_METADATA_KEY = b'import_cache'
+
+
+def encode_value(value):
+    """
+    Значение колонки object (или заголовок) как строка с меткой типа
+
+    В колонках object read_excel смешивает str, числа, даты и время (например, 'Дата принятия'
+    с датами и строками): Parquet такие колонки не принимает, а строки без типа изменили бы
+    результат загрузчиков. Неизвестный тип - TypeError (файл не кэшируется).
+    """
+    if value is None:
+        return None
+    if value is pd.NaT:
+        return 'N:'
+    if isinstance(value, (bool, np.bool_)):
+        return f'b:{int(value)}'
+    if isinstance(value, (int, np.integer)):
+        return f'i:{int(value)}'
+    if isinstance(value, (float, np.floating)):
+        return f'f:{float(value)!r}'
+    if isinstance(value, str):
+        return f's:{value}'
+    if isinstance(value, pd.Timestamp):
+        return f'T:{value.isoformat()}'
+    if isinstance(value, datetime.datetime):
+        return f'dt:{value.isoformat()}'
+    if isinstance(value, datetime.date):
+        return f'd:{value.isoformat()}'
+    if isinstance(value, datetime.time):
+        return f't:{value.isoformat()}'
+    if isinstance(value, pd.Timedelta):
+        return f'D:{value.isoformat()}'
+    if isinstance(value, datetime.timedelta):
+        return f'td:{value.days},{value.seconds},{value.microseconds}'
+    raise TypeError(f'unsupported value type {type(value).__name__}')
+
+
+VALUE_DECODERS = {
+    'N': lambda text: pd.NaT,
+    'b': lambda text: text == '1',
+    'i': int,
+    'f': float,
+    's': str,
+    'T': pd.Timestamp,
+    'dt': datetime.datetime.fromisoformat,
+    'd': datetime.date.fromisoformat,
+    't': datetime.time.fromisoformat,
+    'D': pd.Timedelta,
+    'td': lambda text: datetime.timedelta(*map(int, text.split(','))),
+}
+
+
+def decode_value(encoded):
+    """Значение, записанное encode_value"""
+    if encoded is None:
+        return None
+    kind, _, text = encoded.partition(':')
+    return VALUE_DECODERS[kind](text)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Области данных, изменение которых отменяет повторное использование результата загрузки
+IMPORT_SCOPES = ('org', 'employees', 'salary_history')
+
+
+class ImportCacheService:
+    """
+    Повторные загрузки одного и того же файла
+
+    Файл хешируется (sha256) потоково при получении. Если такой же файл с теми же
+    параметрами уже загружался и данные с тех пор не менялись, возвращается прежний
+    результат. Разобранный DataFrame хранится в IMPORT_CACHE_DIR по хешу и
+    PARSER_VERSION: загрузка того же файла с другими параметрами не читает Excel заново.
+    """
+
+    @staticmethod
+    def hash_file(file):
+        """
+        sha256 и размер файла без чтения целиком в память
+
+        Args:
+            file: путь, UploadedFile или файловый объект (позиция возвращается в начало)
+
+        Returns:
+            tuple (hex digest, размер в байтах)
+        """
+        digest = hashlib.sha256()
+        size = 0
+        if isinstance(file, (str, os.PathLike)):
+            with open(file, 'rb') as f:
+                for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    size += len(chunk)
+            return digest.hexdigest(), size
+
+        chunks = file.chunks(HASH_CHUNK_SIZE) if hasattr(file, 'chunks') else iter(
+            lambda: file.read(HASH_CHUNK_SIZE), b''
+        )
+        for chunk in chunks:
+            digest.update(chunk)
+            size += len(chunk)
+        file.seek(0)
+        return digest.hexdigest(), size
+
+    @staticmethod
+    def find_previous(loader, file_hash, options):
+        """
+        Прежняя загрузка того же файла, результат которой еще актуален
+
+        Returns:
+            ImportRecord или None
+        """
+        record = ImportRecord.objects.filter(
+            loader=loader, file_hash=file_hash, options=options
+        ).order_by('-created_at', '-id').first()
+        if record is None:
+            return None
+        if record.data_version != DataVersionService.get_version(*IMPORT_SCOPES):
+            # После загрузки данные менялись: файл нужно применить заново
+            return None
+        return record
+
+    @staticmethod
+    def record(loader, file_hash, file_size, file_name, options, result):
+        """Сохранить результат загрузки вместе с версией данных после нее"""
+        return ImportRecord.objects.create(
+            loader=loader,
+            file_hash=file_hash,
+            file_name=(file_name or '')[:255],
+            file_size=file_size,
+            options=options,
+            result=result,
+            data_version=DataVersionService.get_version(*IMPORT_SCOPES),
+        )
+
+    @staticmethod
+    def _cache_path(key, extension):
+        return os.path.join(settings.IMPORT_CACHE_DIR, key[:2], f'{key}-v{PARSER_VERSION}.{extension}')
+
+    @staticmethod
+    def read_excel(file, file_hash=None, sheets=False, **read_options):
+        """
+        pd.read_excel с кэшем разобранного файла
+
+        Args:
+            file: путь или файловый объект
+            file_hash: sha256 файла (если уже посчитан)
+            sheets: прочитать все листы книги
+            read_options: параметры pd.read_excel; с ними кэш и параллельный разбор не используются
+
+        Returns:
+            DataFrame первого листа или {имя листа: DataFrame} при sheets=True
+        """
+        if read_options:
+            return pd.read_excel(file, sheet_name=None if sheets else 0, engine='openpyxl', **read_options)
+        if not settings.IMPORT_CACHE_ENABLED:
+            return ParallelExcelService.read_excel(file, sheets=sheets)
+
+        if file_hash is None:
+            file_hash = ImportCacheService.hash_file(file)[0]
+
+        cached = ImportCacheService._load_sheets(file_hash) if sheets else ImportCacheService._load(file_hash)
+        record_cache('import_file', cached is not None)
+        if cached is not None:
+            return cached
+
+        result = ParallelExcelService.read_excel(file, sheets=sheets)
+        if sheets:
+            ImportCacheService._store_sheets(file_hash, result)
+        else:
+            ImportCacheService._store(file_hash, result)
+        return result
+
+    @staticmethod
+    def _load_sheets(file_hash):
+        """Все листы книги: список имен в .sheets.json, листы - как отдельные файлы кэша"""
+        index_path = ImportCacheService._cache_path(f'{file_hash}.sheets', 'json')
+        if not os.path.exists(index_path):
+            return None
+        try:
+            with open(index_path, encoding='utf-8') as f:
+                names = json.load(f)
+        except (OSError, ValueError):
+            return None
+        result = {}
+        for number, name in enumerate(names):
+            df = ImportCacheService._load(f'{file_hash}.{number}')
+            if df is None:
+                return None
+            result[name] = df
+        return result
+
+    @staticmethod
+    def _store_sheets(file_hash, sheets):
+        for number, df in enumerate(sheets.values()):
+            ImportCacheService._store(f'{file_hash}.{number}', df)
+        # Список листов записывается последним: без него кэш книги не используется
+        index_path = ImportCacheService._cache_path(f'{file_hash}.sheets', 'json')
+        try:
+            with open(f'{index_path}.tmp', 'w', encoding='utf-8') as f:
+                json.dump([str(name) for name in sheets], f, ensure_ascii=False)
+            os.replace(f'{index_path}.tmp', index_path)
+        except OSError as e:
+            logger.warning(f"Failed to write import cache for {file_hash}: {e}")
+
+    @staticmethod
+    def _load(key):
+        path = ImportCacheService._cache_path(key, 'parquet')
+        if not PARQUET_AVAILABLE or not os.path.exists(path):
+            return None
+        try:
+            table = pq.read_table(path)
+            metadata = json.loads(table.schema.metadata[CACHE_METADATA_KEY])
+            df = table.to_pandas()
+            for position in metadata['encoded']:
+                values = [decode_value(value) for value in table.column(position).to_pylist()]
+                df.isetitem(position, pd.Series(values, index=df.index, dtype=object))
+            # Пустой лист: у pd.read_excel заголовки - пустой RangeIndex
+            df.columns = [decode_value(name) for name in metadata['columns']] or pd.RangeIndex(0)
+            return df
+        except Exception as e:
+            # Поврежденный файл кэша: разбираем Excel заново
+            logger.warning(f"Import cache for {key} is unreadable: {e}")
+        return None
+
+    @staticmethod
+    def _encode(df):
+        """
+        Таблица Parquet из DataFrame без потерь типов
+
+        Колонки object записываются через encode_value, заголовки (могут быть числами) -
+        в метаданных; в Parquet колонки называются по номерам.
+        """
+        encoded = [position for position, dtype in enumerate(df.dtypes) if dtype == object]
+        frame = df.set_axis([str(position) for position in range(df.shape[1])], axis=1)
+        for position in encoded:
+            frame.isetitem(position, pd.Series(
+                [encode_value(value) for value in frame.iloc[:, position]], index=frame.index, dtype=object
+            ))
+        table = pa.Table.from_pandas(frame)
+        metadata = {'columns': [encode_value(name) for name in df.columns], 'encoded': encoded}
+        return table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            CACHE_METADATA_KEY: json.dumps(metadata, ensure_ascii=False).encode('utf-8'),
+        })
+
+    @staticmethod
+    def _store(key, df):
+        """Записать DataFrame в кэш (атомарно: через временный файл и rename)"""
+        if not PARQUET_AVAILABLE:
+            return
+        path = ImportCacheService._cache_path(key, 'parquet')
+        try:
+            table = ImportCacheService._encode(df)
+        except (TypeError, ValueError, pa.ArrowException) as e:
+            logger.warning(f"Import cache for {key} is not written: {e}")
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            os.close(fd)
+        except OSError as e:
+            logger.warning(f"Import cache directory is not writable: {e}")
+            return
+
+        try:
+            pq.write_table(table, tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Failed to write import cache for {key}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
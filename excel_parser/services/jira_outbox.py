@@ -0,0 +1,264 @@
+"""
+Очередь создания задач Jira (outbox) с ключами идемпотентности
+"""
+from datetime import timedelta
+import hashlib
+import logging
+import random
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from ..models import ExcelRow, JiraOutbox
+from .jira_resilience import JiraAPIError
+from .jira_service import JiraService
+
+logger = logging.getLogger(__name__)
+
+
+class JiraOutboxService:
+    """
+    Создание задач Jira через очередь JiraOutbox
+
+    enqueue() только записывает строки в очередь; задачи создают воркеры (process_batch).
+    Запись забирается воркером на JIRA_OUTBOX_LEASE_SECONDS. Если воркер упал, после
+    истечения срока запись забирает другой воркер и сначала ищет в Jira задачу с меткой
+    записи: найденная задача не создается повторно.
+    """
+
+    @staticmethod
+    def make_idempotency_key(excel_row_id, project_key=None, issue_type='Task',
+                             summary_template=None, description_template=None):
+        """Ключ идемпотентности: sha256 от ID строки и параметров задачи"""
+        source = '\x1f'.join([
+            str(excel_row_id), project_key or '', issue_type or '',
+            summary_template or '', description_template or '',
+        ])
+        return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def label_for(entry):
+        """Метка задачи Jira, по которой запись находится при сверке"""
+        return f"{settings.JIRA_OUTBOX_LABEL_PREFIX}{entry.idempotency_key[:32]}"
+
+    @staticmethod
+    def enqueue(excel_rows, project_key=None, issue_type='Task',
+                summary_template=None, description_template=None):
+        """
+        Поставить строки в очередь создания задач
+
+        Строки с задачей пропускаются; повторная постановка той же строки с теми же
+        параметрами ничего не меняет (уникальный ключ идемпотентности).
+
+        Returns:
+            int: число новых записей очереди (без строк, которые уже в ней)
+
+        Raises:
+            TemplateError: некорректный шаблон или поле, которого нет в файле (очередь не меняется)
+        """
+        excel_rows = list(excel_rows)
+        JiraService().issue_fields_builder(
+            project_key, issue_type, summary_template, description_template, excel_rows
+        )
+        entries = [
+            JiraOutbox(
+                excel_row_id=row.id,
+                idempotency_key=JiraOutboxService.make_idempotency_key(
+                    row.id, project_key, issue_type, summary_template, description_template
+                ),
+                project_key=project_key or '',
+                issue_type=issue_type,
+                summary_template=summary_template or '',
+                description_template=description_template or '',
+            )
+            for row in excel_rows
+            if not row.jira_key
+        ]
+        existing = set()
+        keys = [entry.idempotency_key for entry in entries]
+        for start in range(0, len(keys), 1000):
+            existing.update(JiraOutbox.objects.filter(
+                idempotency_key__in=keys[start:start + 1000]
+            ).values_list('idempotency_key', flat=True))
+        entries = [entry for entry in entries if entry.idempotency_key not in existing]
+        # ignore_conflicts - на случай параллельной постановки тех же строк
+        JiraOutbox.objects.bulk_create(entries, batch_size=1000, ignore_conflicts=True)
+        return len(entries)
+
+    @staticmethod
+    def claim_batch(limit=None):
+        """
+        Забрать пачку записей на обработку
+
+        Берутся ожидающие записи, срок следующей попытки которых наступил, и записи
+        «в отправке» с истекшим сроком блокировки (воркер упал). Параллельные воркеры
+        пропускают заблокированные строки (SKIP LOCKED) и не получают одни и те же записи.
+        """
+        limit = limit or settings.JIRA_OUTBOX_BATCH_SIZE
+        now = timezone.now()
+        with transaction.atomic():
+            entries = list(
+                JiraOutbox.objects
+                .select_for_update(skip_locked=True)
+                .filter(
+                    Q(status=JiraOutbox.STATUS_PENDING, next_attempt_at__lte=now) |
+                    Q(status=JiraOutbox.STATUS_IN_FLIGHT, locked_until__lte=now)
+                )
+                .order_by('id')[:limit]
+            )
+            locked_until = now + timedelta(seconds=settings.JIRA_OUTBOX_LEASE_SECONDS)
+            for entry in entries:
+                entry.status = JiraOutbox.STATUS_IN_FLIGHT
+                entry.attempts += 1
+                entry.locked_until = locked_until
+                entry.updated_at = now
+            JiraOutbox.objects.bulk_update(entries, ['status', 'attempts', 'locked_until', 'updated_at'])
+        return entries
+
+    @staticmethod
+    def process_batch(jira_service=None, limit=None):
+        """
+        Обработать одну пачку очереди
+
+        Returns:
+            dict: число записей по результату (created, reconciled, failed, retry)
+        """
+        stats = {'claimed': 0, 'created': 0, 'reconciled': 0, 'failed': 0, 'retry': 0}
+        entries = JiraOutboxService.claim_batch(min(limit or settings.JIRA_OUTBOX_BATCH_SIZE,
+                                                    JiraService.BULK_MAX_ISSUES))
+        stats['claimed'] = len(entries)
+        if not entries:
+            return stats
+
+        own_service = jira_service is None
+        jira_service = jira_service or JiraService()
+        changed_rows = []
+        try:
+            JiraOutboxService._process_entries(jira_service, entries, changed_rows, stats)
+        except JiraAPIError as e:
+            # Jira недоступна (повторы исчерпаны или circuit breaker разомкнут) - пробуем позже
+            logger.warning(f"Jira outbox batch postponed: {e}")
+            unfinished = [entry for entry in entries if entry.status == JiraOutbox.STATUS_IN_FLIGHT]
+            JiraOutboxService._postpone(unfinished, str(e), stats)
+        finally:
+            if own_service:
+                jira_service.close()
+        JiraOutboxService._save(entries, changed_rows)
+        return stats
+
+    @staticmethod
+    def process_pending(jira_service=None, max_batches=None):
+        """Обрабатывать пачки, пока в очереди есть готовые к отправке записи"""
+        totals = {'claimed': 0, 'created': 0, 'reconciled': 0, 'failed': 0, 'retry': 0}
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            stats = JiraOutboxService.process_batch(jira_service)
+            for key, value in stats.items():
+                totals[key] += value
+            batches += 1
+            # Пачка отложена целиком - Jira недоступна, дальше не продолжаем
+            if not stats['claimed'] or stats['retry'] == stats['claimed']:
+                break
+        return totals
+
+    @staticmethod
+    def _process_entries(jira_service, entries, changed_rows, stats):
+        rows = {row.id: row for row in ExcelRow.objects.filter(id__in=[e.excel_row_id for e in entries])}
+        labels = {entry.id: JiraOutboxService.label_for(entry) for entry in entries}
+
+        # Сверка: запись уже отправлялась, задача могла быть создана до сбоя воркера
+        retried = [entry for entry in entries if entry.attempts > 1]
+        found = jira_service.search_issue_keys_by_labels([labels[e.id] for e in retried]) if retried else {}
+
+        # Шаблоны разбираются один раз на пачку для каждого набора параметров
+        builders = {}
+        to_create = []
+        for entry in entries:
+            row = rows.get(entry.excel_row_id)
+            jira_key = found.get(labels[entry.id])
+            if jira_key:
+                JiraOutboxService._complete(jira_service, entry, row, jira_key, changed_rows)
+                stats['reconciled'] += 1
+            elif row is None:
+                JiraOutboxService._fail(entry, 'Excel row not found')
+                stats['failed'] += 1
+            elif row.jira_key:
+                # Задача создана в обход очереди
+                JiraOutboxService._complete(jira_service, entry, None, row.jira_key, changed_rows)
+                stats['reconciled'] += 1
+            else:
+                params = (entry.project_key, entry.issue_type, entry.summary_template, entry.description_template)
+                try:
+                    if params not in builders:
+                        builders[params] = jira_service.issue_fields_builder(
+                            entry.project_key or None, entry.issue_type,
+                            entry.summary_template or None, entry.description_template or None,
+                        )
+                    fields = builders[params].build(row, labels=[labels[entry.id]])
+                except Exception as e:
+                    JiraOutboxService._fail(entry, f"Error building issue: {e}")
+                    stats['failed'] += 1
+                    continue
+                to_create.append((entry, row, fields))
+
+        if to_create:
+            # Без повторов после 5xx и сетевых ошибок: следующая попытка начнется со сверки
+            items = jira_service.create_issues_from_fields(
+                [fields for _, _, fields in to_create], retry_unsafe=False
+            )
+            for (entry, row, _), (jira_key, error) in zip(to_create, items):
+                if error:
+                    # Ошибка валидации Jira: повтор с теми же данными не поможет
+                    JiraOutboxService._fail(entry, error)
+                    stats['failed'] += 1
+                else:
+                    JiraOutboxService._complete(jira_service, entry, row, jira_key, changed_rows)
+                    stats['created'] += 1
+
+    @staticmethod
+    def _complete(jira_service, entry, row, jira_key, changed_rows):
+        entry.status = JiraOutbox.STATUS_DONE
+        entry.jira_key = jira_key
+        entry.last_error = ''
+        entry.locked_until = None
+        if row is not None and row.jira_key != jira_key:
+            jira_service._set_issue(row, jira_key, timezone.now())
+            changed_rows.append(row)
+
+    @staticmethod
+    def _fail(entry, error):
+        entry.status = JiraOutbox.STATUS_FAILED
+        entry.last_error = error
+        entry.locked_until = None
+
+    @staticmethod
+    def _postpone(entries, error, stats):
+        """Вернуть записи в очередь с экспоненциальной задержкой или пометить ошибкой"""
+        now = timezone.now()
+        for entry in entries:
+            entry.last_error = error
+            entry.locked_until = None
+            if entry.attempts >= settings.JIRA_OUTBOX_MAX_ATTEMPTS:
+                entry.status = JiraOutbox.STATUS_FAILED
+                stats['failed'] += 1
+                continue
+            delay = min(settings.JIRA_BACKOFF_MAX * 10, settings.JIRA_BACKOFF_BASE * 2 ** entry.attempts)
+            entry.status = JiraOutbox.STATUS_PENDING
+            entry.next_attempt_at = now + timedelta(seconds=random.uniform(delay / 2, delay))
+            stats['retry'] += 1
+
+    @staticmethod
+    def _save(entries, changed_rows):
+        """Сохранить строки и записи очереди одной транзакцией"""
+        now = timezone.now()
+        for entry in entries:
+            entry.updated_at = now
+        with transaction.atomic():
+            if changed_rows:
+                ExcelRow.objects.bulk_update(changed_rows, JiraService.JIRA_FIELDS)
+            JiraOutbox.objects.bulk_update(
+                entries,
+                ['status', 'jira_key', 'last_error', 'locked_until', 'next_attempt_at', 'updated_at']
+            )
@@ -0,0 +1,199 @@
+"""
+Ограничение частоты, повторы и circuit breaker для запросов к Jira
+"""
+from datetime import datetime, timezone as dt_timezone
+from email.utils import parsedate_to_datetime
+import random
+import threading
+import time
+
+
+class JiraAPIError(Exception):
+    """Ошибка Jira API"""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class JiraCircuitOpenError(JiraAPIError):
+    """Запросы к Jira временно не выполняются: слишком много ошибок подряд"""
+
+
+class TokenBucket:
+    """
+    Ограничитель частоты запросов (token bucket), общий для всех потоков
+
+    На 429 запросы приостанавливаются на Retry-After, а частота уменьшается вдвое;
+    после успешных запросов она постепенно возвращается к настроенной.
+    """
+
+    def __init__(self, rate, burst, min_rate=0.5):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.burst = max(1, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Дождаться разрешения на запрос"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                else:
+                    self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Jira ответила 429: приостановить все запросы и снизить частоту"""
+        with self.lock:
+            now = time.monotonic()
+            self.paused_until = max(self.paused_until, now + seconds)
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0
+            self.updated = max(now, self.paused_until)
+
+    def record_success(self):
+        with self.lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker: после failure_threshold ошибок подряд запросы не выполняются
+    reset_timeout секунд, затем пропускается один пробный запрос
+
+    Остальные потоки ждут результата пробного запроса, а не получают ошибку сразу.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.condition = threading.Condition()
+
+    def before_request(self):
+        """
+        Дождаться разрешения на запрос
+
+        Returns:
+            bool: True, если это пробный запрос (его нужно завершить record_success,
+            record_failure или release_trial)
+
+        Raises:
+            JiraCircuitOpenError: запросы сейчас не выполняются
+        """
+        with self.condition:
+            while True:
+                if self.state == self.CLOSED:
+                    return False
+                remaining = self.opened_at + self.reset_timeout - time.monotonic()
+                if self.state == self.OPEN and remaining <= 0:
+                    self.state = self.HALF_OPEN
+                if self.state == self.HALF_OPEN:
+                    if not self.trial_in_flight:
+                        self.trial_in_flight = True
+                        return True
+                    self.condition.wait(self.reset_timeout)
+                    continue
+                raise JiraCircuitOpenError(
+                    f"Jira circuit is open after {self.failures} consecutive failures, "
+                    f"retry in {max(remaining, 0):.0f} s"
+                )
+
+    def record_success(self):
+        with self.condition:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.trial_in_flight = False
+            self.condition.notify_all()
+
+    def release_trial(self):
+        """Пробный запрос прерван непредвиденной ошибкой: считается неудачным"""
+        with self.condition:
+            if self.state == self.HALF_OPEN and self.trial_in_flight:
+                self.record_failure()
+
+    def record_failure(self):
+        with self.condition:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+            self.condition.notify_all()
+
+
+class RetryPolicy:
+    """Экспоненциальная задержка с jitter между повторами"""
+
+    def __init__(self, max_retries, backoff_base, backoff_max):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def delay(self, attempt, retry_after=None):
+        """
+        Задержка перед повтором номер attempt (с 0)
+
+        Retry-After соблюдается всегда; иначе - full jitter в пределах base * 2^attempt.
+        """
+        if retry_after is not None:
+            return retry_after + random.uniform(0, self.backoff_base)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+
+def parse_retry_after(value):
+    """Retry-After в секундах (число или HTTP-дата); None, если заголовка нет или он некорректен"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=dt_timezone.utc)
+    return max(0.0, (retry_at - datetime.now(dt_timezone.utc)).total_seconds())
+
+
+_limiters = {}
+_breakers = {}
+_registry_lock = threading.Lock()
+
+
+def get_rate_limiter(base_url, rate, burst):
+    """Ограничитель частоты, общий для процесса (на каждый адрес Jira)"""
+    with _registry_lock:
+        if base_url not in _limiters:
+            _limiters[base_url] = TokenBucket(rate, burst)
+        return _limiters[base_url]
+
+
+def get_circuit_breaker(base_url, failure_threshold, reset_timeout):
+    """Circuit breaker, общий для процесса (на каждый адрес Jira)"""
+    with _registry_lock:
+        if base_url not in _breakers:
+            _breakers[base_url] = CircuitBreaker(failure_threshold, reset_timeout)
+        return _breakers[base_url]
@@ -2,41 +2,212 @@
 Сервис для интеграции с Jira
 """
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from django.conf import settings
-from ..models import ExcelRow
+from ..models import ExcelRow, ExcelColumnMapping
+from ..metrics import observe_jira_request, record_jira_retry
+from .jira_resilience import (
+    JiraAPIError, RetryPolicy, get_circuit_breaker, get_rate_limiter, parse_retry_after
+)
+from .jira_templates import IssueFieldsBuilder, TemplateError
 from django.utils import timezone
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 
 class JiraService:
     """Сервис для работы с Jira API"""
-    
+
+    # Ограничение Jira на число задач в одном запросе /issue/bulk
+    BULK_MAX_ISSUES = 50
+    JIRA_FIELDS = ['jira_key', 'jira_url', 'jira_created_at']
+
     def __init__(self):
         self.base_url = settings.JIRA_URL.rstrip('/')
         self.email = settings.JIRA_EMAIL
         self.api_token = settings.JIRA_API_TOKEN
-        
+        self.timeout = (settings.JIRA_CONNECT_TIMEOUT, settings.JIRA_READ_TIMEOUT)
+        self.chunk_size = max(1, min(settings.JIRA_BULK_CHUNK_SIZE, self.BULK_MAX_ISSUES))
+        self.max_workers = max(1, settings.JIRA_MAX_WORKERS)
+        self._session = None
+        # Ограничитель частоты и circuit breaker общие для всех экземпляров и потоков процесса
+        self.rate_limiter = get_rate_limiter(self.base_url, settings.JIRA_RATE_LIMIT, settings.JIRA_RATE_BURST)
+        self.circuit_breaker = get_circuit_breaker(
+            self.base_url, settings.JIRA_CIRCUIT_FAILURE_THRESHOLD, settings.JIRA_CIRCUIT_RESET_TIMEOUT
+        )
+        self.retry_policy = RetryPolicy(
+            settings.JIRA_MAX_RETRIES, settings.JIRA_BACKOFF_BASE, settings.JIRA_BACKOFF_MAX
+        )
+
     def _get_auth(self):
         """Получить заголовки для аутентификации"""
         if not self.email or not self.api_token:
             raise ValueError("JIRA_EMAIL and JIRA_API_TOKEN must be configured in settings")
-        
+
         return (self.email, self.api_token)
-    
-    def create_issue(self, excel_row: ExcelRow, project_key: str = None, issue_type: str = "Task", 
+
+    @property
+    def session(self):
+        """
+        HTTP-сессия с keep-alive
+
+        Пул соединений рассчитан на max_workers параллельных запросов пакетной отправки.
+        """
+        if self._session is None:
+            session = requests.Session()
+            session.auth = self._get_auth()
+            session.headers.update({
+                "Accept": "application/json",
+                "Content-Type": "application/json"
+            })
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            self._session = session
+        return self._session
+
+    def close(self):
+        """Закрыть соединения сессии"""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _post(self, operation, url, payload, retry_unsafe=False):
+        """
+        POST в Jira с ограничением частоты, повторами и circuit breaker
+
+        429 повторяется до JIRA_MAX_RETRIES раз: все потоки ждут Retry-After.
+        5xx и сетевые ошибки учитываются circuit breaker'ом и повторяются (экспоненциальная
+        задержка с jitter) только при retry_unsafe=True - для запросов без побочных эффектов
+        (поиск). После 5xx и сетевой ошибки запрос мог быть выполнен, и повтор создания
+        задачи создал бы ее второй раз.
+
+        Returns:
+            requests.Response: ответ со статусом меньше 500 и не 429
+
+        Raises:
+            JiraAPIError: повторы исчерпаны или circuit breaker разомкнут
+        """
+        # Сессия создается до пробного запроса circuit breaker'а: ошибка настроек не должна его занимать
+        session = self.session
+        for attempt in range(self.retry_policy.max_retries + 1):
+            trial = self.circuit_breaker.before_request()
+            response = None
+            try:
+                self.rate_limiter.acquire()
+                with observe_jira_request(operation):
+                    response = session.post(url, json=payload, timeout=self.timeout)
+                    if response.status_code == 429 or response.status_code >= 500:
+                        raise JiraAPIError(
+                            f"Jira API error: {response.status_code} - {response.text[:500]}",
+                            response.status_code
+                        )
+            except JiraAPIError as e:
+                error = e
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if e.status_code == 429:
+                    # Jira доступна, но просит снизить частоту: на circuit breaker не влияет
+                    self.circuit_breaker.record_success()
+                    reason = 'rate_limited'
+                else:
+                    self.circuit_breaker.record_failure()
+                    reason = 'server_error'
+            except requests.exceptions.RequestException as e:
+                error = JiraAPIError(f"Jira request failed: {str(e)}")
+                retry_after = None
+                self.circuit_breaker.record_failure()
+                reason = 'connection'
+            except BaseException:
+                # Любая другая ошибка не должна оставить пробный запрос занятым
+                if trial:
+                    self.circuit_breaker.release_trial()
+                raise
+            else:
+                self.circuit_breaker.record_success()
+                self.rate_limiter.record_success()
+                return response
+
+            if attempt == self.retry_policy.max_retries or (not retry_unsafe and reason != 'rate_limited'):
+                break
+            delay = self.retry_policy.delay(attempt, retry_after)
+            record_jira_retry(operation, reason)
+            logger.warning(f"{error}; retry {attempt + 1}/{self.retry_policy.max_retries} in {delay:.1f} s")
+            if reason == 'rate_limited':
+                # Пауза общая: остальные потоки тоже ждут в rate_limiter.acquire()
+                self.rate_limiter.pause(delay)
+            else:
+                time.sleep(delay)
+
+        raise error
+
+    def issue_fields_builder(self, project_key: str = None, issue_type: str = "Task",
+                             summary_template: str = None, description_template: str = None,
+                             excel_rows=None) -> IssueFieldsBuilder:
+        """
+        Разобрать шаблоны один раз для пачки строк
+
+        Если переданы строки, поля шаблонов проверяются по маппингу колонок их файлов.
+
+        Raises:
+            TemplateError: некорректный шаблон или поле, которого нет в файле
+        """
+        builder = IssueFieldsBuilder(
+            project_key, issue_type, summary_template, description_template,
+            missing_value=settings.JIRA_TEMPLATE_MISSING_VALUE
+        )
+        if excel_rows is not None and builder.fields:
+            self.validate_template_fields(builder, {row.excel_file_id for row in excel_rows})
+        return builder
+
+    def validate_template_fields(self, builder: IssueFieldsBuilder, excel_file_ids):
+        """Raises: TemplateError, если шаблоны ссылаются на колонки, которых нет в файлах"""
+        columns = {}
+        mappings = ExcelColumnMapping.objects.filter(excel_file_id__in=excel_file_ids)
+        for excel_file_id, excel_column in mappings.values_list('excel_file_id', 'excel_column'):
+            columns.setdefault(excel_file_id, set()).add(excel_column)
+        # Файлы без маппинга колонок не проверяются
+        for excel_file_id, file_columns in columns.items():
+            missing = builder.missing_fields(file_columns)
+            if missing:
+                raise TemplateError(
+                    f"Template fields {', '.join(missing)} are not columns of Excel file {excel_file_id}"
+                )
+
+    def build_issue_fields(self, excel_row: ExcelRow, project_key: str = None, issue_type: str = "Task",
+                           summary_template: str = None, description_template: str = None,
+                           labels: list = None) -> dict:
+        """Поля задачи Jira (fields) по данным Excel строки"""
+        return self.issue_fields_builder(
+            project_key, issue_type, summary_template, description_template
+        ).build(excel_row, labels)
+
+    def _set_issue(self, excel_row: ExcelRow, jira_key: str, created_at):
+        """Записать ключ и ссылку задачи в строку (без сохранения)"""
+        excel_row.jira_key = jira_key
+        excel_row.jira_url = f"{self.base_url}/browse/{jira_key}"
+        excel_row.jira_created_at = created_at
+
+    def create_issue(self, excel_row: ExcelRow, project_key: str = None, issue_type: str = "Task",
                     summary_template: str = None, description_template: str = None) -> dict:
         """
         Создать задачу в Jira на основе данных Excel строки
-        
+
         Args:
             excel_row: Модель ExcelRow
             project_key: Ключ проекта в Jira (если не указан, нужно будет получить из настроек)
             issue_type: Тип задачи (Task, Bug, Story и т.д.)
             summary_template: Шаблон для заголовка задачи (может содержать {field_name})
             description_template: Шаблон для описания задачи
-        
+
         Returns:
             dict: Информация о созданной задаче
         """
@@ -47,162 +218,233 @@ class JiraService:
                 'url': excel_row.jira_url,
                 'already_exists': True
             }
-        
-        # Формируем данные задачи
-        data = excel_row.data
-        
-        # Генерируем summary
-        if summary_template:
-            summary = summary_template.format(**data)
-        else:
-            # По умолчанию берем первые несколько полей
-            summary_parts = []
-            for key, value in list(data.items())[:3]:
-                if value is not None:
-                    summary_parts.append(f"{key}: {value}")
-            summary = " | ".join(summary_parts) or f"Задача из Excel (строка {excel_row.row_number})"
-        
-        # Генерируем description
-        if description_template:
-            description = description_template.format(**data)
-        else:
-            description_lines = ["Данные из Excel файла:"]
-            for key, value in data.items():
-                if value is not None:
-                    description_lines.append(f"*{key}*: {value}")
-            description = "\n".join(description_lines)
-        
+
         # Формируем payload для Jira API
         issue_data = {
-            "fields": {
-                "project": {
-                    "key": project_key or "PROJ"  # Нужно настраивать по умолчанию
-                },
-                "summary": summary[:255],  # Ограничение Jira
-                "description": {
-                    "type": "doc",
-                    "version": 1,
-                    "content": [
-                        {
-                            "type": "paragraph",
-                            "content": [
-                                {
-                                    "type": "text",
-                                    "text": description
-                                }
-                            ]
-                        }
-                    ]
-                },
-                "issuetype": {
-                    "name": issue_type
-                }
-            }
+            "fields": self.build_issue_fields(
+                excel_row, project_key, issue_type, summary_template, description_template
+            )
         }
-        
+
         # Отправляем запрос в Jira
         url = f"{self.base_url}/rest/api/3/issue"
-        auth = self._get_auth()
-        
+
         try:
-            response = requests.post(
-                url,
-                json=issue_data,
-                auth=auth,
-                headers={
-                    "Accept": "application/json",
-                    "Content-Type": "application/json"
-                },
-                timeout=30
-            )
+            response = self._post('create_issue', url, issue_data, retry_unsafe=False)
             response.raise_for_status()
-            
+
             result = response.json()
             jira_key = result['key']
-            jira_url = f"{self.base_url}/browse/{jira_key}"
-            
+
             # Сохраняем информацию о задаче в БД
-            excel_row.jira_key = jira_key
-            excel_row.jira_url = jira_url
-            excel_row.jira_created_at = timezone.now()
+            self._set_issue(excel_row, jira_key, timezone.now())
             excel_row.save()
-            
+
             logger.info(f"Created Jira issue {jira_key} for Excel row {excel_row.id}")
-            
+
             return {
                 'key': jira_key,
-                'url': jira_url,
+                'url': excel_row.jira_url,
                 'id': result.get('id'),
                 'already_exists': False
             }
-            
+
         except requests.exceptions.HTTPError as e:
             error_msg = f"Jira API error: {e.response.status_code} - {e.response.text}"
             logger.error(error_msg)
-            raise Exception(error_msg) from e
+            raise JiraAPIError(error_msg, e.response.status_code) from e
+        except JiraAPIError as e:
+            logger.error(f"Error creating Jira issue: {str(e)}")
+            raise
         except Exception as e:
             error_msg = f"Error creating Jira issue: {str(e)}"
             logger.error(error_msg)
-            raise Exception(error_msg) from e
-    
+            raise JiraAPIError(error_msg) from e
+
     def create_issues_batch(self, excel_rows, project_key: str = None, issue_type: str = "Task",
                            summary_template: str = None, description_template: str = None):
         """
         Создать несколько задач в Jira
-        
+
+        Задачи отправляются через /rest/api/3/issue/bulk пакетами по chunk_size,
+        до max_workers пакетов параллельно. Результаты каждого пакета сохраняются
+        одним bulk_update в вызывающем потоке.
+
+        Шаблоны разбираются и проверяются по маппингу колонок до первого запроса.
+
         Args:
             excel_rows: QuerySet или список ExcelRow объектов
             project_key: Ключ проекта
             issue_type: Тип задачи
             summary_template: Шаблон заголовка
             description_template: Шаблон описания
-        
+
         Returns:
             dict: Статистика создания задач
+
+        Raises:
+            TemplateError: некорректный шаблон или поле, которого нет в файле
         """
+        excel_rows = list(excel_rows)
+        builder = self.issue_fields_builder(
+            project_key, issue_type, summary_template, description_template, excel_rows
+        )
         results = {
             'created': [],
             'skipped': [],
             'errors': []
         }
-        
+
+        pending = []
         for row in excel_rows:
-            try:
-                if row.jira_key:
-                    results['skipped'].append({
-                        'row_id': row.id,
-                        'reason': 'Already has Jira key',
-                        'jira_key': row.jira_key
-                    })
-                    continue
-                
-                result = self.create_issue(
-                    row,
-                    project_key=project_key,
-                    issue_type=issue_type,
-                    summary_template=summary_template,
-                    description_template=description_template
-                )
-                
-                if not result.get('already_exists'):
-                    results['created'].append({
-                        'row_id': row.id,
-                        'jira_key': result['key'],
-                        'jira_url': result['url']
-                    })
-                else:
-                    results['skipped'].append({
-                        'row_id': row.id,
-                        'reason': 'Already exists',
-                        'jira_key': result['key']
-                    })
-                    
-            except Exception as e:
-                results['errors'].append({
+            if row.jira_key:
+                results['skipped'].append({
                     'row_id': row.id,
-                    'error': str(e)
+                    'reason': 'Already has Jira key',
+                    'jira_key': row.jira_key
                 })
-                logger.error(f"Error creating Jira issue for row {row.id}: {str(e)}")
-        
+                continue
+            try:
+                fields = builder.build(row)
+            except Exception as e:
+                results['errors'].append({'row_id': row.id, 'error': str(e)})
+                continue
+            pending.append((row, fields))
+
+        chunks = [pending[i:i + self.chunk_size] for i in range(0, len(pending), self.chunk_size)]
+        if not chunks:
+            return results
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as executor:
+            futures = {
+                executor.submit(self._post_bulk, [fields for _, fields in chunk], retry_unsafe=False): chunk
+                for chunk in chunks
+            }
+            for future in as_completed(futures):
+                chunk = futures[future]
+                try:
+                    response = future.result()
+                except Exception as e:
+                    logger.error(f"Error creating Jira issues for rows {chunk[0][0].id}..{chunk[-1][0].id}: {str(e)}")
+                    results['errors'].extend({'row_id': row.id, 'error': str(e)} for row, _ in chunk)
+                    continue
+                self._save_bulk_result([row for row, _ in chunk], response, results)
+
         return results
 
+    def _post_bulk(self, issues_fields, retry_unsafe=False):
+        """
+        Запрос /rest/api/3/issue/bulk (выполняется в потоке пула, без обращений к БД)
+
+        Returns:
+            dict: ответ Jira с issues и errors
+        """
+        url = f"{self.base_url}/rest/api/3/issue/bulk"
+        payload = {'issueUpdates': [{'fields': fields} for fields in issues_fields]}
+        response = self._post('bulk_create', url, payload, retry_unsafe)
+        # Если не создана ни одна задача, Jira отвечает 400 с ошибками по элементам
+        if response.status_code == 400:
+            try:
+                result = response.json()
+            except ValueError:
+                result = None
+            if isinstance(result, dict) and result.get('errors'):
+                return result
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            raise JiraAPIError(f"Jira API error: {e.response.status_code} - {e.response.text}",
+                               e.response.status_code) from e
+        return response.json()
+
+    def create_issues_from_fields(self, issues_fields, retry_unsafe=False):
+        """
+        Создать задачи одним запросом /rest/api/3/issue/bulk (не больше BULK_MAX_ISSUES)
+
+        retry_unsafe - см. _post.
+
+        Returns:
+            list: (ключ задачи, None) или (None, ошибка) для каждого элемента issues_fields
+
+        Raises:
+            JiraAPIError: запрос не выполнен целиком
+        """
+        if len(issues_fields) > self.BULK_MAX_ISSUES:
+            raise ValueError(f"No more than {self.BULK_MAX_ISSUES} issues per bulk request")
+        return self._bulk_items(len(issues_fields), self._post_bulk(issues_fields, retry_unsafe))
+
+    def search_issue_keys_by_labels(self, labels):
+        """
+        Найти задачи по меткам
+
+        Returns:
+            dict: метка -> ключ задачи (для найденных меток)
+        """
+        labels = list(labels)
+        if not labels:
+            return {}
+        url = f"{self.base_url}/rest/api/3/search/jql"
+        quoted = ', '.join(f'"{label}"' for label in labels)
+        payload = {
+            'jql': f'labels in ({quoted})',
+            'fields': ['labels'],
+            'maxResults': len(labels),
+        }
+        # Поиск не меняет данные: повторяется и после 5xx и сетевых ошибок
+        response = self._post('search', url, payload, retry_unsafe=True)
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            raise JiraAPIError(f"Jira API error: {e.response.status_code} - {e.response.text}",
+                               e.response.status_code) from e
+
+        wanted = set(labels)
+        found = {}
+        for issue in response.json().get('issues', []):
+            for label in (issue.get('fields') or {}).get('labels') or []:
+                if label in wanted:
+                    found.setdefault(label, issue['key'])
+        return found
+
+    def _bulk_items(self, count, response):
+        """
+        Результат bulk-запроса по элементам запроса
+
+        Jira возвращает созданные задачи в порядке запроса, пропуская элементы из errors
+        (failedElementNumber - индекс в запросе).
+        """
+        failed = {error.get('failedElementNumber'): error for error in response.get('errors', [])}
+        created_issues = iter(response.get('issues', []))
+        items = []
+        for index in range(count):
+            if index in failed:
+                element_errors = failed[index].get('elementErrors', {})
+                message = element_errors.get('errors') or element_errors.get('errorMessages') or failed[index]
+                items.append((None, f"Jira API error: {message}"))
+                continue
+            issue = next(created_issues, None)
+            if issue is None:
+                items.append((None, 'No issue returned by Jira'))
+                continue
+            items.append((issue['key'], None))
+        return items
+
+    def _save_bulk_result(self, rows, response, results):
+        """Сопоставить ответ bulk-запроса со строками и сохранить созданные задачи"""
+        created_at = timezone.now()
+        created_rows = []
+        for row, (jira_key, error) in zip(rows, self._bulk_items(len(rows), response)):
+            if error:
+                results['errors'].append({'row_id': row.id, 'error': error})
+                continue
+            self._set_issue(row, jira_key, created_at)
+            created_rows.append(row)
+            results['created'].append({
+                'row_id': row.id,
+                'jira_key': row.jira_key,
+                'jira_url': row.jira_url
+            })
+
+        if created_rows:
+            ExcelRow.objects.bulk_update(created_rows, self.JIRA_FIELDS)
+            logger.info(f"Created {len(created_rows)} Jira issues via bulk endpoint")
@@ -0,0 +1,144 @@
+"""
+Шаблоны заголовка и описания задач Jira
+"""
+from string import Formatter
+
+
+class TemplateError(ValueError):
+    """Некорректный шаблон или поля шаблона, которых нет в файле"""
+
+
+class CompiledTemplate:
+    """
+    Шаблон вида «{ФИО}: {Оклад:,.0f}», разобранный один раз
+
+    Имя поля - название колонки целиком (точки и скобки в названии допустимы),
+    поддерживаются !s/!r/!a и спецификация формата. Отсутствующие и пустые значения
+    подставляются как default, а не вызывают KeyError.
+    """
+
+    _formatter = Formatter()
+
+    def __init__(self, template):
+        self.template = template
+        self.parts = []
+        self.fields = []
+        try:
+            parsed = list(self._formatter.parse(template))
+        except ValueError as e:
+            raise TemplateError(f"Invalid template {template!r}: {e}") from e
+        for literal, field, format_spec, conversion in parsed:
+            if field is not None:
+                if not field or field.isdigit():
+                    raise TemplateError(
+                        f"Invalid template {template!r}: positional fields are not supported, use {{column}}"
+                    )
+                if format_spec and '{' in format_spec:
+                    raise TemplateError(f"Invalid template {template!r}: nested fields are not supported")
+                if conversion not in (None, 's', 'r', 'a'):
+                    raise TemplateError(f"Invalid template {template!r}: unknown conversion !{conversion}")
+                if field not in self.fields:
+                    self.fields.append(field)
+            self.parts.append((literal, field, conversion, format_spec))
+
+    def render(self, data, default=''):
+        """Подставить значения строки"""
+        result = []
+        for literal, field, conversion, format_spec in self.parts:
+            if literal:
+                result.append(literal)
+            if field is None:
+                continue
+            value = data.get(field)
+            if value is None or value == '':
+                result.append(default)
+                continue
+            if conversion == 'r':
+                value = repr(value)
+            elif conversion == 'a':
+                value = ascii(value)
+            if format_spec:
+                try:
+                    value = format(value, format_spec)
+                except (TypeError, ValueError):
+                    # Например, формат числа для текстового значения в ячейке
+                    value = str(value)
+            else:
+                value = str(value)
+            result.append(value)
+        return ''.join(result)
+
+    def missing_fields(self, columns):
+        """Поля шаблона, которых нет среди колонок"""
+        columns = set(columns)
+        return [field for field in self.fields if field not in columns]
+
+
+class IssueFieldsBuilder:
+    """
+    Поля задач Jira для пачки строк с одинаковыми параметрами
+
+    Шаблоны разбираются при создании (некорректный шаблон - TemplateError до отправки
+    запросов), общие для всех задач части payload строятся один раз.
+    """
+
+    # Ограничение Jira на длину summary
+    SUMMARY_MAX_LENGTH = 255
+
+    def __init__(self, project_key=None, issue_type='Task', summary_template=None,
+                 description_template=None, missing_value=''):
+        self.summary = CompiledTemplate(summary_template) if summary_template else None
+        self.description = CompiledTemplate(description_template) if description_template else None
+        self.missing_value = missing_value
+        self.project = {"key": project_key or "PROJ"}  # Нужно настраивать по умолчанию
+        self.issue_type = {"name": issue_type}
+
+    @property
+    def fields(self):
+        """Колонки, на которые ссылаются шаблоны"""
+        fields = []
+        for template in (self.summary, self.description):
+            if template:
+                fields.extend(field for field in template.fields if field not in fields)
+        return fields
+
+    def missing_fields(self, columns):
+        columns = set(columns)
+        return [field for field in self.fields if field not in columns]
+
+    def build(self, excel_row, labels=None):
+        """Поля задачи (fields) для строки"""
+        data = excel_row.data
+
+        if self.summary:
+            summary = self.summary.render(data, self.missing_value)
+        else:
+            # По умолчанию берем первые несколько полей
+            summary_parts = []
+            for key, value in list(data.items())[:3]:
+                if value is not None:
+                    summary_parts.append(f"{key}: {value}")
+            summary = " | ".join(summary_parts) or f"Задача из Excel (строка {excel_row.row_number})"
+
+        if self.description:
+            description = self.description.render(data, self.missing_value)
+        else:
+            description_lines = ["Данные из Excel файла:"]
+            for key, value in data.items():
+                if value is not None:
+                    description_lines.append(f"*{key}*: {value}")
+            description = "\n".join(description_lines)
+
+        fields = {
+            "project": self.project,
+            "summary": summary[:self.SUMMARY_MAX_LENGTH],
+            "description": {
+                "type": "doc",
+                "version": 1,
+                "content": [{"type": "paragraph", "content": [{"type": "text", "text": description}]}]
+            },
+            "issuetype": self.issue_type,
+        }
+        if labels:
+            fields["labels"] = list(labels)
+        return fields
@@ -0,0 +1,176 @@
+"""
+Сервис цепочек подчинения (функциональный и линейный руководитель)
+"""
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.db.models.expressions import RawSQL
+from decimal import Decimal
+from ..models import Employee
+
+
+class ManagementChainService:
+    """
+    Транзитивные подчиненные через рекурсивные CTE (WITH RECURSIVE)
+
+    Каждый запрос выполняется одним обращением к БД независимо от глубины
+    иерархии. Путь обхода хранится строкой вида '/1/5/9/', поэтому циклы в
+    данных не приводят к бесконечной рекурсии.
+    """
+
+    # Тип иерархии -> поле руководителя в Employee
+    RELATIONS = {
+        'line': 'line_manager',
+        'functional': 'functional_manager',
+    }
+
+    # Защита от патологически глубоких (или зацикленных) цепочек
+    MAX_DEPTH = 100
+
+    @staticmethod
+    def _names(relation, using=DEFAULT_DB_ALIAS):
+        """Имена таблицы и колонок, экранированные для SQL"""
+        if relation not in ManagementChainService.RELATIONS:
+            raise ValueError(f"Unknown relation '{relation}', expected one of: "
+                             f"{', '.join(ManagementChainService.RELATIONS)}")
+        quote = connections[using].ops.quote_name
+        opts = Employee._meta
+        return {
+            'table': quote(opts.db_table),
+            'manager': quote(opts.get_field(ManagementChainService.RELATIONS[relation]).column),
+            'income': quote(opts.get_field('current_income').column),
+            'active': quote(opts.get_field('is_active').column),
+        }
+
+    @staticmethod
+    def _subordinates_cte(relation, using=DEFAULT_DB_ALIAS):
+        """CTE chain(id, depth, path) со всеми подчиненными руководителя (параметры: manager_id x2, max_depth)"""
+        names = ManagementChainService._names(relation, using)
+        return (
+            "WITH RECURSIVE chain (id, depth, path) AS ("
+            " SELECT e.id, 1, '/' || CAST(%s AS TEXT) || '/' || CAST(e.id AS TEXT) || '/'"
+            " FROM {table} e WHERE e.{manager} = %s"
+            " UNION ALL"
+            " SELECT e.id, c.depth + 1, c.path || CAST(e.id AS TEXT) || '/'"
+            " FROM {table} e JOIN chain c ON e.{manager} = c.id"
+            " WHERE c.depth < %s AND c.path NOT LIKE '%%/' || CAST(e.id AS TEXT) || '/%%'"
+            ")"
+        ).format(**names)
+
+    @staticmethod
+    def get_subordinates(manager_id, relation='line', using=DEFAULT_DB_ALIAS):
+        """
+        Все прямые и транзитивные подчиненные руководителя
+
+        Args:
+            manager_id: ID руководителя
+            relation: 'line' или 'functional'
+
+        Returns:
+            QuerySet сотрудников (ленивый, можно дополнительно фильтровать)
+        """
+        sql = ManagementChainService._subordinates_cte(relation, using) + " SELECT id FROM chain"
+        params = (manager_id, manager_id, ManagementChainService.MAX_DEPTH)
+        return Employee.objects.using(using).filter(id__in=RawSQL(sql, params))
+
+    @staticmethod
+    def get_chain_stats(manager_id, relation='line', using=DEFAULT_DB_ALIAS):
+        """
+        Сводка по поддереву руководителя одним запросом
+
+        Args:
+            manager_id: ID руководителя
+            relation: 'line' или 'functional'
+
+        Returns:
+            dict: span_of_control (прямые подчиненные), total_subordinates,
+            depth (глубина поддерева), subtree_fot (ФОТ активных подчиненных)
+        """
+        names = ManagementChainService._names(relation, using)
+        sql = ManagementChainService._subordinates_cte(relation, using) + (
+            " SELECT"
+            " COALESCE(SUM(CASE WHEN c.depth = 1 AND e.{active} THEN 1 ELSE 0 END), 0),"
+            " COALESCE(SUM(CASE WHEN e.{active} THEN 1 ELSE 0 END), 0),"
+            " COALESCE(MAX(c.depth), 0),"
+            " COALESCE(SUM(CASE WHEN e.{active} THEN e.{income} ELSE 0 END), 0)"
+            " FROM chain c JOIN {table} e ON e.id = c.id"
+        ).format(**names)
+        params = (manager_id, manager_id, ManagementChainService.MAX_DEPTH)
+
+        with connections[using].cursor() as cursor:
+            cursor.execute(sql, params)
+            span, total, depth, fot = cursor.fetchone()
+
+        return {
+            'manager_id': manager_id,
+            'relation': relation,
+            'span_of_control': int(span),
+            'total_subordinates': int(total),
+            'depth': int(depth),
+            'subtree_fot': Decimal(str(fot)).quantize(Decimal('0.01')),
+        }
+
+    @staticmethod
+    def get_manager_ids(employee_id, relation='line', using=DEFAULT_DB_ALIAS):
+        """
+        Цепочка руководителей сотрудника снизу вверх
+
+        Returns:
+            list ID руководителей, начиная с непосредственного
+        """
+        names = ManagementChainService._names(relation, using)
+        sql = (
+            "WITH RECURSIVE up (id, depth, path) AS ("
+            " SELECT e.{manager}, 1, '/' || CAST(e.id AS TEXT) || '/'"
+            " FROM {table} e WHERE e.id = %s AND e.{manager} IS NOT NULL"
+            " UNION ALL"
+            " SELECT e.{manager}, u.depth + 1, u.path || CAST(u.id AS TEXT) || '/'"
+            " FROM {table} e JOIN up u ON e.id = u.id"
+            " WHERE e.{manager} IS NOT NULL AND u.depth < %s"
+            " AND u.path || CAST(u.id AS TEXT) || '/' NOT LIKE '%%/' || CAST(e.{manager} AS TEXT) || '/%%'"
+            ")"
+            " SELECT id FROM up ORDER BY depth"
+        ).format(**names)
+
+        with connections[using].cursor() as cursor:
+            cursor.execute(sql, (employee_id, ManagementChainService.MAX_DEPTH))
+            return [row[0] for row in cursor.fetchall()]
+
+    @staticmethod
+    def would_create_cycle(employee_id, manager_id, relation='line', using=DEFAULT_DB_ALIAS):
+        """
+        Проверить, замкнет ли назначение руководителя цепочку в цикл
+
+        Цикл возникает, если сотрудник назначается руководителем самому себе
+        или уже находится в цепочке руководителей нового руководителя.
+        """
+        if manager_id is None or employee_id is None:
+            return False
+        if employee_id == manager_id:
+            return True
+        return employee_id in ManagementChainService.get_manager_ids(manager_id, relation, using)
+
+    @staticmethod
+    def find_cycles(relation='line', using=DEFAULT_DB_ALIAS):
+        """
+        Найти сотрудников, входящих в циклы подчинения (диагностика данных)
+
+        Returns:
+            list ID сотрудников, которые являются собственными руководителями
+            через цепочку любой длины
+        """
+        names = ManagementChainService._names(relation, using)
+        sql = (
+            "WITH RECURSIVE up (start_id, id, depth, path) AS ("
+            " SELECT e.id, e.{manager}, 1, '/' || CAST(e.id AS TEXT) || '/'"
+            " FROM {table} e WHERE e.{manager} IS NOT NULL"
+            " UNION ALL"
+            " SELECT u.start_id, e.{manager}, u.depth + 1, u.path || CAST(u.id AS TEXT) || '/'"
+            " FROM {table} e JOIN up u ON e.id = u.id"
+            " WHERE e.{manager} IS NOT NULL AND u.id <> u.start_id AND u.depth < %s"
+            " AND u.path NOT LIKE '%%/' || CAST(u.id AS TEXT) || '/%%'"
+            ")"
+            " SELECT DISTINCT start_id FROM up WHERE id = start_id ORDER BY start_id"
+        ).format(**names)
+
+        with connections[using].cursor() as cursor:
+            cursor.execute(sql, (ManagementChainService.MAX_DEPTH,))
+            return [row[0] for row in cursor.fetchall()]
@@ -0,0 +1,138 @@
+"""
+Сервис дерева организационной структуры (Департамент → Отдел → Группа)
+"""
+from django.core.cache import cache
+from django.db.models import Sum, Count
+from decimal import Decimal
+from ..models import Department, Division, Group, Employee
+from .data_version import DataVersionService
+from ..metrics import record_cache
+
+
+class OrgTreeService:
+    """Вложенная оргструктура с численностью и ФОТ по каждому узлу"""
+
+    CACHE_KEY = 'org_tree:{version}'
+    CACHE_TIMEOUT = 60 * 60  # 1 час; при изменении данных меняется ключ
+
+    # Области данных, от которых зависит дерево
+    DATA_SCOPES = ('org', 'employees')
+
+    @staticmethod
+    def get_tree(version=None):
+        """
+        Получить дерево оргструктуры из кэша или построить заново
+
+        Args:
+            version: Версия данных DATA_SCOPES, если уже вычислена (например, для ETag)
+
+        Returns:
+            dict с ключами version, departments, totals
+        """
+        if version is None:
+            version = DataVersionService.get_version(*OrgTreeService.DATA_SCOPES)
+
+        cache_key = OrgTreeService.CACHE_KEY.format(version=version)
+        tree = cache.get(cache_key)
+        record_cache('org_tree', tree is not None)
+        if tree is None:
+            tree = OrgTreeService.build_tree()
+            tree['version'] = version
+            cache.set(cache_key, tree, OrgTreeService.CACHE_TIMEOUT)
+        return tree
+
+    @staticmethod
+    def build_tree():
+        """
+        Построить дерево из трех плоских запросов и одной агрегации по сотрудникам
+
+        Returns:
+            dict с ключами departments (вложенные узлы) и totals
+        """
+        departments = list(Department.objects.order_by('name').values('id', 'name', 'manager_id'))
+        divisions = list(Division.objects.order_by('name').values('id', 'name', 'department_id', 'manager_id'))
+        groups = list(Group.objects.order_by('name').values('id', 'name', 'division_id', 'manager_id'))
+
+        # Численность и ФОТ активных сотрудников в разрезе (департамент, отдел, группа)
+        employee_stats = Employee.objects.filter(is_active=True).order_by().values(
+            'department_id', 'division_id', 'group_id'
+        ).annotate(
+            headcount=Count('id'),
+            fot=Sum('current_income')
+        )
+
+        def new_stats():
+            return {'headcount': 0, 'fot': Decimal('0.00')}
+
+        department_stats = {}
+        division_stats = {}
+        group_stats = {}
+        totals = new_stats()
+
+        for row in employee_stats:
+            fot = row['fot'] or Decimal('0.00')
+            targets = [totals]
+            if row['department_id']:
+                targets.append(department_stats.setdefault(row['department_id'], new_stats()))
+            if row['division_id']:
+                targets.append(division_stats.setdefault(row['division_id'], new_stats()))
+            if row['group_id']:
+                targets.append(group_stats.setdefault(row['group_id'], new_stats()))
+            for stats in targets:
+                stats['headcount'] += row['headcount']
+                stats['fot'] += fot
+
+        groups_by_division = {}
+        for group in groups:
+            group.update(group_stats.get(group['id'], new_stats()))
+            groups_by_division.setdefault(group['division_id'], []).append(group)
+
+        divisions_by_department = {}
+        for division in divisions:
+            division.update(division_stats.get(division['id'], new_stats()))
+            division['groups'] = groups_by_division.get(division['id'], [])
+            divisions_by_department.setdefault(division['department_id'], []).append(division)
+
+        for department in departments:
+            department.update(department_stats.get(department['id'], new_stats()))
+            department['divisions'] = divisions_by_department.get(department['id'], [])
+
+        return {
+            'departments': departments,
+            'totals': totals,
+        }
+
+    @staticmethod
+    def get_choices(department_id=None, division_id=None, tree=None):
+        """
+        Плоские справочники для выпадающих списков фильтров
+
+        Args:
+            department_id: Ограничить отделы департаментом
+            division_id: Ограничить группы отделом
+            tree: Уже полученное дерево (по умолчанию - по версии из кэша, см. get_cached_version)
+
+        Returns:
+            tuple (departments, divisions, groups), каждый отсортирован по названию
+        """
+        if tree is None:
+            tree = OrgTreeService.get_tree(
+                version=DataVersionService.get_cached_version(*OrgTreeService.DATA_SCOPES)
+            )
+
+        departments = tree['departments']
+        divisions = [
+            division
+            for department in departments
+            for division in department['divisions']
+        ]
+        groups = [group for division in divisions for group in division['groups']]
+
+        if department_id:
+            divisions = [d for d in divisions if str(d['department_id']) == str(department_id)]
+        if division_id:
+            groups = [g for g in groups if str(g['division_id']) == str(division_id)]
+
+        divisions = sorted(divisions, key=lambda d: d['name'])
+        groups = sorted(groups, key=lambda g: g['name'])
+        return departments, divisions, groups
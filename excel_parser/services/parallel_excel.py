@@ -0,0 +1,295 @@
+"""
+Разбор больших xlsx в нескольких процессах
+"""
+from concurrent.futures import ProcessPoolExecutor
+import logging
+import multiprocessing
+import os
+import re
+import zipfile
+
+import django
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from pandas.io.parsers import TextParser
+
+logger = logging.getLogger(__name__)
+
+try:
+    from openpyxl import load_workbook
+    from openpyxl.reader.excel import ExcelReader
+    from openpyxl.worksheet._reader import WorkSheetParser
+    PARALLEL_AVAILABLE = True
+except ImportError:
+    # Внутренний парсер листа openpyxl другой версии: разбор в одном процессе
+    PARALLEL_AVAILABLE = False
+
+READ_BLOCK_SIZE = 1024 * 1024
+
+SHEET_DATA = b'<sheetData>'
+ROW_RE = re.compile(rb'<row[ >]')
+# Начало строки с номером: только такие листы делятся на диапазоны
+NUMBERED_ROW = b'<row r="'
+ROOT_RE = re.compile(rb'<(?![?!])([^\s>/]+)')
+
+
+class ChunkReader:
+    """Файловый объект (read) над последовательностью блоков байт"""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = b''
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def sheet_range(source, prologue_end, start, stop, closing):
+    """
+    XML листа только со строками из байт [start, stop)
+
+    Начало документа до <sheetData> (с объявлениями пространств имен) сохраняется,
+    диапазон закрывается тегами closing; stop=None - до конца документа.
+    """
+    position = 0
+    for block in iter(lambda: source.read(READ_BLOCK_SIZE), b''):
+        block_start = position
+        position += len(block)
+        for low, high in ((0, prologue_end), (start, position if stop is None else stop)):
+            low, high = max(low, block_start), min(high, position)
+            if low < high:
+                yield block[low - block_start:high - block_start]
+        if stop is not None and position >= stop:
+            break
+    if stop is not None:
+        yield closing
+
+
+def convert_cell(value, data_type):
+    """Значение ячейки как в pandas.read_excel (OpenpyxlReader._convert_cell)"""
+    if value is None:
+        return ''
+    if data_type == 'e':
+        return np.nan
+    if data_type == 'n':
+        number = int(value)
+        return number if number == value else float(value)
+    return value
+
+
+def read_rows(path, sheet_name, member, prologue_end, start, stop, closing):
+    """
+    Строки части листа (см. ParallelExcelService._split)
+
+    Выполняется в процессе пула: книга открывается заново (общие строки, форматы дат),
+    разбирается только XML своего диапазона строк.
+
+    Returns:
+        list of (номер строки, [значения ячеек без пустых в конце])
+    """
+    workbook = load_workbook(path, read_only=True, data_only=True, keep_links=False)
+    try:
+        with zipfile.ZipFile(path) as archive, archive.open(member) as source:
+            parser = WorkSheetParser(
+                ChunkReader(sheet_range(source, prologue_end, start, stop, closing)),
+                workbook[sheet_name]._shared_strings,
+                data_only=True,
+                epoch=workbook.epoch,
+                date_formats=workbook._date_formats,
+                timedelta_formats=workbook._timedelta_formats,
+            )
+            result = []
+            for number, cells in parser.parse():
+                values = []
+                for cell in cells:
+                    values.extend([''] * (cell['column'] - 1 - len(values)))
+                    values.append(convert_cell(cell['value'], cell['data_type']))
+                while values and values[-1] == '':
+                    values.pop()
+                result.append((number, values))
+            return result
+    finally:
+        workbook.close()
+
+
+class ParallelExcelService:
+    """
+    pd.read_excel для больших xlsx с разбором в ProcessPoolExecutor
+
+    Разбор openpyxl занимает одно ядро, поэтому листы книги разбираются в отдельных
+    процессах, а лист от IMPORT_PARSE_MIN_ROWS строк делится на IMPORT_PARSE_WORKERS
+    диапазонов строк. Процесс разбирает ячейки только своего диапазона. Результаты
+    собираются по порядку диапазонов и проходят тот же TextParser, что и в pd.read_excel:
+    DataFrame (типы колонок, номера строк в ошибках загрузчиков) не отличается от
+    разбора в одном процессе, кэш загрузок общий.
+
+    Используются внутренние API openpyxl (WorkSheetParser, таблица общих строк и форматы
+    дат книги): версия openpyxl ограничена в requirements.txt, совпадение с pd.read_excel
+    проверяет tests/test_parallel_excel.py.
+    """
+
+    @staticmethod
+    def workers():
+        """Число процессов разбора; 1 - разбор в текущем процессе"""
+        if not PARALLEL_AVAILABLE or settings.IMPORT_PARSE_WORKERS <= 1:
+            return 1
+        # Процессы Celery (prefork) - демоны и не могут запускать дочерние процессы
+        if multiprocessing.current_process().daemon:
+            return 1
+        return settings.IMPORT_PARSE_WORKERS
+
+    @staticmethod
+    def read_excel(file, sheets=False):
+        """
+        pd.read_excel(file, sheet_name=None if sheets else 0, engine='openpyxl')
+
+        Параллельно разбираются только xlsx на диске (путь или TemporaryUploadedFile)
+        от IMPORT_PARSE_MIN_ROWS строк; остальное - pd.read_excel в текущем процессе.
+        """
+        sheet_name = None if sheets else 0
+        workers = ParallelExcelService.workers()
+        path = ParallelExcelService._path(file) if workers > 1 else None
+        if path is None or not zipfile.is_zipfile(path):
+            return pd.read_excel(file, sheet_name=sheet_name, engine='openpyxl')
+
+        try:
+            book = ParallelExcelService._sheets(path)
+            if not sheets:
+                book = book[:1]
+            if not book or sum(len(sheet['rows']) for sheet in book) < settings.IMPORT_PARSE_MIN_ROWS:
+                return pd.read_excel(file, sheet_name=sheet_name, engine='openpyxl')
+
+            tasks = ParallelExcelService._split(path, book, workers)
+            # django.setup - для процессов spawn/forkserver; БД в процессах разбора не используется
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), initializer=django.setup) as pool:
+                parts = list(pool.map(read_rows, *zip(*tasks)))
+        except Exception as e:
+            # Ошибку поврежденного файла вернет pd.read_excel
+            logger.warning(f"Parallel parsing of {path} failed, parsing in one process: {e}")
+            return pd.read_excel(file, sheet_name=sheet_name, engine='openpyxl')
+
+        rows = {}
+        for task, part in zip(tasks, parts):
+            rows.setdefault(task[1], []).extend(part)
+        result = {sheet['name']: ParallelExcelService._frame(rows[sheet['name']]) for sheet in book}
+        return result if sheets else result[book[0]['name']]
+
+    @staticmethod
+    def _path(file):
+        if isinstance(file, (str, os.PathLike)):
+            return os.fspath(file)
+        if hasattr(file, 'temporary_file_path'):
+            return file.temporary_file_path()
+        return None
+
+    @staticmethod
+    def _sheets(path):
+        """
+        Листы книги по порядку и смещения строк в XML листа (поиск тегов без разбора XML)
+
+        Returns:
+            list of dict: name, member (файл листа в архиве), rows (смещения тегов <row>),
+            prologue_end (конец <sheetData>), closing (закрывающие теги), numbered
+            (у всех строк есть номер r - лист можно делить на диапазоны)
+        """
+        reader = ExcelReader(path, read_only=True)
+        try:
+            reader.read_manifest()
+            reader.read_workbook()
+            result = []
+            for sheet, rel in reader.parser.find_sheets():
+                if rel.target not in reader.valid_files or 'chartsheet' in rel.Type:
+                    continue
+                with reader.archive.open(rel.target) as source:
+                    result.append({'name': sheet.name, 'member': rel.target,
+                                   **ParallelExcelService._scan(source)})
+            return result
+        finally:
+            reader.archive.close()
+
+    @staticmethod
+    def _scan(source):
+        """Смещения тегов <row> и начало документа до <sheetData> (см. _sheets)"""
+        rows = []
+        numbered = True
+        prologue = b''
+        prologue_end = None
+        offset = 0
+        tail = b''
+        for block in iter(lambda: source.read(READ_BLOCK_SIZE), b''):
+            data = tail + block
+            if prologue_end is None and not rows:
+                prologue += block
+                position = prologue.find(SHEET_DATA)
+                if position >= 0:
+                    prologue_end = position + len(SHEET_DATA)
+                    prologue = prologue[:prologue_end]
+            # Только теги, целиком попавшие в data: хвост переносится в следующий блок
+            limit = len(data) - len(NUMBERED_ROW)
+            for match in ROW_RE.finditer(data):
+                if match.start() >= limit:
+                    break
+                rows.append(offset + match.start())
+                numbered = numbered and data.startswith(NUMBERED_ROW, match.start())
+            cut = max(limit, 0)
+            tail = data[cut:]
+            offset += cut
+        for match in ROW_RE.finditer(tail):
+            rows.append(offset + match.start())
+            numbered = numbered and tail.startswith(NUMBERED_ROW, match.start())
+
+        root = ROOT_RE.search(prologue) if prologue_end is not None else None
+        return {
+            'rows': rows,
+            'prologue_end': prologue_end or 0,
+            'closing': b'</sheetData></' + root.group(1) + b'>' if root else b'',
+            'numbered': numbered and root is not None,
+        }
+
+    @staticmethod
+    def _split(path, sheets, workers):
+        """
+        Задачи read_rows: (путь, лист, файл листа, конец <sheetData>, начало, конец, закрывающие теги)
+
+        Большой лист делится на workers диапазонов строк по смещениям тегов <row> (номера
+        строк берутся из атрибута r, поэтому совпадают с разбором целиком); остальные
+        листы разбираются целиком одной задачей.
+        """
+        tasks = []
+        for sheet in sheets:
+            rows = sheet['rows']
+            parts = workers if sheet['numbered'] and len(rows) >= settings.IMPORT_PARSE_MIN_ROWS else 1
+            if parts == 1:
+                tasks.append((path, sheet['name'], sheet['member'], 0, 0, None, b''))
+                continue
+            step = -(-len(rows) // parts)
+            bounds = [sheet['prologue_end']] + rows[step::step][:parts - 1] + [None]
+            for start, stop in zip(bounds, bounds[1:]):
+                tasks.append((path, sheet['name'], sheet['member'], sheet['prologue_end'], start, stop,
+                              sheet['closing']))
+        return tasks
+
+    @staticmethod
+    def _frame(rows):
+        """DataFrame из строк листа - как в pd.read_excel (первая строка - заголовок)"""
+        data = []
+        for number, values in rows:
+            # Пропущенные в файле строки - пустые, как при чтении листа openpyxl
+            data.extend([] for _ in range(number - 1 - len(data)))
+            data.append(values)
+        while data and not data[-1]:
+            data.pop()
+        if not data:
+            return pd.DataFrame()
+        width = max(len(values) for values in data)
+        data = [values + [''] * (width - len(values)) for values in data]
+        return TextParser(data, header=0, skip_blank_lines=False).read()
@@ -0,0 +1,74 @@
+"""
+Сервис поиска сотрудников (pg_trgm + полнотекстовый поиск PostgreSQL)
+"""
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.db.models import Q, F, FloatField, Value
+from django.db.models.functions import Greatest, Coalesce
+
+# Конфигурация полнотекстового поиска PostgreSQL
+SEARCH_CONFIG = 'russian'
+
+# Поля для триграммного поиска (опечатки, подстроки, search-as-you-type)
+TRIGRAM_FIELDS = ['full_name', 'login', 'position']
+
+# Поля для полнотекстового поиска (морфология: "разработчики" -> "разработчик")
+FULLTEXT_FIELDS = ['full_name', 'position']
+
+
+class EmployeeSearchService:
+    """Поиск сотрудников с ранжированием и устойчивостью к опечаткам"""
+
+    @staticmethod
+    def is_supported(using=DEFAULT_DB_ALIAS):
+        """Доступен ли поиск на индексах PostgreSQL для соединения"""
+        return connections[using].vendor == 'postgresql'
+
+    @staticmethod
+    def _search_vector():
+        from django.contrib.postgres.search import SearchVector
+        return SearchVector(*FULLTEXT_FIELDS, config=SEARCH_CONFIG)
+
+    @staticmethod
+    def search(queryset, query):
+        """
+        Отфильтровать и отранжировать QuerySet сотрудников по строке поиска
+
+        На PostgreSQL используются операторы pg_trgm (word similarity) и
+        to_tsvector с русской конфигурацией, оба покрыты GIN-индексами
+        (миграция 0002_employee_search_indexes).
+        На остальных СУБД (SQLite в тестах) - обычный icontains.
+
+        Args:
+            queryset: QuerySet сотрудников
+            query: Строка поиска
+
+        Returns:
+            QuerySet с аннотацией search_rank (по убыванию релевантности)
+        """
+        query = (query or '').strip()
+        if not query:
+            return queryset
+
+        if not EmployeeSearchService.is_supported(queryset.db):
+            return queryset.filter(
+                Q(full_name__icontains=query) |
+                Q(login__icontains=query) |
+                Q(position__icontains=query)
+            ).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+        from django.contrib.postgres.search import (
+            SearchQuery, SearchRank, TrigramWordSimilarity
+        )
+
+        search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+        condition = Q(search_document=search_query)
+        for field in TRIGRAM_FIELDS:
+            condition |= Q(**{f'{field}__trigram_word_similar': query})
+
+        return queryset.annotate(
+            search_document=EmployeeSearchService._search_vector(),
+        ).filter(condition).annotate(
+            search_rank=Greatest(
+                *[Coalesce(TrigramWordSimilarity(query, field), Value(0.0)) for field in TRIGRAM_FIELDS]
+            ) + SearchRank(F('search_document'), search_query)
+        ).order_by('-search_rank', 'full_name', 'id')
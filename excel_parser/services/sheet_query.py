@@ -0,0 +1,278 @@
+"""
+Запросы к строкам загруженных листов (ExcelRow.data, JSONB в PostgreSQL)
+"""
+import hashlib
+import logging
+
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.db.models import (
+    Avg, Case, CharField, Count, F, FloatField, Func, Index, Max, Min, Q, Sum, When
+)
+from django.db.models.fields.json import KeyTextTransform, KeyTransform
+from django.db.models.functions import Cast
+from django.db.models.lookups import Exact
+
+from ..models import ExcelRow, ExcelColumnMapping
+
+logger = logging.getLogger(__name__)
+
+# Операторы фильтров: eq/ne/in - через @> (GIN-индекс по data), сравнения и сортировка -
+# через data -> 'колонка' (индексы по выражению, см. create_indexes)
+FILTER_OPERATORS = ('eq', 'ne', 'in', 'gt', 'gte', 'lt', 'lte', 'contains', 'isnull')
+AGGREGATES = {'count': Count, 'sum': Sum, 'avg': Avg, 'min': Min, 'max': Max}
+
+# Максимум строк в одном ответе query()
+MAX_LIMIT = 1000
+
+DATA_GIN_INDEX = 'excelrow_data_gin'
+
+
+class JSONBTypeOf(Func):
+    """jsonb_typeof(): number, string, boolean, null, object, array"""
+    function = 'jsonb_typeof'
+    output_field = CharField()
+
+
+class SheetQueryService:
+    """
+    Фильтрация, сортировка и агрегация строк листа по колонкам
+
+    Колонки - ключи ExcelRow.data (названия колонок Excel, как в ExcelColumnMapping).
+    Запросы строятся на JSONB-операторах PostgreSQL; на SQLite работают те же выражения
+    Django, но без индексов и без проверки типа значений при сравнении.
+    """
+
+    @staticmethod
+    def is_indexed(using=DEFAULT_DB_ALIAS):
+        """Доступны ли JSONB-индексы для соединения"""
+        return connections[using].vendor == 'postgresql'
+
+    @staticmethod
+    def get_columns(excel_file_id):
+        """Колонки листа в порядке файла"""
+        return list(
+            ExcelColumnMapping.objects
+            .filter(excel_file_id=excel_file_id)
+            .order_by('order')
+            .values_list('excel_column', flat=True)
+        )
+
+    @staticmethod
+    def query(excel_file_id, filters=None, sort=None, limit=100, offset=0):
+        """
+        Строки листа с фильтрами и сортировкой
+
+        Args:
+            excel_file_id: ID загруженного файла
+            filters: список {'column', 'op', 'value'}, op из FILTER_OPERATORS (по умолчанию eq)
+            sort: список колонок, '-колонка' - по убыванию
+            limit, offset: страница (limit не больше MAX_LIMIT)
+
+        Returns:
+            dict: total и rows (id, row_number, data)
+
+        Raises:
+            ValueError: неизвестная колонка, оператор или некорректный параметр
+        """
+        limit = int(limit)
+        offset = int(offset)
+        if not 0 < limit <= MAX_LIMIT or offset < 0:
+            raise ValueError(f"limit must be 1..{MAX_LIMIT}, offset must be >= 0")
+
+        columns = SheetQueryService.get_columns(excel_file_id)
+        queryset = SheetQueryService.filter_rows(
+            ExcelRow.objects.filter(excel_file_id=excel_file_id), filters, columns
+        )
+
+        order_by = []
+        for key in sort or []:
+            descending = key.startswith('-')
+            column = key[1:] if descending else key
+            SheetQueryService._check_column(column, columns)
+            expression = KeyTransform(column, 'data')
+            order_by.append(expression.desc() if descending else expression.asc())
+        # Стабильный порядок при пагинации
+        order_by.append('row_number')
+
+        rows = queryset.order_by(*order_by).values('id', 'row_number', 'data')[offset:offset + limit]
+        return {
+            'total': queryset.count(),
+            'rows': list(rows),
+        }
+
+    @staticmethod
+    def aggregate(excel_file_id, group_by=None, metrics=None, filters=None):
+        """
+        Агрегаты по колонкам листа
+
+        Args:
+            group_by: список колонок группировки (значения сравниваются как текст)
+            metrics: список {'column', 'func'}, func из AGGREGATES; без column - count строк.
+                sum/avg/min/max учитывают только числовые значения колонки.
+            filters: как в query()
+
+        Returns:
+            list: строки вида {колонка группировки: значение, '<func>_<колонка>': значение}
+        """
+        columns = SheetQueryService.get_columns(excel_file_id)
+        queryset = SheetQueryService.filter_rows(
+            ExcelRow.objects.filter(excel_file_id=excel_file_id), filters, columns
+        )
+        numeric_guard = SheetQueryService.is_indexed(queryset.db)
+
+        annotations = {}
+        names = {}
+        for metric in metrics or [{'func': 'count'}]:
+            func = metric.get('func', 'count')
+            column = metric.get('column')
+            if func not in AGGREGATES:
+                raise ValueError(f"Unknown aggregate {func!r}, expected one of {', '.join(AGGREGATES)}")
+            alias = f'm{len(annotations)}'
+            if column is None:
+                if func != 'count':
+                    raise ValueError(f"Aggregate {func!r} requires a column")
+                annotations[alias] = Count('id')
+                names[alias] = 'count'
+                continue
+            SheetQueryService._check_column(column, columns)
+            if func == 'count':
+                # ->> дает NULL и для отсутствующего ключа, и для JSON null
+                annotations[alias] = Count(KeyTextTransform(column, 'data'))
+            else:
+                annotations[alias] = AGGREGATES[func](SheetQueryService._numeric(column, numeric_guard))
+            names[alias] = f'{func}_{column}'
+
+        group_aliases = {}
+        for column in group_by or []:
+            SheetQueryService._check_column(column, columns)
+            group_aliases[f'g{len(group_aliases)}'] = column
+
+        if group_aliases:
+            result = list(
+                queryset
+                .values(**{alias: KeyTextTransform(column, 'data') for alias, column in group_aliases.items()})
+                .annotate(**annotations)
+                .order_by(*group_aliases)
+            )
+        else:
+            result = [queryset.aggregate(**annotations)]
+
+        names.update(group_aliases)
+        return [{names[key]: value for key, value in item.items()} for item in result]
+
+    @staticmethod
+    def filter_rows(queryset, filters, columns):
+        """Применить фильтры {'column', 'op', 'value'} к QuerySet строк"""
+        type_guard = SheetQueryService.is_indexed(queryset.db)
+        for number, item in enumerate(filters or []):
+            column = item.get('column')
+            op = item.get('op', 'eq')
+            value = item.get('value')
+            SheetQueryService._check_column(column, columns)
+            if op not in FILTER_OPERATORS:
+                raise ValueError(f"Unknown operator {op!r}, expected one of {', '.join(FILTER_OPERATORS)}")
+
+            if op in ('eq', 'ne', 'in'):
+                values = value if op == 'in' else [value]
+                if op == 'in' and (not isinstance(value, list) or not value):
+                    raise ValueError(f"Operator 'in' requires a non-empty list for column {column!r}")
+                if type_guard:
+                    condition = Q()
+                    for option in values:
+                        condition |= Q(data__contains={column: option})
+                else:
+                    # SQLite: @> нет, сравниваем значение ключа
+                    alias = f'f{number}'
+                    queryset = queryset.alias(**{alias: KeyTransform(column, 'data')})
+                    condition = Q(**{f'{alias}__in': values})
+                queryset = queryset.exclude(condition) if op == 'ne' else queryset.filter(condition)
+            elif op == 'isnull':
+                alias = f'f{number}'
+                queryset = queryset.alias(**{alias: KeyTextTransform(column, 'data')})
+                queryset = queryset.filter(**{f'{alias}__isnull': bool(value)})
+            elif op == 'contains':
+                alias = f'f{number}'
+                queryset = queryset.alias(**{alias: KeyTextTransform(column, 'data')})
+                queryset = queryset.filter(**{f'{alias}__icontains': str(value)})
+            else:
+                if value is None or isinstance(value, (list, dict)):
+                    raise ValueError(f"Operator {op!r} requires a number, string or boolean value")
+                alias = f'f{number}'
+                queryset = queryset.alias(**{alias: KeyTransform(column, 'data')})
+                queryset = queryset.filter(**{f'{alias}__{op}': value})
+                if type_guard:
+                    # jsonb сравнивает значения разных типов по типу (строка < число),
+                    # поэтому сравниваем только с значениями того же типа
+                    type_alias = f't{number}'
+                    queryset = queryset.alias(**{type_alias: JSONBTypeOf(KeyTransform(column, 'data'))})
+                    queryset = queryset.filter(**{type_alias: SheetQueryService._jsonb_type(value)})
+        return queryset
+
+    @staticmethod
+    def _check_column(column, columns):
+        if not isinstance(column, str) or (columns and column not in columns):
+            raise ValueError(f"Unknown column {column!r}")
+
+    @staticmethod
+    def _jsonb_type(value):
+        if isinstance(value, bool):
+            return 'boolean'
+        if isinstance(value, (int, float)):
+            return 'number'
+        return 'string'
+
+    @staticmethod
+    def _numeric(column, numeric_guard):
+        """Числовое значение колонки; на PostgreSQL нечисловые значения дают NULL, а не ошибку"""
+        value = Cast(KeyTextTransform(column, 'data'), FloatField())
+        if not numeric_guard:
+            return value
+        return Case(
+            When(Exact(JSONBTypeOf(KeyTransform(column, 'data')), 'number'), then=value),
+            output_field=FloatField(),
+        )
+
+    @staticmethod
+    def get_index_definitions(columns=()):
+        """GIN-индекс по data и индексы по выражению (excel_file_id, data -> 'колонка')"""
+        from django.contrib.postgres.indexes import GinIndex, OpClass
+
+        indexes = [GinIndex(OpClass(F('data'), name='jsonb_path_ops'), name=DATA_GIN_INDEX)]
+        for column in columns:
+            digest = hashlib.md5(column.encode('utf-8')).hexdigest()[:12]
+            indexes.append(Index(F('excel_file'), KeyTransform(column, 'data'), name=f'excelrow_col_{digest}'))
+        return indexes
+
+    @staticmethod
+    def create_indexes(excel_file_id=None, columns=None, using=DEFAULT_DB_ALIAS):
+        """
+        Создать GIN-индекс по data и индексы по колонкам (только PostgreSQL)
+
+        Индекс по колонке общий для всех файлов с такой колонкой. Колонки - переданные
+        или все колонки из ExcelColumnMapping файла (всех файлов, если файл не указан).
+
+        Returns:
+            list: имена созданных индексов
+        """
+        connection = connections[using]
+        if connection.vendor != 'postgresql':
+            return []
+
+        if columns is None:
+            mappings = ExcelColumnMapping.objects.using(using)
+            if excel_file_id is not None:
+                mappings = mappings.filter(excel_file_id=excel_file_id)
+            columns = sorted(set(mappings.values_list('excel_column', flat=True)))
+
+        table = ExcelRow._meta.db_table
+        with connection.cursor() as cursor:
+            existing = connection.introspection.get_constraints(cursor, table)
+
+        created = []
+        with connection.schema_editor() as schema_editor:
+            for index in SheetQueryService.get_index_definitions(columns):
+                if index.name not in existing:
+                    logger.info(f"Creating sheet index {index.name}")
+                    schema_editor.add_index(ExcelRow, index)
+                    created.append(index.name)
+        return created
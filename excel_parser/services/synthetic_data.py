@@ -0,0 +1,312 @@
+"""
+Сервис генерации синтетических данных ФОТ (тестовые данные и бенчмарки)
+"""
+from django.db import transaction
+from django.utils import timezone
+from decimal import Decimal
+from datetime import date, timedelta
+import math
+import random
+from ..models import (
+    Department, Division, Group, Employee, SalaryHistory,
+    build_org_path, ORG_PATH_NAMES_SEPARATOR
+)
+
+
+# Шаблон оргструктуры: департамент -> отделы
+DEPARTMENTS = {
+    'Разработка': ['Backend', 'Frontend', 'Mobile', 'DevOps'],
+    'Продажи': ['B2B', 'B2C', 'Партнеры'],
+    'Маркетинг': ['Digital', 'Контент', 'Аналитика'],
+    'HR': ['Рекрутинг', 'Обучение', 'Администрация'],
+    'Финансы': ['Бухгалтерия', 'Планирование', 'Аудит'],
+    'Операции': ['Логистика', 'Склад', 'Доставка'],
+    'Поддержка': ['Техподдержка', 'Клиентский сервис'],
+    'Аналитика': ['BI', 'Data Science', 'Исследования'],
+}
+
+FIRST_NAMES = [
+    'Иван', 'Петр', 'Александр', 'Дмитрий', 'Сергей', 'Андрей', 'Алексей',
+    'Максим', 'Владимир', 'Николай', 'Михаил', 'Павел', 'Роман', 'Олег',
+    'Анна', 'Мария', 'Елена', 'Ольга', 'Татьяна', 'Наталья', 'Ирина',
+    'Светлана', 'Екатерина', 'Юлия', 'Анастасия', 'Дарья', 'Виктория'
+]
+LAST_NAMES = [
+    'Иванов', 'Петров', 'Сидоров', 'Смирнов', 'Кузнецов', 'Попов', 'Соколов',
+    'Лебедев', 'Козлов', 'Новиков', 'Морозов', 'Петров', 'Волков', 'Соловьев',
+    'Васильев', 'Зайцев', 'Павлов', 'Семенов', 'Голубев', 'Виноградов'
+]
+MIDDLE_NAMES = [
+    'Иванович', 'Петрович', 'Александрович', 'Дмитриевич', 'Сергеевич',
+    'Андреевич', 'Алексеевич', 'Максимович', 'Владимирович', 'Николаевич',
+    'Ивановна', 'Петровна', 'Александровна', 'Дмитриевна', 'Сергеевна'
+]
+POSITIONS = [
+    'Разработчик', 'Старший разработчик', 'Ведущий разработчик',
+    'Менеджер по продажам', 'Старший менеджер', 'Директор по продажам',
+    'Маркетолог', 'Старший маркетолог', 'Руководитель маркетинга',
+    'HR-менеджер', 'Рекрутер', 'Руководитель HR',
+    'Бухгалтер', 'Финансовый аналитик', 'CFO',
+    'Операционный менеджер', 'Логист', 'Руководитель операций',
+    'Специалист поддержки', 'Старший специалист', 'Руководитель поддержки',
+    'Аналитик данных', 'Data Scientist', 'Руководитель аналитики'
+]
+
+LOGIN_PREFIX = 'user_'
+
+
+class SyntheticDataService:
+    """
+    Массовая генерация оргструктуры, сотрудников и истории зарплаты
+
+    Все записи создаются через bulk_create/bulk_update пакетами, поэтому
+    Employee.save() и сигналы не вызываются: org_path, разницы в истории и
+    руководители заполняются здесь же. При одинаковом seed результат
+    воспроизводим.
+    """
+
+    # Сотрудников на одну копию шаблона оргструктуры (8 департаментов)
+    EMPLOYEES_PER_ORG_COPY = 5000
+
+    @staticmethod
+    def generate(employees, history_depth=3, seed=None, batch_size=2000, progress=None):
+        """
+        Сгенерировать данные
+
+        Args:
+            employees: Количество сотрудников
+            history_depth: Записей истории зарплаты на сотрудника
+            seed: Seed генератора случайных чисел (None - случайный)
+            batch_size: Размер пакета bulk_create/bulk_update
+            progress: callable(message) для вывода хода генерации
+
+        Returns:
+            dict с количеством созданных департаментов, отделов, групп, сотрудников и записей истории
+        """
+        rng = random.Random(seed)
+        progress = progress or (lambda message: None)
+        stats = {'departments': 0, 'divisions': 0, 'groups': 0, 'employees': 0, 'salary_history': 0}
+
+        with transaction.atomic():
+            groups = SyntheticDataService._create_org_structure(rng, employees, batch_size, stats)
+            progress(f"Оргструктура: {stats['departments']} департаментов, {stats['divisions']} отделов, "
+                     f"{stats['groups']} групп (новых)")
+
+            start_number = SyntheticDataService._next_login_number()
+            heads = {}
+            # Первые сотрудники - руководители групп (по одному на группу)
+            head_groups = groups[:employees]
+            for offset in range(0, len(head_groups), batch_size):
+                batch = [
+                    SyntheticDataService._build_employee(rng, start_number + offset + i, group)
+                    for i, group in enumerate(head_groups[offset:offset + batch_size])
+                ]
+                SyntheticDataService._save_batch(rng, batch, history_depth, batch_size, stats)
+                heads.update((employee.group_id, employee) for employee in batch)
+            SyntheticDataService._assign_heads(groups, heads, batch_size)
+
+            staffed_groups = [group for group in groups if group.pk in heads]
+            division_heads = SyntheticDataService._division_heads(staffed_groups, heads)
+            created = len(heads)
+            while created < employees:
+                batch = []
+                for i in range(min(batch_size, employees - created)):
+                    group = rng.choice(staffed_groups)
+                    employee = SyntheticDataService._build_employee(rng, start_number + created + i, group)
+                    employee.line_manager_id = heads[group.pk].pk
+                    division_head = division_heads[group.division_id]
+                    # 30% сотрудников имеют функционального руководителя - руководителя отдела
+                    if rng.random() < 0.3 and division_head.pk != employee.line_manager_id:
+                        employee.functional_manager_id = division_head.pk
+                    batch.append(employee)
+                SyntheticDataService._save_batch(rng, batch, history_depth, batch_size, stats)
+                created += len(batch)
+                progress(f"Создано сотрудников: {created}/{employees}")
+
+        return stats
+
+    @staticmethod
+    def _create_org_structure(rng, employees, batch_size, stats):
+        """Создать недостающие узлы оргструктуры; вернуть группы с подгруженными отделами и департаментами"""
+        copies = max(1, math.ceil(employees / SyntheticDataService.EMPLOYEES_PER_ORG_COPY))
+        # Название департамента -> название в шаблоне DEPARTMENTS
+        templates = {
+            name if copy == 1 else f"{name} {copy}": name
+            for copy in range(1, copies + 1)
+            for name in DEPARTMENTS
+        }
+        department_names = list(templates)
+
+        existing = set(Department.objects.filter(name__in=department_names).values_list('name', flat=True))
+        new_departments = [Department(name=name) for name in department_names if name not in existing]
+        Department.objects.bulk_create(new_departments, batch_size=batch_size)
+        stats['departments'] = len(new_departments)
+        departments = Department.objects.filter(name__in=department_names).in_bulk(field_name='name')
+
+        existing = set(Division.objects.filter(department__in=departments.values()).values_list('department_id', 'name'))
+        new_divisions = [
+            Division(department=department, name=division_name)
+            for name, department in departments.items()
+            for division_name in DEPARTMENTS[templates[name]]
+            if (department.pk, division_name) not in existing
+        ]
+        Division.objects.bulk_create(new_divisions, batch_size=batch_size)
+        stats['divisions'] = len(new_divisions)
+        divisions = list(
+            Division.objects.filter(department__in=departments.values()).select_related('department').order_by('id')
+        )
+
+        existing = set(Group.objects.filter(division__in=divisions).values_list('division_id', 'name'))
+        new_groups = [
+            Group(division=division, name=f'Группа {i + 1}')
+            for division in divisions
+            # 1-2 группы на отдел
+            for i in range(rng.randint(1, 2))
+            if (division.pk, f'Группа {i + 1}') not in existing
+        ]
+        Group.objects.bulk_create(new_groups, batch_size=batch_size)
+        stats['groups'] = len(new_groups)
+        return list(Group.objects.filter(division__in=divisions).select_related('division__department').order_by('id'))
+
+    @staticmethod
+    def _next_login_number():
+        """Следующий свободный номер логина user_N"""
+        max_number = 0
+        for login in Employee.objects.filter(login__startswith=LOGIN_PREFIX).values_list('login', flat=True).iterator():
+            try:
+                max_number = max(max_number, int(login[len(LOGIN_PREFIX):]))
+            except ValueError:
+                pass
+        return max_number + 1
+
+    @staticmethod
+    def _build_employee(rng, number, group):
+        """Сотрудник группы со случайными ФИО, датой приема и доходом (без сохранения)"""
+        division = group.division
+        department = division.department
+        # Оклад от 50,000 до 500,000, премии - доля от оклада
+        salary = Decimal(rng.randint(50000, 500000))
+        return Employee(
+            login=f"{LOGIN_PREFIX}{number:03d}",
+            full_name=f"{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)} {rng.choice(MIDDLE_NAMES)}",
+            # *_id вместо объектов: присваивание FK-объекта обращается к роутеру БД на каждое поле
+            department_id=department.pk,
+            division_id=division.pk,
+            group_id=group.pk,
+            org_path=build_org_path(department.pk, division.pk, group.pk),
+            org_path_names=ORG_PATH_NAMES_SEPARATOR.join((department.name, division.name, group.name)),
+            position=rng.choice(POSITIONS),
+            hire_date=date.today() - timedelta(days=rng.randint(365, 365 * 10)),
+            current_salary=salary,
+            current_quarterly_bonus=Decimal(rng.randint(0, int(salary * Decimal('0.5')))),
+            current_monthly_bonus=Decimal(rng.randint(0, int(salary * Decimal('0.3')))),
+            current_yearly_bonus=Decimal(rng.randint(0, int(salary * Decimal('2.0')))),
+            is_active=True,
+        )
+
+    @staticmethod
+    def _build_history(rng, employee, history_depth):
+        """История зарплаты от приема до текущих значений (даты по возрастанию)"""
+        days_since_hire = max((date.today() - employee.hire_date).days, 1)
+        change_dates = sorted(
+            date.today() - timedelta(days=rng.randint(0, days_since_hire))
+            for _ in range(history_depth)
+        )
+        current = (
+            employee.current_salary,
+            employee.current_quarterly_bonus,
+            employee.current_monthly_bonus,
+            employee.current_yearly_bonus,
+        )
+        previous = (Decimal('0.00'),) * 4
+        records = []
+        for j, change_date in enumerate(change_dates):
+            if j < history_depth - 1:
+                # Промежуточные значения растут, но не выше текущих
+                after = tuple(
+                    min(value, before + Decimal(rng.randint(0, int(value / history_depth) + 1)))
+                    for before, value in zip(previous, current)
+                )
+            else:
+                after = current
+            record = SalaryHistory(
+                employee_id=employee.pk,
+                change_date=change_date,
+                salary_before=previous[0],
+                salary_after=after[0],
+                quarterly_bonus_before=previous[1],
+                quarterly_bonus_after=after[1],
+                monthly_bonus_before=previous[2],
+                monthly_bonus_after=after[2],
+                yearly_bonus_before=previous[3],
+                yearly_bonus_after=after[3],
+                comment=f'Изменение зарплаты #{j + 1}',
+            )
+            record.calculate_diffs()
+            records.append(record)
+            previous = after
+        return records
+
+    @staticmethod
+    def _save_batch(rng, batch, history_depth, batch_size, stats):
+        Employee.objects.bulk_create(batch, batch_size=batch_size)
+        stats['employees'] += len(batch)
+        if history_depth > 0:
+            history = [
+                record
+                for employee in batch
+                for record in SyntheticDataService._build_history(rng, employee, history_depth)
+            ]
+            SalaryHistory.objects.bulk_create(history, batch_size=batch_size)
+            stats['salary_history'] += len(history)
+
+    @staticmethod
+    def _division_heads(groups, heads):
+        """Руководитель отдела - руководитель его первой укомплектованной группы"""
+        division_heads = {}
+        for group in groups:
+            division_heads.setdefault(group.division_id, heads[group.pk])
+        return division_heads
+
+    @staticmethod
+    def _assign_heads(groups, heads, batch_size):
+        """
+        Назначить руководителей узлов оргструктуры и линейных руководителей руководителям групп
+
+        Цепочка всегда идет вверх (группа -> отдел -> департамент), поэтому циклов нет.
+        """
+        staffed_groups = [group for group in groups if group.pk in heads]
+        division_heads = SyntheticDataService._division_heads(staffed_groups, heads)
+        department_heads = {}
+        for group in staffed_groups:
+            department_heads.setdefault(group.division.department_id, heads[group.pk])
+
+        now = timezone.now()
+        changed_heads = []
+        for group in staffed_groups:
+            head = heads[group.pk]
+            division_head = division_heads[group.division_id]
+            department_head = department_heads[group.division.department_id]
+            manager = division_head if division_head is not head else department_head
+            if manager is not head:
+                head.line_manager_id = manager.pk
+                head.updated_at = now
+                changed_heads.append(head)
+        Employee.objects.bulk_update(changed_heads, ['line_manager', 'updated_at'], batch_size=batch_size)
+
+        # Руководители узлов назначаются только там, где их еще нет
+        units = []
+        for group in staffed_groups:
+            for unit, head in (
+                (group, heads[group.pk]),
+                (group.division, division_heads[group.division_id]),
+                (group.division.department, department_heads[group.division.department_id]),
+            ):
+                if unit.manager_id is None:
+                    unit.manager_id = head.pk
+                    unit.updated_at = now
+                    units.append(unit)
+        for model in (Group, Division, Department):
+            # Отдел и департамент встречаются в нескольких группах - берем каждый один раз
+            unique_units = list({unit.pk: unit for unit in units if isinstance(unit, model)}.values())
+            model.objects.bulk_update(unique_units, ['manager', 'updated_at'], batch_size=batch_size)
@@ -0,0 +1,664 @@
+"""
+Загрузка оргструктуры и сотрудников из одной книги Excel
+"""
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from ..metrics import ImportMetrics
+from ..models import (
+    Department, Division, Group, Employee, SalaryHistory,
+    build_org_path, ORG_PATH_NAMES_SEPARATOR
+)
+from .data_loader import DataLoaderService
+from .management_chain import ManagementChainService
+
+logger = logging.getLogger(__name__)
+
+# Листы книги в порядке загрузки (название листа без учета регистра)
+SHEETS = {
+    'departments': ('департаменты', 'departments'),
+    'divisions': ('отделы', 'divisions'),
+    'groups': ('группы', 'groups'),
+    'employees': ('сотрудники', 'employees'),
+}
+
+# Колонки листов: поле -> варианты заголовка (как в загрузчиках DataLoaderService)
+DEPARTMENT_COLUMNS = {'name': ('Название', 'name')}
+DIVISION_COLUMNS = {'department': ('Департамент', 'department'), 'name': ('Название', 'name')}
+GROUP_COLUMNS = {'division': ('Отдел', 'division'), 'name': ('Название', 'name')}
+EMPLOYEE_COLUMNS = {
+    'login': ('Логин', 'login'),
+    'full_name': ('ФИО', 'full_name'),
+    'position': ('Должность', 'position'),
+    'hire_date': ('Дата принятия', 'hire_date'),
+    'department': ('Департамент', 'department'),
+    'division': ('Отдел', 'division'),
+    'group': ('Группа', 'group'),
+    'functional_manager': ('Функциональный руководитель', 'functional_manager'),
+    'line_manager': ('Линейный руководитель', 'line_manager'),
+    'current_salary': ('Оклад', 'salary', 'current_salary'),
+    'current_quarterly_bonus': ('Квартальная премия', 'quarterly_bonus'),
+    'current_monthly_bonus': ('Месячная премия', 'monthly_bonus'),
+    'current_yearly_bonus': ('Годовая премия', 'yearly_bonus'),
+}
+
+FINANCE_FIELDS = (
+    'current_salary', 'current_quarterly_bonus', 'current_monthly_bonus', 'current_yearly_bonus'
+)
+# Поля SalaryHistory (<поле>_before/<поле>_after) для FINANCE_FIELDS
+HISTORY_FIELDS = ('salary', 'quarterly_bonus', 'monthly_bonus', 'yearly_bonus')
+
+CYCLE_ERROR = "Назначение руководителя создает цикл в цепочке подчинения"
+
+BATCH_SIZE = 1000
+
+
+class UnknownName(ValueError):
+    """Узла оргструктуры с таким названием нет"""
+
+
+class OrgIndex:
+    """Узлы оргструктуры в памяти: поиск по названию и проверка иерархии без запросов"""
+
+    def __init__(self):
+        # Отрицательные ID - узлы, которые были бы созданы при проверке без записи (dry_run)
+        self.last_virtual_id = 0
+        self.departments = dict(Department.objects.values_list('name', 'id'))
+        self.department_names = {pk: name for name, pk in self.departments.items()}
+        self.divisions = {}
+        self.division_names = {}
+        self.division_parent = {}
+        self.divisions_by_name = defaultdict(list)
+        for pk, name, department_id in Division.objects.values_list('id', 'name', 'department_id'):
+            self.add_division(pk, name, department_id)
+        self.groups = {}
+        self.group_names = {}
+        self.group_parent = {}
+        self.groups_by_name = defaultdict(list)
+        for pk, name, division_id in Group.objects.values_list('id', 'name', 'division_id'):
+            self.add_group(pk, name, division_id)
+
+    def virtual_id(self):
+        self.last_virtual_id -= 1
+        return self.last_virtual_id
+
+    def find_department(self, name):
+        department_id = self.departments.get(name)
+        if department_id is None:
+            raise UnknownName(f"Департамент «{name}» не найден")
+        return department_id
+
+    def add_department(self, pk, name):
+        self.departments[name] = pk
+        self.department_names[pk] = name
+
+    def add_division(self, pk, name, department_id):
+        self.divisions[(department_id, name)] = pk
+        self.division_names[pk] = name
+        self.division_parent[pk] = department_id
+        self.divisions_by_name[name].append(pk)
+
+    def add_group(self, pk, name, division_id):
+        self.groups[(division_id, name)] = pk
+        self.group_names[pk] = name
+        self.group_parent[pk] = division_id
+        self.groups_by_name[name].append(pk)
+
+    def find_division(self, name, department_id=None):
+        """
+        Отдел по названию (в департаменте, если он указан)
+
+        Raises:
+            UnknownName: отдел не найден
+            ValueError: отдел не входит в департамент или название неоднозначно
+        """
+        candidates = self.divisions_by_name.get(name)
+        if not candidates:
+            raise UnknownName(f"Отдел «{name}» не найден")
+        if department_id:
+            candidates = [pk for pk in candidates if self.division_parent[pk] == department_id]
+            if not candidates:
+                raise ValueError(f"Отдел «{name}» не входит в выбранный департамент")
+        if len(candidates) > 1:
+            raise ValueError(f"Отдел «{name}» есть в нескольких департаментах, укажите департамент")
+        return candidates[0]
+
+    def find_group(self, name, division_id=None):
+        """Группа по названию (в отделе, если он указан); ошибки - как в find_division"""
+        candidates = self.groups_by_name.get(name)
+        if not candidates:
+            raise UnknownName(f"Группа «{name}» не найдена")
+        if division_id:
+            candidates = [pk for pk in candidates if self.group_parent[pk] == division_id]
+            if not candidates:
+                raise ValueError(f"Группа «{name}» не входит в выбранный отдел")
+        if len(candidates) > 1:
+            raise ValueError(f"Группа «{name}» есть в нескольких отделах, укажите отдел")
+        return candidates[0]
+
+    def resolve(self, department_id=None, division_id=None, group_id=None):
+        """
+        То же, что resolve_org_unit, по данным в памяти
+
+        Returns:
+            tuple (department_id, division_id, group_id, org_path, org_path_names)
+        """
+        if group_id:
+            group_division = self.group_parent[group_id]
+            if division_id and division_id != group_division:
+                raise ValueError(f"Группа «{self.group_names[group_id]}» не входит в выбранный отдел")
+            if department_id and department_id != self.division_parent[group_division]:
+                raise ValueError(f"Группа «{self.group_names[group_id]}» не входит в выбранный департамент")
+            division_id = group_division
+            department_id = self.division_parent[group_division]
+        elif division_id:
+            division_department = self.division_parent[division_id]
+            if department_id and department_id != division_department:
+                raise ValueError(f"Отдел «{self.division_names[division_id]}» не входит в выбранный департамент")
+            department_id = division_department
+
+        ids = (department_id, division_id, group_id)
+        names = [
+            names[pk]
+            for names, pk in zip((self.department_names, self.division_names, self.group_names), ids)
+            if pk
+        ]
+        return department_id, division_id, group_id, build_org_path(*ids), ORG_PATH_NAMES_SEPARATOR.join(names)
+
+
+class WorkbookLoaderService:
+    """
+    Загрузка департаментов, отделов, групп и сотрудников из листов одной книги
+
+    Книга читается один раз, листы загружаются по уровням в одной транзакции:
+    каждый уровень - preload существующих записей одним запросом и bulk_create/
+    bulk_update вместо запросов на строку. Согласованность оргструктуры и циклы
+    подчинения проверяются в памяти (Employee.save() не вызывается). Руководители
+    назначаются после создания всех сотрудников, поэтому порядок строк не важен.
+
+    С dry_run выполняются те же разбор и проверки, но ничего не записывается: новые
+    узлы оргструктуры получают временные ID в OrgIndex, сотрудники не сохраняются.
+    """
+
+    @staticmethod
+    def find_sheets(sheets):
+        """
+        Листы книги по загрузчикам
+
+        Returns:
+            dict: {'departments': DataFrame, ...} только для найденных листов
+
+        Raises:
+            ValueError: в книге нет ни одного известного листа
+        """
+        found = {}
+        names = {str(name).strip().lower(): name for name in sheets}
+        for loader, aliases in SHEETS.items():
+            for alias in aliases:
+                if alias in names:
+                    found[loader] = sheets[names[alias]]
+                    break
+        if not found:
+            expected = ', '.join(aliases[0].capitalize() for aliases in SHEETS.values())
+            raise ValueError(f"Workbook has no known sheets, expected: {expected}")
+        return found
+
+    @staticmethod
+    def load(file, update_salary_history=True, dry_run=False):
+        """
+        Загрузить книгу
+
+        Args:
+            file: путь, файловый объект или уже прочитанные листы {имя: DataFrame}
+            update_salary_history: создавать записи истории при изменении оклада и премий
+            dry_run: только проверить книгу, ничего не записывая
+
+        Returns:
+            dict: created/updated/rejected и errors по каждому загруженному листу
+            (с dry_run - сколько было бы создано и обновлено, и dry_run=True)
+        """
+        metrics = ImportMetrics('workbook')
+        try:
+            with metrics.stage('read'):
+                sheets = WorkbookLoaderService.find_sheets(DataLoaderService.read_file(file, sheets=True))
+
+            result = {}
+            with transaction.atomic():
+                org = OrgIndex()
+                if 'departments' in sheets:
+                    result['departments'] = WorkbookLoaderService._load_departments(
+                        sheets['departments'], org, metrics, dry_run
+                    )
+                if 'divisions' in sheets:
+                    result['divisions'] = WorkbookLoaderService._load_divisions(
+                        sheets['divisions'], org, metrics, dry_run
+                    )
+                if 'groups' in sheets:
+                    result['groups'] = WorkbookLoaderService._load_groups(sheets['groups'], org, metrics, dry_run)
+                if 'employees' in sheets:
+                    result['employees'] = WorkbookLoaderService._load_employees(
+                        sheets['employees'], org, metrics, update_salary_history, dry_run
+                    )
+
+            if dry_run:
+                return {**result, 'dry_run': True}
+            for counts in result.values():
+                metrics.rows('created', counts['created'])
+                metrics.rows('updated', counts['updated'])
+                metrics.rows('rejected', counts['rejected'])
+            return result
+        except Exception as e:
+            logger.error(f"Error loading workbook: {str(e)}")
+            raise
+        finally:
+            # Проверки без записи не учитываются в метриках загрузок
+            if not dry_run:
+                metrics.finish()
+
+    @staticmethod
+    def validate_sheet(loader, df, update_salary_history=True):
+        """
+        Проверка файла загрузчика DataLoaderService без записи (dry_run)
+
+        Проверки - как при загрузке книги, но по правилам загрузки отдельным файлом:
+        для сотрудников неизвестные департамент, отдел, группа и руководитель, руководитель
+        ниже в файле и повтор логина - предупреждения (загрузчик их пропускает), а не ошибки.
+
+        Returns:
+            dict: created/updated/rejected, errors (и warnings для сотрудников), dry_run=True
+        """
+        org = OrgIndex()
+        # Время этапов проверки не записывается в метрики (finish не вызывается)
+        metrics = ImportMetrics(loader)
+        if loader == 'employees':
+            counts = WorkbookLoaderService._load_employees(
+                df, org, metrics, update_salary_history, dry_run=True, strict=False
+            )
+        else:
+            load = {
+                'departments': WorkbookLoaderService._load_departments,
+                'divisions': WorkbookLoaderService._load_divisions,
+                'groups': WorkbookLoaderService._load_groups,
+            }[loader]
+            counts = load(df, org, metrics, dry_run=True)
+        return {**counts, 'dry_run': True}
+
+    @staticmethod
+    def _create(model, objects, org, metrics, dry_run):
+        """bulk_create узлов уровня; с dry_run - только временные ID"""
+        if dry_run:
+            for obj in objects:
+                obj.pk = org.virtual_id()
+            return objects
+        with metrics.stage('write'):
+            return model.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+
+    @staticmethod
+    def _rows(df, columns):
+        """
+        Значения колонок листа построчно
+
+        Yields:
+            tuple (номер строки в файле с учетом заголовка, {поле: значение})
+        """
+        fields = list(columns)
+        values = []
+        for field in fields:
+            header = next((name for name in columns[field] if name in df.columns), None)
+            values.append(df[header].tolist() if header is not None else [None] * len(df))
+        for number, row in enumerate(zip(*values), start=2):
+            yield number, dict(zip(fields, row))
+
+    @staticmethod
+    def _load_departments(df, org, metrics, dry_run=False):
+        counts = {'created': 0, 'updated': 0, 'rejected': 0, 'errors': []}
+        new_names = []
+        with metrics.stage('normalize'):
+            for number, row in WorkbookLoaderService._rows(df, DEPARTMENT_COLUMNS):
+                name = DataLoaderService.parse_text(row['name'])
+                if not name:
+                    counts['rejected'] += 1
+                elif name in org.departments or name in new_names:
+                    counts['updated'] += 1
+                else:
+                    new_names.append(name)
+
+        created = WorkbookLoaderService._create(
+            Department, [Department(name=name) for name in new_names], org, metrics, dry_run
+        )
+        for department in created:
+            org.add_department(department.pk, department.name)
+        counts['created'] = len(created)
+        return counts
+
+    @staticmethod
+    def _load_divisions(df, org, metrics, dry_run=False):
+        counts = {'created': 0, 'updated': 0, 'rejected': 0, 'errors': []}
+        new_keys = {}
+        with metrics.stage('normalize'):
+            for number, row in WorkbookLoaderService._rows(df, DIVISION_COLUMNS):
+                department_name = DataLoaderService.parse_text(row['department'])
+                name = DataLoaderService.parse_text(row['name'])
+                if not department_name or not name:
+                    counts['rejected'] += 1
+                    continue
+                try:
+                    department_id = org.find_department(department_name)
+                except UnknownName as e:
+                    counts['rejected'] += 1
+                    counts['errors'].append(f"Row {number}: {e}")
+                    continue
+                key = (department_id, name)
+                if key in org.divisions or key in new_keys:
+                    counts['updated'] += 1
+                else:
+                    new_keys[key] = Division(department_id=department_id, name=name)
+
+        created = WorkbookLoaderService._create(Division, list(new_keys.values()), org, metrics, dry_run)
+        for division in created:
+            org.add_division(division.pk, division.name, division.department_id)
+        counts['created'] = len(created)
+        return counts
+
+    @staticmethod
+    def _load_groups(df, org, metrics, dry_run=False):
+        counts = {'created': 0, 'updated': 0, 'rejected': 0, 'errors': []}
+        new_keys = {}
+        with metrics.stage('normalize'):
+            for number, row in WorkbookLoaderService._rows(df, GROUP_COLUMNS):
+                division_name = DataLoaderService.parse_text(row['division'])
+                name = DataLoaderService.parse_text(row['name'])
+                if not division_name or not name:
+                    counts['rejected'] += 1
+                    continue
+                try:
+                    division_id = org.find_division(division_name)
+                except ValueError as e:
+                    counts['rejected'] += 1
+                    counts['errors'].append(f"Row {number}: {e}")
+                    continue
+                key = (division_id, name)
+                if key in org.groups or key in new_keys:
+                    counts['updated'] += 1
+                else:
+                    new_keys[key] = Group(division_id=division_id, name=name)
+
+        created = WorkbookLoaderService._create(Group, list(new_keys.values()), org, metrics, dry_run)
+        for group in created:
+            org.add_group(group.pk, group.name, group.division_id)
+        counts['created'] = len(created)
+        return counts
+
+    @staticmethod
+    def _normalize_employee(row):
+        """Значения строки сотрудника; логины руководителей - пустая строка, если не указаны"""
+        return {
+            'login': DataLoaderService.parse_text(row['login']),
+            'full_name': DataLoaderService.parse_text(row['full_name']),
+            'position': DataLoaderService.parse_text(row['position']) or None,
+            'hire_date': DataLoaderService.parse_date(row['hire_date']) or timezone.now().date(),
+            'department': DataLoaderService.parse_text(row['department']),
+            'division': DataLoaderService.parse_text(row['division']),
+            'group': DataLoaderService.parse_text(row['group']),
+            'functional_manager': DataLoaderService.parse_text(row['functional_manager']),
+            'line_manager': DataLoaderService.parse_text(row['line_manager']),
+            **{field: DataLoaderService.parse_decimal(row[field]) for field in FINANCE_FIELDS},
+        }
+
+    @staticmethod
+    def _resolve_employee_org(values, employee, org, strict=True):
+        """
+        Узел оргструктуры сотрудника: указанные в строке узлы поверх текущих
+
+        strict=False - правила load_employees_from_file: неизвестный узел не меняется
+        (предупреждение), отдел и группа ищутся только по названию.
+
+        Returns:
+            tuple (узел - как OrgIndex.resolve, список предупреждений)
+        """
+        warnings = []
+        department_id = division_id = group_id = None
+        try:
+            if values['department']:
+                department_id = org.find_department(values['department'])
+        except UnknownName as e:
+            if strict:
+                raise
+            warnings.append(f"{e}, не изменяется")
+        try:
+            if values['division']:
+                division_id = org.find_division(values['division'], department_id if strict else None)
+        except UnknownName as e:
+            if strict:
+                raise
+            warnings.append(f"{e}, не изменяется")
+        try:
+            if values['group']:
+                group_id = org.find_group(values['group'], division_id if strict else None)
+        except UnknownName as e:
+            if strict:
+                raise
+            warnings.append(f"{e}, не изменяется")
+
+        if employee is not None:
+            department_id = department_id or employee.department_id
+            division_id = division_id or employee.division_id
+            group_id = group_id or employee.group_id
+        return org.resolve(department_id, division_id, group_id), warnings
+
+    @staticmethod
+    def _load_employees(df, org, metrics, update_salary_history, dry_run=False, strict=True):
+        """
+        Сотрудники листа
+
+        Args:
+            dry_run: только проверить, ничего не записывая
+            strict: правила книги; False - правила load_employees_from_file (см. validate_sheet)
+        """
+        counts = {'created': 0, 'updated': 0, 'rejected': 0, 'errors': [], 'warnings': []}
+        # (номер строки, текст): проверки идут в несколько проходов, в ответе - по порядку строк
+        errors = []
+        warnings = []
+        rows = []
+        seen = {}
+        with metrics.stage('normalize'):
+            for number, row in WorkbookLoaderService._rows(df, EMPLOYEE_COLUMNS):
+                try:
+                    values = WorkbookLoaderService._normalize_employee(row)
+                except Exception as e:
+                    errors.append((number, str(e)))
+                    continue
+                if not values['login']:
+                    errors.append((number, "Missing login"))
+                    continue
+                if values['login'] in seen:
+                    message = f"Duplicate login {values['login']} (row {seen[values['login']]})"
+                    if strict:
+                        errors.append((number, message))
+                    else:
+                        # Загрузчик файла обновит сотрудника этой строкой повторно
+                        warnings.append((number, f"{message}, строка перезапишет предыдущую"))
+                    continue
+                seen[values['login']] = number
+                rows.append((number, values))
+
+        with metrics.stage('write'):
+            existing = WorkbookLoaderService._fetch_employees(list(seen))
+            # Цепочки подчинения всех сотрудников по логинам (новые сотрудники еще без ID)
+            logins = {}
+            chains = {relation: {} for relation in ManagementChainService.RELATIONS}
+            for pk, login, line_manager_id, functional_manager_id in Employee.objects.values_list(
+                'id', 'login', 'line_manager_id', 'functional_manager_id'
+            ):
+                logins[pk] = login
+                chains['line'][login] = line_manager_id
+                chains['functional'][login] = functional_manager_id
+            for chain in chains.values():
+                for login, manager_id in chain.items():
+                    chain[login] = logins.get(manager_id)
+
+        accepted = []
+        with metrics.stage('normalize'):
+            for number, values in rows:
+                employee = existing.get(values['login'])
+                try:
+                    org_unit, org_warnings = WorkbookLoaderService._resolve_employee_org(
+                        values, employee, org, strict
+                    )
+                except ValueError as e:
+                    errors.append((number, str(e)))
+                    continue
+                warnings.extend((number, warning) for warning in org_warnings)
+                accepted.append((number, values, employee, org_unit))
+            file_logins = {values['login'] for _, values, _, _ in accepted}
+            known_logins = set(logins.values())
+            if strict:
+                known_logins |= file_logins
+
+            # Руководители: неизвестные логины пропускаются, как в load_employees_from_file.
+            # Загрузчик файла назначает только руководителей, созданных до этой строки
+            managers = []
+            for number, values, employee, org_unit in accepted:
+                login = values['login']
+                if not strict:
+                    known_logins.add(login)
+                assigned = {}
+                for relation, field_name in ManagementChainService.RELATIONS.items():
+                    manager_login = values[field_name]
+                    if not manager_login:
+                        continue
+                    if manager_login in known_logins:
+                        assigned[relation] = manager_login
+                    elif manager_login in file_logins:
+                        warnings.append((number, f"Руководитель {manager_login} ниже в файле, не назначается"))
+                    else:
+                        warnings.append((number, f"Руководитель {manager_login} не найден, не назначается"))
+                if any(
+                    WorkbookLoaderService._closes_cycle(chains[relation], login, manager_login)
+                    for relation, manager_login in assigned.items()
+                ):
+                    errors.append((number, CYCLE_ERROR))
+                    continue
+                for relation, manager_login in assigned.items():
+                    chains[relation][login] = manager_login
+                managers.append((number, values, employee, org_unit, assigned))
+
+        if dry_run:
+            counts['created'] = sum(1 for _, _, employee, _, _ in managers if employee is None)
+            counts['updated'] = len(managers) - counts['created']
+        else:
+            with metrics.stage('write'):
+                WorkbookLoaderService._save_employees(managers, counts, update_salary_history)
+
+        counts['errors'] = [f"Row {number}: {error}" for number, error in sorted(errors)]
+        counts['warnings'] = [f"Row {number}: {warning}" for number, warning in sorted(warnings)]
+        counts['rejected'] = len(errors)
+        return counts
+
+    @staticmethod
+    def _fetch_employees(logins):
+        """Существующие сотрудники по логинам (пакетами, чтобы не упираться в лимит параметров)"""
+        existing = {}
+        for start in range(0, len(logins), BATCH_SIZE * 5):
+            for employee in Employee.objects.filter(login__in=logins[start:start + BATCH_SIZE * 5]):
+                existing[employee.login] = employee
+        return existing
+
+    @staticmethod
+    def _closes_cycle(chain, login, manager_login):
+        """Есть ли login в цепочке руководителей manager_login (или это он сам)"""
+        visited = set()
+        current = manager_login
+        while current is not None and current not in visited:
+            if current == login:
+                return True
+            visited.add(current)
+            current = chain.get(current)
+        return False
+
+    @staticmethod
+    def _save_employees(rows, counts, update_salary_history):
+        now = timezone.now()
+        today = now.date()
+        new_employees = []
+        updated_employees = []
+        assignments = []
+        history = []
+        for number, values, employee, org_unit, assigned in rows:
+            department_id, division_id, group_id, org_path, org_path_names = org_unit
+            if employee is None:
+                employee = Employee(
+                    login=values['login'],
+                    full_name=values['full_name'],
+                    position=values['position'],
+                    hire_date=values['hire_date'],
+                )
+                new_employees.append(employee)
+            else:
+                updated_employees.append(employee)
+            old_finances = [getattr(employee, field) or Decimal('0.00') for field in FINANCE_FIELDS]
+
+            employee.department_id = department_id
+            employee.division_id = division_id
+            employee.group_id = group_id
+            employee.org_path = org_path
+            employee.org_path_names = org_path_names
+            for field in FINANCE_FIELDS:
+                setattr(employee, field, values[field])
+            employee.updated_at = now
+            if assigned:
+                assignments.append((employee, assigned))
+
+            new_finances = [values[field] for field in FINANCE_FIELDS]
+            if update_salary_history and old_finances != new_finances:
+                history.append((employee, old_finances, new_finances))
+
+        Employee.objects.bulk_create(new_employees, batch_size=BATCH_SIZE)
+
+        # ID руководителей (и новых сотрудников, если СУБД не вернула ID из bulk_create)
+        needed = {login for _, assigned in assignments for login in assigned.values()}
+        needed.update(employee.login for employee in new_employees if employee.pk is None)
+        ids = {}
+        needed = list(needed)
+        for start in range(0, len(needed), BATCH_SIZE * 5):
+            ids.update(
+                Employee.objects.filter(login__in=needed[start:start + BATCH_SIZE * 5]).values_list('login', 'id')
+            )
+        for employee in new_employees:
+            if employee.pk is None:
+                employee.pk = ids[employee.login]
+        for employee, assigned in assignments:
+            for relation, manager_login in assigned.items():
+                # Новый руководитель, отклоненный проверкой цикла, пропускается как неизвестный логин
+                if manager_login in ids:
+                    setattr(employee, f'{ManagementChainService.RELATIONS[relation]}_id', ids[manager_login])
+
+        manager_fields = list(ManagementChainService.RELATIONS.values())
+        new_with_managers = set(id(employee) for employee, _ in assignments)
+        Employee.objects.bulk_update(
+            [employee for employee in new_employees if id(employee) in new_with_managers],
+            manager_fields, batch_size=BATCH_SIZE
+        )
+        Employee.objects.bulk_update(
+            updated_employees,
+            ['department', 'division', 'group', 'org_path', 'org_path_names',
+             *manager_fields, *FINANCE_FIELDS, 'updated_at'],
+            batch_size=BATCH_SIZE
+        )
+
+        entries = []
+        for employee, before, after in history:
+            entry = SalaryHistory(employee=employee, change_date=today, comment="Загружено из файла")
+            for field, old_value, new_value in zip(HISTORY_FIELDS, before, after):
+                setattr(entry, f'{field}_before', old_value)
+                setattr(entry, f'{field}_after', new_value)
+            entry.calculate_diffs()
+            entries.append(entry)
+        SalaryHistory.objects.bulk_create(entries, batch_size=BATCH_SIZE)
+
+        counts['created'] = len(new_employees)
+        counts['updated'] = len(updated_employees)
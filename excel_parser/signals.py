@@ -0,0 +1,96 @@
+"""
+Signals for keeping Employee.org_path consistent with the org hierarchy
+"""
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from .models import Department, Division, Group, Employee, resolve_org_unit
+
+# Поля узла, от которых зависят пути сотрудников
+ORG_PATH_FIELDS = {
+    Department: ('name',),
+    Division: ('name', 'department_id'),
+    Group: ('name', 'division_id'),
+}
+
+
+@receiver(pre_save, sender=Department)
+@receiver(pre_save, sender=Division)
+@receiver(pre_save, sender=Group)
+def org_unit_saving(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Сравнить название и родителя узла с сохраненными: пути пересчитываются, только если они изменились"""
+    instance._org_path_changed = False
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    fields = ORG_PATH_FIELDS[sender]
+    if update_fields is not None and not {
+        name for field in fields for name in (field, field.removesuffix('_id'))
+    } & set(update_fields):
+        return
+    previous = sender.objects.filter(pk=instance.pk).values_list(*fields).first()
+    instance._org_path_changed = previous != tuple(getattr(instance, field) for field in fields)
+
+
+def org_path_changed(instance, created):
+    """Нужно ли пересчитать пути сотрудников после сохранения узла"""
+    return not created and getattr(instance, '_org_path_changed', True)
+
+
+@receiver(post_save, sender=Department)
+def department_saved(sender, instance, created, **kwargs):
+    """Переименование департамента: обновить названия в путях сотрудников"""
+    if org_path_changed(instance, created):
+        Employee.objects.filter(department=instance).refresh_org_paths()
+
+
+@receiver(post_save, sender=Division)
+def division_saved(sender, instance, created, **kwargs):
+    """Переименование или перенос отдела в другой департамент"""
+    if not org_path_changed(instance, created):
+        return
+    Employee.objects.filter(division=instance).exclude(
+        department_id=instance.department_id
+    ).update(department_id=instance.department_id)
+    Employee.objects.filter(division=instance).refresh_org_paths()
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    """Переименование или перенос группы в другой отдел"""
+    if not org_path_changed(instance, created):
+        return
+    division = Division.objects.only('department_id').get(pk=instance.division_id)
+    Employee.objects.filter(group=instance).exclude(
+        division_id=instance.division_id,
+        department_id=division.department_id
+    ).update(division_id=instance.division_id, department_id=division.department_id)
+    Employee.objects.filter(group=instance).refresh_org_paths()
+
+
+@receiver(pre_delete, sender=Department)
+@receiver(pre_delete, sender=Division)
+@receiver(pre_delete, sender=Group)
+def org_unit_deleting(sender, instance, **kwargs):
+    """Запомнить префикс пути удаляемого узла (после удаления родителей уже не найти)"""
+    ids = {
+        Department: {'department_id': instance.pk},
+        Division: {'division_id': instance.pk},
+        Group: {'group_id': instance.pk},
+    }[sender]
+    instance._org_path_prefix = resolve_org_unit(**ids)['org_path']
+
+
+@receiver(post_delete, sender=Department)
+@receiver(post_delete, sender=Division)
+@receiver(post_delete, sender=Group)
+def org_unit_deleted(sender, instance, **kwargs):
+    """FK сотрудников обнулены (SET_NULL) - пересчитать их пути"""
+    prefix = getattr(instance, '_org_path_prefix', '')
+    if prefix:
+        Employee.objects.filter(org_path__startswith=prefix).refresh_org_paths()
+
+
+def backfill_org_paths(sender, using='default', **kwargs):
+    """Заполнить org_path у сотрудников, сохраненных до появления поля (post_migrate)"""
+    Employee.objects.using(using).filter(org_path='').exclude(
+        department=None, division=None, group=None
+    ).refresh_org_paths()
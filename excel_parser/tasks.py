@@ -0,0 +1,29 @@
+"""
+Задачи Celery
+"""
+from celery import shared_task
+
+
+@shared_task(ignore_result=True)
+def process_jira_outbox(max_batches=None):
+    """Обработать очередь создания задач Jira"""
+    # Импорт внутри задачи: сервис подключает модели, а задачи регистрируются до загрузки приложений
+    from .services.jira_outbox import JiraOutboxService
+    return JiraOutboxService.process_pending(max_batches=max_batches)
+
+
+@shared_task(ignore_result=True)
+def import_upload(session_id, force=False):
+    """Загрузить файл, полученный частями (UPLOAD_IMPORT_ASYNC)"""
+    from .models import UploadSession
+    from .services.chunked_upload import ChunkedUploadService
+    session = UploadSession.objects.filter(pk=session_id, status=UploadSession.STATUS_IMPORTING).first()
+    if session is not None:
+        ChunkedUploadService.run_import(session, force=force)
+
+
+@shared_task(ignore_result=True)
+def cleanup_uploads():
+    """Удалить брошенные загрузки частями"""
+    from .services.chunked_upload import ChunkedUploadService
+    return ChunkedUploadService.cleanup()
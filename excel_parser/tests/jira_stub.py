@@ -0,0 +1,150 @@
+"""
+Jira API на локальном порту для тестов JiraService
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import itertools
+import json
+import threading
+
+from django.test import TestCase, override_settings
+
+from excel_parser.models import ExcelColumnMapping, ExcelFile
+from excel_parser.services import jira_resilience
+from excel_parser.services.jira_service import JiraService
+
+
+class JiraStub:
+    """
+    Отвечает на /rest/api/3/issue, /issue/bulk и /search/jql
+
+    responses - очередь (статус, заголовки), которыми отвечают следующие запросы
+    вместо обычного ответа (429, 5xx). Задача с заголовком, начинающимся с FAIL,
+    не создается: элемент попадает в errors bulk-ответа.
+    """
+
+    def __init__(self):
+        self.issues = {}
+        self.requests = []
+        self.connections = set()
+        self.responses = []
+        self.lock = threading.Lock()
+        self._numbers = itertools.count(1)
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def reset(self):
+        with self.lock:
+            self.issues.clear()
+            self.requests.clear()
+            self.connections.clear()
+            self.responses.clear()
+
+    def _create(self, fields):
+        key = f'PROJ-{next(self._numbers)}'
+        self.issues[key] = fields
+        return {'id': key.split('-')[1], 'key': key}
+
+    def handle(self, path, body):
+        """(статус, тело, заголовки) ответа на POST"""
+        with self.lock:
+            self.requests.append((path, body))
+            if self.responses:
+                status, headers = self.responses.pop(0)
+                return status, {'errorMessages': ['stub error']}, headers
+            if path.endswith('/issue/bulk'):
+                issues, errors = [], []
+                for index, update in enumerate(body['issueUpdates']):
+                    if update['fields']['summary'].startswith('FAIL'):
+                        errors.append({
+                            'status': 400,
+                            'failedElementNumber': index,
+                            'elementErrors': {'errors': {'summary': 'invalid'}},
+                        })
+                    else:
+                        issues.append(self._create(update['fields']))
+                return (201 if issues else 400), {'issues': issues, 'errors': errors}, {}
+            if path.endswith('/issue'):
+                return 201, self._create(body['fields']), {}
+            if path.endswith('/search/jql'):
+                found = [
+                    {'key': key, 'fields': {'labels': fields.get('labels', [])}}
+                    for key, fields in self.issues.items()
+                    if any(f'"{label}"' in body['jql'] for label in fields.get('labels', []))
+                ]
+                return 200, {'issues': found}, {}
+            return 404, {}, {}
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                with stub.lock:
+                    stub.connections.add(self.client_address)
+                status, data, headers = stub.handle(self.path, body)
+                content = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(content)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(content)
+
+        return Handler
+
+
+JIRA_SETTINGS = {
+    'JIRA_EMAIL': 'bot@example.com',
+    'JIRA_API_TOKEN': 'token',
+    'JIRA_BULK_CHUNK_SIZE': 2,
+    'JIRA_MAX_WORKERS': 2,
+    'JIRA_RATE_LIMIT': 1000,
+    'JIRA_RATE_BURST': 100,
+    'JIRA_MAX_RETRIES': 2,
+    'JIRA_BACKOFF_BASE': 0.01,
+    'JIRA_BACKOFF_MAX': 0.05,
+    'JIRA_CIRCUIT_FAILURE_THRESHOLD': 3,
+    'JIRA_CIRCUIT_RESET_TIMEOUT': 60,
+}
+
+
+class JiraStubTestCase(TestCase):
+    """Заглушка Jira на время класса, свежие rate limiter и circuit breaker на каждый тест"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.stub = JiraStub().start()
+        cls.addClassCleanup(cls.stub.stop)
+        cls.settings_override = override_settings(JIRA_URL=cls.stub.url, **JIRA_SETTINGS)
+        cls.settings_override.enable()
+        cls.addClassCleanup(cls.settings_override.disable)
+
+    def setUp(self):
+        self.stub.reset()
+        jira_resilience._limiters.clear()
+        jira_resilience._breakers.clear()
+        self.service = JiraService()
+        self.addCleanup(self.service.close)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.excel_file = ExcelFile.objects.create(file_name='tasks.xlsx', file_path='excel_files/tasks.xlsx')
+        ExcelColumnMapping.objects.create(
+            excel_file=cls.excel_file, excel_column='Название', db_field='название', order=0
+        )
@@ -0,0 +1,110 @@
+"""
+Загрузка файлов частями (/api/uploads/)
+"""
+import hashlib
+import io
+import tempfile
+
+import openpyxl
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from excel_parser.models import UploadSession
+from excel_parser.services.chunked_upload import ChunkedUploadService
+
+
+def departments_file():
+    workbook = openpyxl.Workbook()
+    workbook.active.append(['Название'])
+    for number in range(1, 41):
+        workbook.active.append([f'Департамент {number}'])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+class ChunkedUploadTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(
+            UPLOAD_TEMP_DIR=directory.name, UPLOAD_IMPORT_ASYNC=False, IMPORT_CACHE_ENABLED=False
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.content = departments_file()
+
+    def start(self, checksum=None):
+        response = self.client.post(reverse('upload-list'), {
+            'loader': 'departments',
+            'file_name': 'departments.xlsx',
+            'size': len(self.content),
+            'sha256': checksum or hashlib.sha256(self.content).hexdigest(),
+        }, content_type='application/json', HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 201)
+        return response.json()['id']
+
+    def put(self, upload_id, start, end, total=None, **extra):
+        return self.client.put(
+            reverse('upload-detail', args=[upload_id]), self.content[start:end + 1],
+            content_type='application/octet-stream', HTTP_ACCEPT='application/json',
+            HTTP_CONTENT_RANGE=f'bytes {start}-{end}/{len(self.content) if total is None else total}', **extra
+        )
+
+    def test_invalid_content_length(self):
+        upload_id = self.start()
+        response = self.put(upload_id, 0, 99, CONTENT_LENGTH='abc')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['offset'], 0)
+
+    def test_upload_in_chunks_and_import(self):
+        upload_id = self.start()
+        size = len(self.content)
+        middle = size // 2
+        self.assertEqual(self.put(upload_id, 0, middle - 1).json(), {'offset': middle, 'complete': False})
+        self.assertEqual(self.put(upload_id, middle, size - 1).json(), {'offset': size, 'complete': True})
+
+        response = self.client.post(reverse('upload-complete', args=[upload_id]), HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], UploadSession.STATUS_DONE)
+        self.assertEqual(response.json()['result']['created'], 40)
+
+    def test_offset_mismatch_returns_409(self):
+        upload_id = self.start()
+        self.put(upload_id, 0, 99)
+        # Повтор уже принятой части и пропуск части
+        for start, end in ((0, 99), (200, 299)):
+            response = self.put(upload_id, start, end)
+            self.assertEqual(response.status_code, 409)
+            self.assertEqual(response.json()['offset'], 100)
+
+    def test_wrong_total_returns_400(self):
+        upload_id = self.start()
+        response = self.put(upload_id, 0, 99, total=len(self.content) + 1)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(UploadSession.objects.get(pk=upload_id).received, 0)
+
+    def test_checksum_mismatch_fails_on_complete(self):
+        upload_id = self.start(checksum='0' * 64)
+        self.put(upload_id, 0, len(self.content) - 1)
+
+        response = self.client.post(reverse('upload-complete', args=[upload_id]), HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['status'], UploadSession.STATUS_FAILED)
+        self.assertIn('Checksum mismatch', response.json()['error'])
+
+    def test_resume_from_retrieved_offset(self):
+        upload_id = self.start()
+        self.put(upload_id, 0, 99)
+        # Обрыв соединения: часть получена не полностью, смещение не сдвигается
+        with self.assertRaises(ValueError):
+            ChunkedUploadService.write_chunk(
+                UploadSession.objects.get(pk=upload_id), 100, 100, io.BytesIO(self.content[100:150])
+            )
+
+        response = self.client.get(reverse('upload-detail', args=[upload_id]), HTTP_ACCEPT='application/json')
+        offset = response.json()['offset']
+        self.assertEqual(offset, 100)
+        self.assertEqual(self.put(upload_id, offset, len(self.content) - 1).json()['complete'], True)
+        response = self.client.post(reverse('upload-complete', args=[upload_id]), HTTP_ACCEPT='application/json')
+        self.assertEqual(response.json()['status'], UploadSession.STATUS_DONE)
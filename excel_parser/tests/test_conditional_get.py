@@ -0,0 +1,48 @@
+"""
+Версия данных (ETag) считается только для условных GET API
+"""
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from excel_parser.models import Department
+from excel_parser.services import DataVersionService
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        Department.objects.create(name='Продажи')
+        self.get_state = mock.patch.object(
+            DataVersionService, 'get_state', side_effect=DataVersionService.get_state
+        ).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def test_api_get_returns_304(self):
+        url = reverse('department-list')
+        response = self.client.get(url, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        response = self.client.get(url, HTTP_ACCEPT='application/json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_browsable_api_skips_data_version(self):
+        response = self.client.get(reverse('department-list'), HTTP_ACCEPT='text/html')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+        self.get_state.assert_not_called()
+
+    def test_html_pages_use_cached_version(self):
+        for _ in range(3):
+            self.assertEqual(self.client.get(reverse('employees_list')).status_code, 200)
+        self.assertEqual(self.get_state.call_count, 1)
+
+    @override_settings(DATA_VERSION_CACHE_SECONDS=0)
+    def test_cached_version_disabled(self):
+        self.client.get(reverse('analytics'))
+        self.client.get(reverse('analytics'))
+        self.assertEqual(self.get_state.call_count, 2)
@@ -0,0 +1,97 @@
+"""
+ReplicaRouter с двумя репликами (соединения подменены, запросы к БД не выполняются)
+"""
+from unittest import mock
+
+from django.db import DEFAULT_DB_ALIAS
+from django.db.utils import OperationalError
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from excel_parser import db_routing
+from excel_parser.db_routing import ReplicaRouter, ReplicaRoutingMiddleware, reset_state, use_replicas
+from excel_parser.models import Employee
+
+REPLICAS = ['replica_1', 'replica_2']
+
+
+@override_settings(REPLICA_DATABASES=REPLICAS, REPLICA_RETRY_SECONDS=30)
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.connections = {alias: mock.Mock() for alias in REPLICAS}
+        patches = [
+            mock.patch.object(db_routing, 'connections', self.connections),
+            mock.patch.object(db_routing, '_unavailable_until', {}),
+            # Реплики перебираются по порядку
+            mock.patch.object(db_routing.random, 'shuffle', lambda items: None),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        reset_state()
+        self.addCleanup(reset_state)
+
+    def checks(self, alias):
+        return self.connections[alias].ensure_connection.call_count
+
+    def test_primary_outside_use_replicas(self):
+        self.assertEqual(self.router.db_for_read(Employee), DEFAULT_DB_ALIAS)
+        self.assertEqual(self.checks('replica_1'), 0)
+
+    def test_replica_is_chosen_once(self):
+        with use_replicas():
+            aliases = {self.router.db_for_read(Employee) for _ in range(10)}
+            self.assertEqual(Employee.objects.all().db, 'replica_1')
+        self.assertEqual(aliases, {'replica_1'})
+        self.assertEqual(self.checks('replica_1'), 1)
+        self.assertEqual(self.checks('replica_2'), 0)
+
+    def test_sticky_after_write(self):
+        with use_replicas():
+            self.assertEqual(self.router.db_for_read(Employee), 'replica_1')
+            self.assertEqual(self.router.db_for_write(Employee), DEFAULT_DB_ALIAS)
+            self.assertEqual(self.router.db_for_read(Employee), DEFAULT_DB_ALIAS)
+
+    def test_unavailable_replica_is_skipped(self):
+        self.connections['replica_1'].ensure_connection.side_effect = OperationalError('down')
+        with use_replicas():
+            self.assertEqual(self.router.db_for_read(Employee), 'replica_2')
+        # Следующий блок не проверяет упавшую реплику до истечения REPLICA_RETRY_SECONDS
+        with use_replicas():
+            self.assertEqual(self.router.db_for_read(Employee), 'replica_2')
+        self.assertEqual(self.checks('replica_1'), 1)
+        self.assertEqual(self.checks('replica_2'), 2)
+
+    def test_primary_when_no_replica_is_available(self):
+        for connection in self.connections.values():
+            connection.ensure_connection.side_effect = OperationalError('down')
+        with use_replicas():
+            self.assertEqual(self.router.db_for_read(Employee), DEFAULT_DB_ALIAS)
+            self.assertEqual(self.router.db_for_read(Employee), DEFAULT_DB_ALIAS)
+        self.assertEqual(self.checks('replica_1'), 1)
+
+    def test_middleware_chooses_replica_per_request(self):
+        seen = []
+
+        def view(request):
+            with use_replicas():
+                seen.append(self.router.db_for_read(Employee))
+                if request.method == 'POST':
+                    self.router.db_for_write(Employee)
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(view)
+        factory = RequestFactory()
+        middleware(factory.post('/'))
+        middleware(factory.get('/'))
+        middleware(factory.get('/'))
+
+        # Запись первого запроса не делает следующие запросы sticky
+        self.assertEqual(seen, ['replica_1'] * 3)
+        self.assertEqual(self.checks('replica_1'), 3)
+
+    def test_migrations_only_on_primary(self):
+        self.assertTrue(self.router.allow_migrate(DEFAULT_DB_ALIAS, 'excel_parser'))
+        for alias in REPLICAS:
+            self.assertFalse(self.router.allow_migrate(alias, 'excel_parser'))
@@ -0,0 +1,59 @@
+"""
+Загрузка сотрудников: строка с ошибкой проверки не оставляет сотрудника
+"""
+import os
+import tempfile
+from datetime import date
+from decimal import Decimal
+
+import openpyxl
+from django.test import TestCase, override_settings
+
+from excel_parser.models import Department, Division, Employee, SalaryHistory
+from excel_parser.services import DataLoaderService
+
+HEADERS = ['Логин', 'ФИО', 'Дата принятия', 'Департамент', 'Отдел', 'Линейный руководитель', 'Оклад']
+
+
+@override_settings(IMPORT_CACHE_ENABLED=False)
+class EmployeeLoaderTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.it = Department.objects.create(name='ИТ')
+        cls.hr = Department.objects.create(name='Кадры')
+        Division.objects.create(department=cls.it, name='Разработка')
+
+    def load(self, *rows):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        workbook = openpyxl.Workbook()
+        workbook.active.append(HEADERS)
+        for row in rows:
+            workbook.active.append(row)
+        path = os.path.join(directory.name, 'employees.xlsx')
+        workbook.save(path)
+        return DataLoaderService.load_employees_from_file(path)
+
+    def test_invalid_rows_leave_no_employee(self):
+        result = self.load(
+            ['ivanov', 'Иванов Иван', '2020-01-01', 'ИТ', 'Разработка', '', 100000],
+            # Отдел не входит в департамент
+            ['petrov', 'Петров Петр', '2020-01-01', 'Кадры', 'Разработка', '', 90000],
+            # Сотрудник - сам себе руководитель
+            ['sidorov', 'Сидоров Сидор', '2020-01-01', 'ИТ', '', 'sidorov', 80000],
+        )
+        self.assertEqual(result['created'], 1)
+        self.assertEqual([error.split(':')[0] for error in result['errors']], ['Row 3', 'Row 4'])
+        self.assertEqual(list(Employee.objects.values_list('login', flat=True)), ['ivanov'])
+
+    def test_invalid_update_keeps_employee(self):
+        employee = Employee.objects.create(
+            login='ivanov', full_name='Иванов Иван', hire_date=date(2020, 1, 1),
+            department=self.it, current_salary=Decimal('100000')
+        )
+        result = self.load(['ivanov', 'Иванов Иван', '2020-01-01', 'ИТ', '', 'ivanov', 120000])
+        self.assertEqual(len(result['errors']), 1)
+        employee.refresh_from_db()
+        self.assertEqual(employee.current_salary, Decimal('100000'))
+        self.assertIsNone(employee.line_manager_id)
+        self.assertFalse(SalaryHistory.objects.exists())
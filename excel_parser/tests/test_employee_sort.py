@@ -0,0 +1,61 @@
+"""
+Сортировка списка сотрудников: в order_by попадают только поля из EMPLOYEE_SORTS
+"""
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.db.models import QuerySet
+from django.test import TestCase
+from django.urls import reverse
+
+from excel_parser.models import Employee
+from excel_parser.views import EMPLOYEE_DEFAULT_SORT, EMPLOYEE_SORTS, resolve_employee_sort
+
+
+class ResolveEmployeeSortTests(TestCase):
+    def test_known_key_and_descending(self):
+        self.assertEqual(resolve_employee_sort('salary'), ('salary', ('current_salary', 'id')))
+        self.assertEqual(resolve_employee_sort('-salary'), ('-salary', ('-current_salary', '-id')))
+
+    def test_unknown_key_falls_back_to_default(self):
+        default = (EMPLOYEE_DEFAULT_SORT, EMPLOYEE_SORTS[EMPLOYEE_DEFAULT_SORT])
+        for sort_key in ('', '-', 'password', '-password', 'current_salary', 'department__name', '--name'):
+            self.assertEqual(resolve_employee_sort(sort_key), default, sort_key)
+
+
+class EmployeesListSortTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.low = Employee.objects.create(
+            full_name='Борисов Борис', login='borisov', hire_date=date(2020, 1, 1),
+            current_salary=Decimal('100000'),
+        )
+        cls.high = Employee.objects.create(
+            full_name='Алексеев Алексей', login='alekseev', hire_date=date(2021, 1, 1),
+            current_salary=Decimal('200000'),
+        )
+
+    def get(self, sort):
+        order_by = QuerySet.order_by
+        with mock.patch.object(QuerySet, 'order_by', autospec=True, side_effect=order_by) as patched:
+            response = self.client.get(reverse('employees_list'), {'sort': sort})
+        self.assertEqual(response.status_code, 200)
+        fields = [field for call in patched.call_args_list for field in call.args[1:]]
+        return response, fields
+
+    def test_unknown_sort_is_not_passed_to_order_by(self):
+        response, fields = self.get('login')
+        self.assertEqual(response.context['sort'], EMPLOYEE_DEFAULT_SORT)
+        self.assertNotIn('login', fields)
+        self.assertNotIn('-login', fields)
+        self.assertEqual(list(response.context['page_obj']), [self.high, self.low])
+
+    def test_descending_sort(self):
+        response, fields = self.get('-salary')
+        self.assertEqual(response.context['sort'], '-salary')
+        self.assertIn('-current_salary', fields)
+        self.assertEqual(list(response.context['page_obj']), [self.high, self.low])
+
+        response, _ = self.get('salary')
+        self.assertEqual(list(response.context['page_obj']), [self.low, self.high])
@@ -0,0 +1,55 @@
+"""
+Файлы generate_upload_files загружаются эндпоинтами импорта
+"""
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from excel_parser.models import Department, Employee
+from excel_parser.services import DataLoaderService
+
+# Виды ошибок, с которыми загрузчик отклоняет строку (см. ERROR_KINDS команды)
+REJECTED_KINDS = {'missing_login', 'org_mismatch', 'self_manager'}
+
+
+@override_settings(IMPORT_CACHE_ENABLED=False)
+class GenerateUploadFilesTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.output_dir = directory.name
+
+    def generate(self, **options):
+        call_command(
+            'generate_upload_files', rows=300, seed=7, error_rate=0.1,
+            output_dir=self.output_dir, stdout=StringIO(), **options
+        )
+        with open(os.path.join(self.output_dir, 'manifest.json'), encoding='utf-8') as f:
+            return json.load(f)
+
+    def test_files_load_with_expected_errors(self):
+        manifest = self.generate()
+        results = {
+            loader: DataLoaderService.import_file(loader, manifest['files'][loader]['path'])
+            for loader in ('departments', 'divisions', 'groups', 'employees')
+        }
+
+        for loader in ('departments', 'divisions', 'groups'):
+            self.assertEqual(results[loader]['created'], manifest['files'][loader]['rows'])
+        rejected = [error for error in manifest['errors'] if error['kind'] in REJECTED_KINDS]
+        self.assertTrue(rejected)
+        self.assertEqual(len(results['employees']['errors']), len(rejected))
+
+    def test_workbook(self):
+        manifest = self.generate(workbook=True)
+        result = DataLoaderService.import_file('workbook', manifest['files']['workbook']['path'])
+
+        self.assertFalse(result['duplicate'])
+        self.assertEqual(Department.objects.count(), manifest['files']['workbook']['rows']['departments'])
+        self.assertEqual(Employee.objects.count(), 300 - sum(
+            error['kind'] in REJECTED_KINDS for error in manifest['errors']
+        ))
@@ -0,0 +1,80 @@
+"""
+Кэш разобранных файлов загрузки (ImportCacheService)
+"""
+import datetime
+import os
+import tempfile
+import unittest
+
+import openpyxl
+import pandas as pd
+from django.test import SimpleTestCase, override_settings
+
+from excel_parser.services import import_cache
+from excel_parser.services.import_cache import ImportCacheService
+
+
+@unittest.skipUnless(import_cache.PARQUET_AVAILABLE, 'pyarrow is not installed')
+class ImportCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings_override = override_settings(
+            IMPORT_CACHE_ENABLED=True, IMPORT_CACHE_DIR=os.path.join(self.directory, 'cache')
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def write_employees(self):
+        """Файл сотрудников: в 'Дата принятия' даты, строки и пустые ячейки"""
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(['Логин', 'Дата принятия', 'Ставка', 2024, 'Начало смены'])
+        sheet.append(['ivanov', datetime.datetime(2020, 1, 15), 100, 1.5, datetime.time(9, 30)])
+        sheet.append(['petrov', '31.02.2020', 120.5, None, 'нет'])
+        sheet.append(['sidorov', None, None, 2, None])
+        sheet.append(['kuznetsov', '2021-03-01', 90, True, datetime.time(10, 0)])
+        path = os.path.join(self.directory, 'employees.xlsx')
+        workbook.save(path)
+        return path
+
+    def cache_files(self):
+        return sorted(
+            name for _, _, names in os.walk(os.path.join(self.directory, 'cache')) for name in names
+        )
+
+    def test_mixed_types_round_trip_through_parquet(self):
+        path = self.write_employees()
+        expected = pd.read_excel(path, engine='openpyxl')
+        self.assertEqual(expected['Дата принятия'].dtype, object)
+
+        first = ImportCacheService.read_excel(path)
+        files = self.cache_files()
+        self.assertEqual(len(files), 1)
+        self.assertTrue(files[0].endswith(f'-v{import_cache.PARSER_VERSION}.parquet'))
+
+        cached = ImportCacheService.read_excel(path)
+        pd.testing.assert_frame_equal(first, expected)
+        pd.testing.assert_frame_equal(cached, expected)
+        # Загрузчики различают даты и строки: типы значений не меняются
+        for column in expected:
+            if expected[column].dtype == object:
+                self.assertEqual(
+                    [type(value) for value in cached[column]], [type(value) for value in expected[column]]
+                )
+
+    def test_all_sheets_round_trip(self):
+        path = self.write_employees()
+        expected = pd.read_excel(path, sheet_name=None, engine='openpyxl')
+        ImportCacheService.read_excel(path, sheets=True)
+        cached = ImportCacheService.read_excel(path, sheets=True)
+        self.assertEqual(list(cached), list(expected))
+        for name, df in expected.items():
+            pd.testing.assert_frame_equal(cached[name], df)
+
+    def test_unsupported_values_are_not_cached(self):
+        df = pd.DataFrame({'Логин': ['ivanov', object()]})
+        ImportCacheService._store('unsupported', df)
+        self.assertEqual(self.cache_files(), [])
+        self.assertIsNone(ImportCacheService._load('unsupported'))
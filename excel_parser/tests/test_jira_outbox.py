@@ -0,0 +1,87 @@
+"""
+Очередь создания задач Jira (JiraOutbox)
+"""
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from excel_parser.models import ExcelRow, JiraOutbox
+from excel_parser.services.jira_outbox import JiraOutboxService
+
+from .jira_stub import JiraStubTestCase
+
+
+class JiraOutboxTests(JiraStubTestCase):
+    def setUp(self):
+        super().setUp()
+        self.rows = [
+            ExcelRow.objects.create(excel_file=self.excel_file, row_number=number, data={'Название': title})
+            for number, title in enumerate(['Первая', 'Вторая', 'Третья'], start=2)
+        ]
+
+    def enqueue(self, rows=None):
+        return JiraOutboxService.enqueue(rows or self.rows, project_key='PROJ', summary_template='{Название}')
+
+    def test_enqueue_is_idempotent(self):
+        self.assertEqual(self.enqueue(self.rows[:1]), 1)
+        # Уже поставленные строки не считаются
+        self.assertEqual(self.enqueue(), 2)
+        self.assertEqual(self.enqueue(), 0)
+        self.assertEqual(JiraOutbox.objects.count(), 3)
+        self.assertEqual(
+            set(JiraOutbox.objects.values_list('excel_row', flat=True)), {row.id for row in self.rows}
+        )
+
+    def test_command_creates_issues(self):
+        self.enqueue()
+        out = StringIO()
+        call_command('process_jira_outbox', stdout=out)
+
+        self.assertIn('создано задач: 3', out.getvalue())
+        self.assertEqual([path for path, _ in self.stub.requests], ['/rest/api/3/issue/bulk'])
+        for entry in JiraOutbox.objects.select_related('excel_row'):
+            self.assertEqual(entry.status, JiraOutbox.STATUS_DONE)
+            self.assertEqual(entry.excel_row.jira_key, entry.jira_key)
+            self.assertIn(JiraOutboxService.label_for(entry), self.stub.issues[entry.jira_key]['labels'])
+
+    def test_expired_lease_is_reconciled_by_label(self):
+        self.enqueue(self.rows[:1])
+        # Воркер забрал запись, создал задачу и упал до сохранения результата
+        entry, = JiraOutboxService.claim_batch()
+        self.service.create_issues_from_fields([{
+            'summary': 'Первая', 'labels': [JiraOutboxService.label_for(entry)]
+        }])
+        JiraOutbox.objects.filter(pk=entry.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+
+        stats = JiraOutboxService.process_batch(self.service)
+
+        self.assertEqual(stats['reconciled'], 1)
+        self.assertEqual(stats['created'], 0)
+        self.assertEqual(len(self.stub.issues), 1)
+        self.rows[0].refresh_from_db()
+        self.assertEqual(self.rows[0].jira_key, next(iter(self.stub.issues)))
+
+    def test_deleted_row_keeps_entry(self):
+        self.enqueue(self.rows[:1])
+        self.rows[0].delete()
+
+        entry = JiraOutbox.objects.get()
+        self.assertIsNone(entry.excel_row_id)
+        JiraOutboxService.process_batch(self.service)
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, JiraOutbox.STATUS_FAILED)
+        self.assertEqual(entry.last_error, 'Excel row not found')
+
+    def test_unavailable_jira_postpones_batch(self):
+        self.enqueue()
+        self.stub.responses.append((503, {}))
+
+        stats = JiraOutboxService.process_batch(self.service)
+
+        self.assertEqual(stats['retry'], 3)
+        self.assertEqual(len(self.stub.requests), 1)
+        for entry in JiraOutbox.objects.all():
+            self.assertEqual(entry.status, JiraOutbox.STATUS_PENDING)
+            self.assertGreater(entry.next_attempt_at, timezone.now())
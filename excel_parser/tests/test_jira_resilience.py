@@ -0,0 +1,210 @@
+"""
+Circuit breaker, ограничитель частоты и повторы запросов к Jira
+"""
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from excel_parser.services import jira_resilience
+from excel_parser.services.jira_resilience import (
+    CircuitBreaker, JiraAPIError, JiraCircuitOpenError, RetryPolicy, TokenBucket, parse_retry_after
+)
+
+from .jira_stub import JiraStubTestCase
+
+
+class FakeClock:
+    """time.monotonic/time.sleep модуля jira_resilience без реального ожидания"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class ClockMixin:
+    def setUp(self):
+        super().setUp()
+        self.clock = FakeClock()
+        patcher = mock.patch.object(jira_resilience, 'time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class CircuitBreakerTests(ClockMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+
+    def fail(self, times):
+        for _ in range(times):
+            self.breaker.before_request()
+            self.breaker.record_failure()
+
+    def test_closed_until_threshold(self):
+        self.fail(2)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        # Успех сбрасывает счетчик ошибок подряд
+        self.breaker.record_success()
+        self.fail(2)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_opens_after_threshold(self):
+        self.fail(3)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.clock.now += 29
+        with self.assertRaises(JiraCircuitOpenError):
+            self.breaker.before_request()
+
+    def test_half_open_trial_success_closes(self):
+        self.fail(3)
+        self.clock.now += 30
+        self.breaker.before_request()
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(self.breaker.trial_in_flight)
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(self.breaker.failures, 0)
+        self.breaker.before_request()
+
+    def test_half_open_trial_failure_reopens(self):
+        self.fail(3)
+        self.clock.now += 30
+        self.breaker.before_request()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        # Таймаут отсчитывается заново от неудачного пробного запроса
+        self.clock.now += 29
+        with self.assertRaises(JiraCircuitOpenError):
+            self.breaker.before_request()
+        self.clock.now += 1
+        self.breaker.before_request()
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+
+
+    def test_released_trial_reopens_and_wakes_waiters(self):
+        self.fail(3)
+        self.clock.now += 30
+        self.assertTrue(self.breaker.before_request())
+
+        errors = []
+
+        def wait_for_trial():
+            try:
+                self.breaker.before_request()
+            except JiraCircuitOpenError as e:
+                errors.append(e)
+
+        waiter = threading.Thread(target=wait_for_trial)
+        waiter.start()
+        self.breaker.release_trial()
+        waiter.join(timeout=5)
+        self.assertFalse(waiter.is_alive())
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.trial_in_flight)
+
+    def test_release_trial_without_trial(self):
+        self.assertFalse(self.breaker.before_request())
+        self.breaker.release_trial()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(self.breaker.failures, 0)
+
+
+class RateLimitAndRetryTests(ClockMixin, SimpleTestCase):
+    def test_token_bucket_waits_for_tokens(self):
+        bucket = TokenBucket(rate=2, burst=2)
+        start = self.clock.now
+        for _ in range(4):
+            bucket.acquire()
+        self.assertAlmostEqual(self.clock.now - start, 1.0)
+
+    def test_pause_halves_rate_and_recovers(self):
+        bucket = TokenBucket(rate=10, burst=10)
+        bucket.pause(5)
+        self.assertEqual(bucket.rate, 5)
+        start = self.clock.now
+        bucket.acquire()
+        self.assertGreaterEqual(self.clock.now - start, 5)
+        for _ in range(20):
+            bucket.record_success()
+        self.assertEqual(bucket.rate, 10)
+
+    def test_retry_delay(self):
+        policy = RetryPolicy(max_retries=5, backoff_base=0.5, backoff_max=4)
+        for attempt in range(6):
+            self.assertLessEqual(policy.delay(attempt), min(4, 0.5 * 2 ** attempt))
+        self.assertGreaterEqual(policy.delay(0, retry_after=10), 10)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after('7'), 7.0)
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0.0)
+        self.assertIsNone(parse_retry_after('soon'))
+        self.assertIsNone(parse_retry_after(None))
+
+
+class JiraServiceCircuitTests(JiraStubTestCase):
+    """Переходы circuit breaker'а на запросах JiraService (порог 3 ошибки, повторов поиска 2)"""
+
+    def test_open_half_open_closed(self):
+        breaker = self.service.circuit_breaker
+        self.stub.responses.extend([(503, {})] * 3)
+        with self.assertRaises(JiraAPIError):
+            self.service.search_issue_keys_by_labels(['first'])
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(len(self.stub.requests), 3)
+
+        # Разомкнут: запрос в Jira не отправляется
+        with self.assertRaises(JiraCircuitOpenError):
+            self.service.create_issues_from_fields([{'summary': 'Вторая'}])
+        self.assertEqual(len(self.stub.requests), 3)
+
+        # После reset_timeout пропускается пробный запрос; успешный замыкает цепь
+        breaker.opened_at -= breaker.reset_timeout
+        [(jira_key, error)] = self.service.create_issues_from_fields([{'summary': 'Третья'}])
+        self.assertIsNone(error)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(len(self.stub.requests), 4)
+
+    def test_failed_trial_reopens(self):
+        breaker = self.service.circuit_breaker
+        self.stub.responses.extend([(503, {})] * 4)
+        with self.assertRaises(JiraAPIError):
+            self.service.search_issue_keys_by_labels(['first'])
+
+        breaker.opened_at -= breaker.reset_timeout
+        with self.assertRaises(JiraCircuitOpenError):
+            # Пробный запрос неудачен, повтор поиска упирается в снова разомкнутую цепь
+            self.service.search_issue_keys_by_labels(['second'])
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(len(self.stub.requests), 4)
+
+    def test_rate_limited_does_not_open(self):
+        self.stub.responses.extend([(429, {'Retry-After': '0'})] * 2)
+        self.service.create_issues_from_fields([{'summary': 'Первая'}])
+        self.assertEqual(self.service.circuit_breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(self.service.circuit_breaker.failures, 0)
+
+    def test_unexpected_error_releases_trial(self):
+        breaker = self.service.circuit_breaker
+        self.stub.responses.extend([(503, {})] * 3)
+        with self.assertRaises(JiraAPIError):
+            self.service.search_issue_keys_by_labels(['first'])
+
+        breaker.opened_at -= breaker.reset_timeout
+        with mock.patch.object(self.service.session, 'post', side_effect=TypeError('not serializable')):
+            with self.assertRaises(TypeError):
+                self.service.create_issues_from_fields([{'summary': 'Первая'}])
+        self.assertFalse(breaker.trial_in_flight)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+        # Следующий пробный запрос проходит
+        breaker.opened_at -= breaker.reset_timeout
+        [(jira_key, error)] = self.service.create_issues_from_fields([{'summary': 'Вторая'}])
+        self.assertIsNone(error)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
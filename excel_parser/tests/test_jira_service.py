@@ -0,0 +1,94 @@
+"""
+JiraService против локальной заглушки Jira API
+"""
+from excel_parser.models import ExcelRow
+from excel_parser.services.jira_resilience import JiraAPIError
+
+from .jira_stub import JIRA_SETTINGS, JiraStubTestCase
+
+
+class JiraServiceTests(JiraStubTestCase):
+    def make_rows(self, *titles):
+        return [
+            ExcelRow.objects.create(excel_file=self.excel_file, row_number=number, data={'Название': title})
+            for number, title in enumerate(titles, start=2)
+        ]
+
+    def test_create_issues_batch_uses_bulk_endpoint(self):
+        rows = self.make_rows('Первая', 'FAIL вторая', 'Третья', 'Четвертая', 'Пятая')
+        rows[4].jira_key = 'PROJ-999'
+        rows[4].save()
+
+        result = self.service.create_issues_batch(rows, project_key='PROJ', summary_template='{Название}')
+
+        self.assertEqual(len(result['created']), 3)
+        self.assertEqual([item['row_id'] for item in result['errors']], [rows[1].id])
+        self.assertEqual([item['row_id'] for item in result['skipped']], [rows[4].id])
+        # 4 задачи пакетами по 2
+        self.assertEqual([path for path, _ in self.stub.requests], ['/rest/api/3/issue/bulk'] * 2)
+
+        saved = {row.id: row for row in ExcelRow.objects.filter(jira_key__isnull=False)}
+        self.assertEqual(set(saved), {rows[0].id, rows[2].id, rows[3].id, rows[4].id})
+        for row_id in (rows[0].id, rows[2].id, rows[3].id):
+            self.assertEqual(self.stub.issues[saved[row_id].jira_key]['summary'], saved[row_id].data['Название'])
+            self.assertEqual(saved[row_id].jira_url, f'{self.stub.url}/browse/{saved[row_id].jira_key}')
+
+    def test_session_reuses_connection(self):
+        for row in self.make_rows('Первая', 'Вторая', 'Третья'):
+            self.service.create_issue(row, project_key='PROJ', summary_template='{Название}')
+        self.assertEqual(len(self.stub.requests), 3)
+        self.assertEqual(len(self.stub.connections), 1)
+
+    def test_create_issue_is_not_retried_after_server_error(self):
+        row, = self.make_rows('Первая')
+        self.stub.responses.append((503, {}))
+
+        with self.assertRaises(JiraAPIError):
+            self.service.create_issue(row, project_key='PROJ')
+
+        self.assertEqual(len(self.stub.requests), 1)
+        row.refresh_from_db()
+        self.assertIsNone(row.jira_key)
+
+    def test_batch_bulk_is_not_reposted_after_server_error(self):
+        rows = self.make_rows('Первая', 'Вторая')
+        self.stub.responses.append((502, {}))
+
+        result = self.service.create_issues_batch(rows, project_key='PROJ', summary_template='{Название}')
+
+        self.assertEqual(self.stub.issues, {})
+        self.assertEqual([path for path, _ in self.stub.requests], ['/rest/api/3/issue/bulk'])
+        self.assertEqual(sorted(item['row_id'] for item in result['errors']), [row.id for row in rows])
+        self.assertFalse(ExcelRow.objects.filter(jira_key__isnull=False).exists())
+
+    def test_search_is_retried_after_server_error(self):
+        self.stub.responses.append((503, {}))
+        self.assertEqual(self.service.search_issue_keys_by_labels(['outbox-1']), {})
+        self.assertEqual(len(self.stub.requests), 2)
+
+    def test_rate_limit_pauses_and_retries(self):
+        row, = self.make_rows('Первая')
+        self.stub.responses.append((429, {'Retry-After': '0'}))
+
+        self.service.create_issue(row, project_key='PROJ')
+
+        self.assertEqual(len(self.stub.requests), 2)
+        self.assertLess(self.service.rate_limiter.rate, JIRA_SETTINGS['JIRA_RATE_LIMIT'])
+
+    def test_unsafe_bulk_is_not_retried_after_server_error(self):
+        self.stub.responses.append((502, {}))
+        with self.assertRaises(JiraAPIError) as error:
+            self.service.create_issues_from_fields([{'summary': 'Первая'}])
+        self.assertEqual(error.exception.status_code, 502)
+        self.assertEqual(len(self.stub.requests), 1)
+
+    def test_retries_exhausted(self):
+        self.stub.responses.extend([(500, {})] * 3)
+        with self.assertRaises(JiraAPIError):
+            self.service.search_issue_keys_by_labels(['outbox-1'])
+        self.assertEqual(len(self.stub.requests), 3)
+
+    def test_search_issue_keys_by_labels(self):
+        [(jira_key, error)] = self.service.create_issues_from_fields([{'summary': 'Первая', 'labels': ['outbox-1']}])
+        self.assertIsNone(error)
+        self.assertEqual(self.service.search_issue_keys_by_labels(['outbox-1', 'outbox-2']), {'outbox-1': jira_key})
@@ -0,0 +1,72 @@
+"""
+Шаблоны заголовка и описания задач Jira по строкам ExcelRow
+"""
+from django.test import TestCase
+
+from excel_parser.models import ExcelColumnMapping, ExcelFile, ExcelRow
+from excel_parser.services.jira_service import JiraService
+from excel_parser.services.jira_templates import CompiledTemplate, IssueFieldsBuilder, TemplateError
+
+COLUMNS = ['ФИО', 'Оклад', 'Отдел.Код', 'Комментарий']
+
+
+class JiraTemplateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.excel_file = ExcelFile.objects.create(file_name='staff.xlsx', file_path='excel_files/staff.xlsx')
+        for order, column in enumerate(COLUMNS):
+            ExcelColumnMapping.objects.create(
+                excel_file=cls.excel_file, excel_column=column, db_field=f'column_{order}', order=order
+            )
+        ExcelRow.objects.create(excel_file=cls.excel_file, row_number=2, data={
+            'ФИО': 'Иванов Иван', 'Оклад': 150000, 'Отдел.Код': 'IT-1', 'Комментарий': None,
+        })
+        ExcelRow.objects.create(excel_file=cls.excel_file, row_number=3, data={
+            'ФИО': 'Петрова Анна', 'Оклад': 'по договору', 'Отдел.Код': 'HR', 'Комментарий': 'x' * 300,
+        })
+
+    def setUp(self):
+        self.rows = list(ExcelRow.objects.filter(excel_file=self.excel_file).order_by('row_number'))
+
+    def test_render_saved_rows(self):
+        builder = IssueFieldsBuilder(
+            'PROJ', 'Task', '{ФИО}: {Оклад:,.0f} ({Отдел.Код})', '{Комментарий!r}', missing_value='-'
+        )
+        first, second = (builder.build(row, labels=['payroll']) for row in self.rows)
+
+        self.assertEqual(first['summary'], 'Иванов Иван: 150,000 (IT-1)')
+        self.assertEqual(first['description']['content'][0]['content'][0]['text'], '-')
+        self.assertEqual(first['labels'], ['payroll'])
+        self.assertEqual(first['project'], {'key': 'PROJ'})
+        # Формат числа для текста в ячейке - значение как есть
+        self.assertEqual(second['summary'], 'Петрова Анна: по договору (HR)')
+
+    def test_missing_and_empty_values_use_default(self):
+        template = CompiledTemplate('{ФИО} / {Отдел} / {Комментарий} / {Оклад}')
+        self.assertEqual(
+            template.render({'ФИО': '', 'Комментарий': None, 'Оклад': 0}, default='-'), '- / - / - / 0'
+        )
+
+    def test_summary_is_truncated(self):
+        fields = IssueFieldsBuilder(summary_template='{Комментарий}').build(self.rows[1])
+        self.assertEqual(len(fields['summary']), IssueFieldsBuilder.SUMMARY_MAX_LENGTH)
+
+    def test_default_summary_without_template(self):
+        empty = ExcelRow(excel_file=self.excel_file, row_number=10, data={})
+        self.assertEqual(IssueFieldsBuilder().build(empty)['summary'], 'Задача из Excel (строка 10)')
+        self.assertEqual(
+            IssueFieldsBuilder().build(self.rows[0])['summary'],
+            'ФИО: Иванов Иван | Оклад: 150000 | Отдел.Код: IT-1'
+        )
+
+    def test_invalid_templates(self):
+        for template in ('{}', '{0}', '{ФИО:{Оклад}}', '{ФИО!x}', '{ФИО'):
+            with self.assertRaises(TemplateError, msg=template):
+                CompiledTemplate(template)
+
+    def test_template_fields_are_checked_against_column_mapping(self):
+        service = JiraService()
+        builder = service.issue_fields_builder('PROJ', summary_template='{ФИО}', excel_rows=self.rows)
+        self.assertEqual(builder.fields, ['ФИО'])
+        with self.assertRaisesMessage(TemplateError, 'Должность'):
+            service.issue_fields_builder('PROJ', summary_template='{ФИО} {Должность}', excel_rows=self.rows)
@@ -0,0 +1,107 @@
+"""
+Цепочки подчинения (WITH RECURSIVE работает и на SQLite) и запрет циклов
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+
+from excel_parser.models import Employee
+from excel_parser.services.management_chain import ManagementChainService
+
+
+class ManagementChainTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # director <- head <- lead <- (developer, tester); analyst - вне цепочки
+        cls.director = cls.create('director', 300000)
+        cls.head = cls.create('head', 200000, line_manager=cls.director)
+        cls.lead = cls.create('lead', 150000, line_manager=cls.head)
+        cls.developer = cls.create('developer', 100000, line_manager=cls.lead)
+        cls.tester = cls.create('tester', 80000, line_manager=cls.lead, is_active=False)
+        cls.analyst = cls.create('analyst', 90000, functional_manager=cls.developer)
+
+    @staticmethod
+    def create(login, salary, **fields):
+        return Employee.objects.create(
+            full_name=login.title(), login=login, hire_date=date(2020, 1, 1),
+            current_salary=Decimal(salary), **fields
+        )
+
+    def test_subordinates(self):
+        subordinates = ManagementChainService.get_subordinates(self.director.pk)
+        self.assertEqual(
+            set(subordinates), {self.head, self.lead, self.developer, self.tester}
+        )
+        self.assertEqual(set(ManagementChainService.get_subordinates(self.lead.pk)), {self.developer, self.tester})
+        self.assertFalse(ManagementChainService.get_subordinates(self.developer.pk).exists())
+        self.assertEqual(
+            list(ManagementChainService.get_subordinates(self.developer.pk, relation='functional')),
+            [self.analyst],
+        )
+
+    def test_manager_ids_from_direct_manager_up(self):
+        self.assertEqual(
+            ManagementChainService.get_manager_ids(self.developer.pk),
+            [self.lead.pk, self.head.pk, self.director.pk],
+        )
+        self.assertEqual(ManagementChainService.get_manager_ids(self.director.pk), [])
+
+    def test_chain_stats(self):
+        stats = ManagementChainService.get_chain_stats(self.director.pk)
+        self.assertEqual(stats['span_of_control'], 1)
+        # Неактивный tester входит в глубину, но не в численность и ФОТ
+        self.assertEqual(stats['total_subordinates'], 3)
+        self.assertEqual(stats['depth'], 3)
+        self.assertEqual(stats['subtree_fot'], Decimal('450000.00'))
+
+        stats = ManagementChainService.get_chain_stats(self.developer.pk)
+        self.assertEqual((stats['span_of_control'], stats['depth'], stats['subtree_fot']), (0, 0, Decimal('0.00')))
+
+    def test_unknown_relation(self):
+        with self.assertRaises(ValueError):
+            ManagementChainService.get_subordinates(self.director.pk, relation='matrix')
+
+    def test_would_create_cycle(self):
+        self.assertTrue(ManagementChainService.would_create_cycle(self.director.pk, self.director.pk))
+        self.assertTrue(ManagementChainService.would_create_cycle(self.director.pk, self.developer.pk))
+        self.assertTrue(ManagementChainService.would_create_cycle(self.head.pk, self.lead.pk))
+        self.assertFalse(ManagementChainService.would_create_cycle(self.developer.pk, self.head.pk))
+        self.assertFalse(ManagementChainService.would_create_cycle(self.director.pk, self.analyst.pk))
+        self.assertFalse(ManagementChainService.would_create_cycle(self.director.pk, None))
+        # Цепочки разных типов независимы
+        self.assertTrue(ManagementChainService.would_create_cycle(self.developer.pk, self.analyst.pk, 'functional'))
+        self.assertFalse(ManagementChainService.would_create_cycle(self.developer.pk, self.analyst.pk, 'line'))
+
+    def test_save_rejects_cycle(self):
+        self.director.line_manager = self.developer
+        with self.assertRaises(ValidationError) as context:
+            self.director.save()
+        self.assertIn('line_manager', context.exception.message_dict)
+        self.assertIsNone(Employee.objects.get(pk=self.director.pk).line_manager_id)
+
+        self.developer.functional_manager = self.developer
+        with self.assertRaises(ValidationError) as context:
+            self.developer.full_clean()
+        self.assertIn('functional_manager', context.exception.message_dict)
+
+    def test_save_allows_reassignment(self):
+        self.developer.line_manager = self.head
+        self.developer.save()
+        self.assertEqual(ManagementChainService.get_manager_ids(self.developer.pk), [self.head.pk, self.director.pk])
+
+    def test_existing_cycle_in_data_terminates(self):
+        # Цикл, записанный в обход save(), не приводит к бесконечной рекурсии
+        Employee.objects.filter(pk=self.director.pk).update(line_manager=self.lead)
+
+        self.assertEqual(
+            ManagementChainService.get_manager_ids(self.developer.pk),
+            [self.lead.pk, self.head.pk, self.director.pk],
+        )
+        self.assertEqual(
+            set(ManagementChainService.get_subordinates(self.lead.pk)),
+            {self.director, self.head, self.developer, self.tester},
+        )
+        stats = ManagementChainService.get_chain_stats(self.head.pk)
+        self.assertEqual((stats['total_subordinates'], stats['depth']), (3, 2))
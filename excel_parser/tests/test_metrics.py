@@ -0,0 +1,43 @@
+"""
+Доступ к /metrics (METRICS_TOKEN, METRICS_ALLOWED_IPS)
+"""
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from excel_parser.metrics import PROMETHEUS_AVAILABLE
+
+# Без prometheus_client разрешенный запрос получает 501
+ALLOWED_STATUS = 200 if PROMETHEUS_AVAILABLE else 501
+
+
+@override_settings(DEBUG=False, METRICS_TOKEN='', METRICS_ALLOWED_IPS=[])
+class MetricsAccessTests(SimpleTestCase):
+    def get(self, **extra):
+        return self.client.get(reverse('metrics'), **extra)
+
+    def test_closed_without_settings(self):
+        self.assertEqual(self.get().status_code, 403)
+        with self.settings(DEBUG=True):
+            self.assertEqual(self.get().status_code, ALLOWED_STATUS)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token(self):
+        self.assertEqual(self.get().status_code, 403)
+        self.assertEqual(self.get(HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.assertEqual(self.get(HTTP_AUTHORIZATION='Bearer secret').status_code, ALLOWED_STATUS)
+        with self.settings(DEBUG=True):
+            self.assertEqual(self.get().status_code, 403)
+
+    @override_settings(METRICS_ALLOWED_IPS=['10.0.0.0/8', '::1'])
+    def test_allowed_ips(self):
+        self.assertEqual(self.get(REMOTE_ADDR='10.1.2.3').status_code, ALLOWED_STATUS)
+        self.assertEqual(self.get(REMOTE_ADDR='::1').status_code, ALLOWED_STATUS)
+        self.assertEqual(self.get(REMOTE_ADDR='192.168.0.1').status_code, 403)
+
+    @override_settings(METRICS_TOKEN='secret', METRICS_ALLOWED_IPS=['127.0.0.1'])
+    def test_token_or_address(self):
+        self.assertEqual(self.get(REMOTE_ADDR='127.0.0.1').status_code, ALLOWED_STATUS)
+        self.assertEqual(
+            self.get(REMOTE_ADDR='192.168.0.1', HTTP_AUTHORIZATION='Bearer secret').status_code, ALLOWED_STATUS
+        )
+        self.assertEqual(self.get(REMOTE_ADDR='192.168.0.1').status_code, 403)
@@ -0,0 +1,60 @@
+"""
+Пересчет org_path сотрудников при изменении узлов оргструктуры
+"""
+from datetime import date
+
+from django.test import TestCase
+
+from excel_parser.models import Department, Division, Employee, Group
+
+
+class OrgPathSignalTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.it = Department.objects.create(name='ИТ')
+        cls.hr = Department.objects.create(name='Кадры')
+        cls.development = Division.objects.create(department=cls.it, name='Разработка')
+        cls.recruiting = Division.objects.create(department=cls.hr, name='Подбор')
+        cls.backend = Group.objects.create(division=cls.development, name='Бэкенд')
+        cls.employee = Employee.objects.create(
+            full_name='Иванов Иван', login='ivanov', hire_date=date(2020, 1, 1), group=cls.backend
+        )
+
+    def reload(self):
+        self.employee.refresh_from_db()
+        return self.employee
+
+    def test_rename_updates_names(self):
+        self.it.name = 'Информационные технологии'
+        self.it.save()
+        self.assertEqual(self.reload().org_path_names, 'Информационные технологии / Разработка / Бэкенд')
+
+    def test_move_group_updates_employee_org_unit(self):
+        self.backend.division = self.recruiting
+        self.backend.save()
+        employee = self.reload()
+        self.assertEqual((employee.department_id, employee.division_id), (self.hr.id, self.recruiting.id))
+        self.assertEqual(employee.org_path, f'/{self.hr.id}/{self.recruiting.id}/{self.backend.id}/')
+
+    def test_move_division_updates_employee_department(self):
+        self.development.department = self.hr
+        self.development.save()
+        employee = self.reload()
+        self.assertEqual(employee.department_id, self.hr.id)
+        self.assertEqual(employee.org_path_names, 'Кадры / Разработка / Бэкенд')
+
+    def test_unchanged_save_skips_refresh(self):
+        manager = self.employee
+        for unit in (self.it, self.development, self.backend):
+            unit.manager = manager
+            # Сравнение с сохраненным узлом и UPDATE, без пересчета путей
+            with self.assertNumQueries(2):
+                unit.save()
+
+    def test_update_fields_without_path_fields_skip_comparison(self):
+        self.backend.manager = self.employee
+        with self.assertNumQueries(1):
+            self.backend.save(update_fields=['manager'])
+        self.backend.name = 'Бэкенд API'
+        self.backend.save(update_fields=['name'])
+        self.assertEqual(self.reload().org_path_names, 'ИТ / Разработка / Бэкенд API')
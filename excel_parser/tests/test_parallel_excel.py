@@ -0,0 +1,76 @@
+"""
+Параллельный разбор xlsx (ParallelExcelService) совпадает с pd.read_excel
+"""
+import datetime
+import os
+import tempfile
+import unittest
+
+import openpyxl
+import pandas as pd
+from django.test import SimpleTestCase, override_settings
+
+from excel_parser.services import parallel_excel
+from excel_parser.services.parallel_excel import ParallelExcelService
+
+
+@unittest.skipUnless(parallel_excel.PARALLEL_AVAILABLE, 'openpyxl worksheet parser is not available')
+@override_settings(IMPORT_PARSE_WORKERS=3, IMPORT_PARSE_MIN_ROWS=20)
+class ParallelExcelTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'book.xlsx')
+
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.title = 'Сотрудники'
+        sheet.append(['Логин', 'ФИО', 'Дата принятия', 'Ставка', 'Смена', 'Комментарий'])
+        for number in range(1, 61):
+            row = [
+                f'user{number}',
+                'Иванов Иван' if number % 3 else 'Петров Петр',  # общие строки
+                datetime.datetime(2020, 1, 1) + datetime.timedelta(days=number),
+                number * 1.5 if number % 4 else number,
+                datetime.time(9, number % 60),
+                None,
+            ]
+            if number % 7 == 0:
+                row[2] = '31.02.2020'  # смешанные типы в колонке
+            if number % 11 == 0:
+                row[5] = '#DIV/0!'  # ячейка с ошибкой
+            if number % 13 == 0:
+                row[3] = True
+            sheet.append(row)
+        # Пропущенные строки и ячейки внутри и в конце листа
+        sheet.append([])
+        sheet.append(['user_gap', None, None, None, None, 'хвост'])
+        sheet.cell(row=70, column=1, value='user_last')
+        sheet.cell(row=70, column=4, value=1)
+        workbook.create_sheet('Пустой')
+        small = workbook.create_sheet('Отделы')
+        small.append(['Отдел', 'Департамент'])
+        small.append(['Продажи', 'Коммерция'])
+        workbook.save(self.path)
+
+    def test_split_large_sheet(self):
+        book = ParallelExcelService._sheets(self.path)
+        tasks = ParallelExcelService._split(self.path, book, 3)
+        self.assertEqual([task[1] for task in tasks], ['Сотрудники'] * 3 + ['Пустой', 'Отделы'])
+
+    def test_same_frames_as_read_excel(self):
+        expected = pd.read_excel(self.path, sheet_name=None, engine='openpyxl')
+        with self.assertNoLogs(parallel_excel.logger, level='WARNING'):
+            result = ParallelExcelService.read_excel(self.path, sheets=True)
+        self.assertEqual(list(result), list(expected))
+        for name, df in expected.items():
+            pd.testing.assert_frame_equal(result[name], df)
+            for column in df:
+                if df[column].dtype == object:
+                    self.assertEqual(
+                        [type(value) for value in result[name][column]], [type(value) for value in df[column]]
+                    )
+
+    def test_first_sheet(self):
+        expected = pd.read_excel(self.path, engine='openpyxl')
+        pd.testing.assert_frame_equal(ParallelExcelService.read_excel(self.path), expected)
@@ -0,0 +1,42 @@
+"""
+Поиск сотрудников (на SQLite - icontains вместо pg_trgm)
+"""
+from datetime import date
+
+from django.test import TestCase
+from django.urls import reverse
+
+from excel_parser.models import Department, Employee
+from excel_parser.services.search import EmployeeSearchService
+
+
+class EmployeeSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='ИТ')
+        cls.developer = Employee.objects.create(
+            full_name='Иванов Иван', login='ivanov', position='Разработчик', department=department,
+            hire_date=date(2020, 1, 1),
+        )
+        cls.analyst = Employee.objects.create(
+            full_name='Петрова Анна', login='petrova', position='Аналитик', department=department,
+            hire_date=date(2021, 6, 1),
+        )
+
+    def test_search_by_name_login_and_position(self):
+        for query in ('Иванов', 'ivan', 'Разработ'):
+            result = EmployeeSearchService.search(Employee.objects.all(), query)
+            self.assertEqual(list(result), [self.developer], query)
+
+    def test_empty_query_returns_queryset(self):
+        self.assertEqual(EmployeeSearchService.search(Employee.objects.all(), '  ').count(), 2)
+
+    def test_employees_page_and_departments_api(self):
+        response = self.client.get(reverse('employees_list'), {'search': 'Петрова'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Петрова Анна')
+        self.assertNotContains(response, 'Иванов Иван')
+
+        response = self.client.get(reverse('department-list'), {'search': 'ИТ'}, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['name'] for item in response.json()['results']], ['ИТ'])
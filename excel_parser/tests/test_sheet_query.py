@@ -0,0 +1,72 @@
+"""
+Запросы к строкам загруженного листа (/api/sheets/)
+"""
+from io import StringIO
+from unittest import skipIf
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from excel_parser.models import ExcelColumnMapping, ExcelFile, ExcelRow
+
+ROWS = [
+    {'Город': 'Москва', 'Сумма': 100, 'Статус': 'new'},
+    {'Город': 'Москва', 'Сумма': 250, 'Статус': 'done'},
+    {'Город': 'Казань', 'Сумма': 40, 'Статус': 'new'},
+    {'Город': 'Казань', 'Сумма': None, 'Статус': 'new'},
+]
+
+
+class SheetQueryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.excel_file = ExcelFile.objects.create(
+            file_name='sheet.xlsx', file_path='excel_files/sheet.xlsx', status='completed'
+        )
+        for order, column in enumerate(ROWS[0]):
+            ExcelColumnMapping.objects.create(
+                excel_file=cls.excel_file, excel_column=column, db_field=column.lower(), order=order
+            )
+        ExcelRow.objects.bulk_create(
+            ExcelRow(excel_file=cls.excel_file, row_number=number, data=data)
+            for number, data in enumerate(ROWS, start=2)
+        )
+
+    def post(self, action, payload):
+        return self.client.post(
+            reverse(f'sheet-{action}', args=[self.excel_file.id]), payload, content_type='application/json'
+        )
+
+    def test_query_filters_and_sorts(self):
+        response = self.post('query', {
+            'filters': [{'column': 'Статус', 'value': 'new'}],
+            'sort': ['-Город', 'Сумма'],
+        })
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        self.assertEqual(result['total'], 3)
+        self.assertEqual(result['rows'][0]['row_number'], 2)
+        self.assertEqual({row['row_number'] for row in result['rows']}, {2, 4, 5})
+
+    def test_aggregate_by_column(self):
+        response = self.post('aggregate', {
+            'group_by': ['Город'],
+            'metrics': [{'func': 'count'}, {'column': 'Сумма', 'func': 'sum'}],
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [
+            {'Город': 'Казань', 'count': 2, 'sum_Сумма': 40},
+            {'Город': 'Москва', 'count': 2, 'sum_Сумма': 350},
+        ])
+
+    def test_unknown_column_is_bad_request(self):
+        response = self.post('query', {'filters': [{'column': 'Нет такой', 'value': 1}]})
+        self.assertEqual(response.status_code, 400)
+
+    @skipIf(connection.vendor == 'postgresql', 'на PostgreSQL команда создает индексы')
+    def test_create_sheet_indexes_is_noop_without_postgres(self):
+        out = StringIO()
+        call_command('create_sheet_indexes', stdout=out)
+        self.assertIn('PostgreSQL', out.getvalue())
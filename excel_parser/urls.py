@@ -5,7 +5,10 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     DepartmentViewSet, DivisionViewSet, GroupViewSet,
-    EmployeeViewSet, SalaryHistoryViewSet, AnalyticsViewSet,
+    EmployeeViewSet, SalaryHistoryViewSet, AnalyticsViewSet, SheetViewSet, ImportViewSet,
+    UploadViewSet,
+    analytics_department_delta, analytics_salary_history_report, analytics_fot_summary,
+    profiling_stats,
     index, employees_list, employee_detail, analytics, custom_report_builder
 )
 
@@ -17,8 +20,18 @@ router.register(r'groups', GroupViewSet, basename='group')
 router.register(r'employees', EmployeeViewSet, basename='employee')
 router.register(r'salary-history', SalaryHistoryViewSet, basename='salaryhistory')
 router.register(r'analytics', AnalyticsViewSet, basename='analytics')
+router.register(r'sheets', SheetViewSet, basename='sheet')
+router.register(r'import', ImportViewSet, basename='import')
+router.register(r'uploads', UploadViewSet, basename='upload')
 
 urlpatterns = [
+    # Async analytics endpoints (до router, чтобы не перекрывались AnalyticsViewSet)
+    path('api/analytics/department_delta/', analytics_department_delta, name='analytics-department-delta'),
+    path('api/analytics/salary_history_report/', analytics_salary_history_report,
+         name='analytics-salary-history-report'),
+    path('api/analytics/fot_summary/', analytics_fot_summary, name='analytics-fot-summary'),
+    path('api/profiling/', profiling_stats, name='profiling-stats'),
+
     # API endpoints
     path('api/', include(router.urls)),
     
@@ -1,34 +1,180 @@
 """
 Views for Payroll BI - ФОТ
 """
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse
 from django.core.paginator import Paginator
-from django.db.models import Q, Sum, Avg, Count
+from django.db.models import Sum, Avg, Count
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 from django.core.files.uploadedfile import InMemoryUploadedFile
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition, require_safe
+from asgiref.sync import iscoroutinefunction
+from functools import wraps
 import threading
+import hashlib
+import hmac
+import ipaddress
+import os
+import re
 import json
 
-from .models import Department, Division, Group, Employee, SalaryHistory
-from .services import DataLoaderService, AnalyticsService
+from .models import Department, Division, Group, Employee, SalaryHistory, UploadSession
+from .services import (
+    DataLoaderService, AnalyticsService, DataVersionService, EmployeeSearchService,
+    OrgTreeService, ManagementChainService
+)
+from .services.chunked_upload import ChunkedUploadService, UploadConflict
+from .services.sheet_query import SheetQueryService
+from .filters import EmployeeSearchFilter
+from .db_routing import use_replicas
+from .profiling import route_stats
+from .metrics import PROMETHEUS_AVAILABLE
 from .serializers import (
     DepartmentSerializer, DivisionSerializer, GroupSerializer,
-    EmployeeSerializer, SalaryHistorySerializer
+    EmployeeSerializer, SalaryHistorySerializer, UploadSessionSerializer
 )
 
 
+# Conditional GET
+
+def get_request_data_state(request, *scopes):
+    """Версия данных областей, вычисленная не более одного раза за запрос"""
+    # etag_func, last_modified_func и сама view запрашивают одно и то же
+    states = request.__dict__.setdefault('_data_version_states', {})
+    if scopes not in states:
+        states[scopes] = DataVersionService.get_state(*scopes)
+    return states[scopes]
+
+
+async def aget_request_data_state(request, *scopes):
+    """Асинхронный вариант get_request_data_state для async-view"""
+    states = request.__dict__.setdefault('_data_version_states', {})
+    if scopes not in states:
+        states[scopes] = await DataVersionService.aget_state(*scopes)
+    return states[scopes]
+
+
+def uses_conditional_get(request):
+    """
+    Нужна ли запросу версия данных: только GET/HEAD с ответом API
+
+    Browsable API (HTML) не кэшируется браузером по ETag, и для него версия не считается.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    renderer = getattr(request, 'accepted_renderer', None)
+    return renderer is None or renderer.format != 'api'
+
+
+def conditional_on(*scopes):
+    """
+    Декоратор условного GET: ETag и Last-Modified по версии данных областей
+
+    Версия считается до выполнения view, поэтому при совпадении If-None-Match
+    тяжелый запрос не выполняется и клиент получает 304. Запросы, для которых
+    uses_conditional_get ложно, выполняются без расчета версии.
+    """
+    def _state(request):
+        return get_request_data_state(request, *scopes)
+
+    def _etag(request, *args, **kwargs):
+        version = _state(request)[0]
+        # Тело ответа зависит от формата (JSON или Browsable API)
+        accept = request.META.get('HTTP_ACCEPT', '')
+        return hashlib.md5(f"{version}:{accept}".encode('utf-8')).hexdigest()
+
+    def _last_modified(request, *args, **kwargs):
+        return _state(request)[1]
+
+    def decorator(view):
+        conditional_view = condition(etag_func=_etag, last_modified_func=_last_modified)(view)
+
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def inner(request, *args, **kwargs):
+                if uses_conditional_get(request):
+                    return await conditional_view(request, *args, **kwargs)
+                return await view(request, *args, **kwargs)
+        else:
+            @wraps(view)
+            def inner(request, *args, **kwargs):
+                if uses_conditional_get(request):
+                    return conditional_view(request, *args, **kwargs)
+                return view(request, *args, **kwargs)
+        return inner
+
+    return decorator
+
+
+class ConditionalGetMixin:
+    """Условный GET для list/retrieve по областям data_version_scopes"""
+    data_version_scopes = ()
+
+    def list(self, request, *args, **kwargs):
+        view = conditional_on(*self.data_version_scopes)(super().list)
+        return view(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        view = conditional_on(*self.data_version_scopes)(super().retrieve)
+        return view(request, *args, **kwargs)
+
+
+class ReplicaReadMixin:
+    """Чтение безопасных (GET/HEAD) запросов и replica_actions с реплик, если они настроены"""
+    # Действия, которые только читают данные, хотя вызываются не GET-запросом
+    replica_actions = ()
+
+    def _reads_from_replica(self, request):
+        if request.method in SAFE_METHODS:
+            return True
+        action_map = getattr(self, 'action_map', None) or {}
+        return action_map.get(request.method.lower()) in self.replica_actions
+
+    def dispatch(self, request, *args, **kwargs):
+        if self._reads_from_replica(request):
+            with use_replicas():
+                return super().dispatch(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
+
+
+def upload_flag(request, name):
+    """Логический параметр загрузки из тела запроса или строки запроса"""
+    value = request.data.get(name, request.query_params.get(name, ''))
+    return str(value).lower() in ('1', 'true', 'yes')
+
+
+def upload_force(request):
+    """Параметр force загрузки: загрузить файл, даже если он уже загружался"""
+    return upload_flag(request, 'force')
+
+
+def validate_upload(loader, file):
+    """Параметр dry_run загрузки: только проверить файл и вернуть отчет, ничего не записывая"""
+    try:
+        result = DataLoaderService.import_file(loader, file, dry_run=True)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    return Response({'success': True, **result})
+
+
 # REST API ViewSets
 
-class DepartmentViewSet(viewsets.ModelViewSet):
+class DepartmentViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet для работы с департаментами"""
     queryset = Department.objects.all().order_by('name')
     serializer_class = DepartmentSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name']
     ordering_fields = ['name', 'created_at']
+    data_version_scopes = ('org', 'employees')
     
     @action(detail=False, methods=['post'])
     def upload(self, request):
@@ -36,25 +182,37 @@ class DepartmentViewSet(viewsets.ModelViewSet):
         file = request.FILES.get('file')
         if not file:
             return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
+        if upload_flag(request, 'dry_run'):
+            return validate_upload('departments', file)
         
         try:
-            result = DataLoaderService.load_departments_from_file(file)
+            result = DataLoaderService.import_file('departments', file, force=upload_force(request))
             return Response({
                 'success': True,
                 'created': result['created'],
-                'updated': result['updated']
+                'updated': result['updated'],
+                'import_id': result['import_id'],
+                'duplicate': result['duplicate']
             })
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    @action(detail=False, methods=['get'])
+    @method_decorator(conditional_on(*OrgTreeService.DATA_SCOPES))
+    def tree(self, request):
+        """Вся оргструктура Департамент → Отдел → Группа с численностью и ФОТ"""
+        version = get_request_data_state(request, *OrgTreeService.DATA_SCOPES)[0]
+        return Response(OrgTreeService.get_tree(version=version))
 
 
-class DivisionViewSet(viewsets.ModelViewSet):
+class DivisionViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet для работы с отделами"""
     queryset = Division.objects.select_related('department').all().order_by('department', 'name')
     serializer_class = DivisionSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'department__name']
     ordering_fields = ['name', 'created_at']
+    data_version_scopes = ('org', 'employees')
     
     def get_queryset(self):
         queryset = Division.objects.select_related('department').all()
@@ -69,25 +227,30 @@ class DivisionViewSet(viewsets.ModelViewSet):
         file = request.FILES.get('file')
         if not file:
             return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
+        if upload_flag(request, 'dry_run'):
+            return validate_upload('divisions', file)
         
         try:
-            result = DataLoaderService.load_divisions_from_file(file)
+            result = DataLoaderService.import_file('divisions', file, force=upload_force(request))
             return Response({
                 'success': True,
                 'created': result['created'],
-                'updated': result['updated']
+                'updated': result['updated'],
+                'import_id': result['import_id'],
+                'duplicate': result['duplicate']
             })
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class GroupViewSet(viewsets.ModelViewSet):
+class GroupViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet для работы с группами"""
     queryset = Group.objects.select_related('division', 'division__department').all().order_by('division', 'name')
     serializer_class = GroupSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'division__name']
     ordering_fields = ['name', 'created_at']
+    data_version_scopes = ('org', 'employees')
     
     def get_queryset(self):
         queryset = Group.objects.select_related('division', 'division__department').all()
@@ -102,34 +265,39 @@ class GroupViewSet(viewsets.ModelViewSet):
         file = request.FILES.get('file')
         if not file:
             return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
+        if upload_flag(request, 'dry_run'):
+            return validate_upload('groups', file)
         
         try:
-            result = DataLoaderService.load_groups_from_file(file)
+            result = DataLoaderService.import_file('groups', file, force=upload_force(request))
             return Response({
                 'success': True,
                 'created': result['created'],
-                'updated': result['updated']
+                'updated': result['updated'],
+                'import_id': result['import_id'],
+                'duplicate': result['duplicate']
             })
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class EmployeeViewSet(viewsets.ModelViewSet):
+class EmployeeViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet для работы с сотрудниками"""
     queryset = Employee.objects.select_related(
         'department', 'division', 'group',
         'functional_manager', 'line_manager'
     ).all()
     serializer_class = EmployeeSerializer
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [EmployeeSearchFilter, filters.OrderingFilter]
     search_fields = ['full_name', 'login', 'position']
-    ordering_fields = ['full_name', 'hire_date', 'current_salary']
+    ordering_fields = ['full_name', 'hire_date', 'current_salary', 'current_income']
+    data_version_scopes = ('org', 'employees')
     
     def get_queryset(self):
         queryset = Employee.objects.select_related(
             'department', 'division', 'group',
             'functional_manager', 'line_manager'
-        ).with_current_income()
+        )
         
         # Фильтры
         department_id = self.request.query_params.get('department_id', None)
@@ -137,12 +305,7 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         group_id = self.request.query_params.get('group_id', None)
         is_active = self.request.query_params.get('is_active', None)
         
-        if department_id:
-            queryset = queryset.filter(department_id=department_id)
-        if division_id:
-            queryset = queryset.filter(division_id=division_id)
-        if group_id:
-            queryset = queryset.filter(group_id=group_id)
+        queryset = queryset.in_org_unit(department_id, division_id, group_id)
         if is_active is not None:
             queryset = queryset.filter(is_active=is_active.lower() == 'true')
         
@@ -154,19 +317,56 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         file = request.FILES.get('file')
         if not file:
             return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
+        if upload_flag(request, 'dry_run'):
+            return validate_upload('employees', file)
         
         try:
-            result = DataLoaderService.load_employees_from_file(file)
+            result = DataLoaderService.import_file('employees', file, force=upload_force(request))
             return Response({
                 'success': True,
                 'created': result['created'],
                 'updated': result['updated'],
-                'errors': result.get('errors', [])
+                'errors': result.get('errors', []),
+                'import_id': result['import_id'],
+                'duplicate': result['duplicate']
             })
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
     @action(detail=True, methods=['get'])
+    @method_decorator(conditional_on('employees'))
+    def chain(self, request, pk=None):
+        """Сводка по цепочке подчинения: охват, глубина и ФОТ поддерева"""
+        employee = self.get_object()
+        relation = request.query_params.get('relation', 'line')
+        if relation not in ManagementChainService.RELATIONS:
+            return Response(
+                {'error': f"relation must be one of: {', '.join(ManagementChainService.RELATIONS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(ManagementChainService.get_chain_stats(employee.pk, relation))
+    
+    @action(detail=True, methods=['get'])
+    @method_decorator(conditional_on('org', 'employees'))
+    def subordinates(self, request, pk=None):
+        """Все прямые и транзитивные подчиненные сотрудника"""
+        employee = self.get_object()
+        relation = request.query_params.get('relation', 'line')
+        if relation not in ManagementChainService.RELATIONS:
+            return Response(
+                {'error': f"relation must be one of: {', '.join(ManagementChainService.RELATIONS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        queryset = ManagementChainService.get_subordinates(employee.pk, relation).select_related(
+            'department', 'division', 'group',
+            'functional_manager', 'line_manager'
+        ).order_by('full_name', 'id')
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+    
+    @action(detail=True, methods=['get'])
+    @method_decorator(conditional_on('employees', 'salary_history'))
     def salary_history(self, request, pk=None):
         """История изменений зарплаты сотрудника"""
         employee = self.get_object()
@@ -175,13 +375,14 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class SalaryHistoryViewSet(viewsets.ReadOnlyModelViewSet):
+class SalaryHistoryViewSet(ReplicaReadMixin, ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet для работы с историей зарплаты"""
     queryset = SalaryHistory.objects.select_related('employee').all().order_by('-change_date')
     serializer_class = SalaryHistorySerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['employee__full_name', 'employee__login']
     ordering_fields = ['change_date', 'total_income_diff']
+    data_version_scopes = ('employees', 'salary_history')
     
     def get_queryset(self):
         queryset = SalaryHistory.objects.select_related('employee').all()
@@ -203,39 +404,124 @@ class SalaryHistoryViewSet(viewsets.ReadOnlyModelViewSet):
         return queryset
 
 
-# Analytics Views
+class ImportViewSet(viewsets.ViewSet):
+    """
+    Загрузка нескольких справочников одним файлом
 
-class AnalyticsViewSet(viewsets.ViewSet):
-    """ViewSet для аналитики"""
-    
-    @action(detail=False, methods=['get'])
-    def department_delta(self, request):
-        """Дельта повышения департамента между годами"""
-        department_id = request.query_params.get('department_id')
-        year_from = request.query_params.get('year_from')
-        year_to = request.query_params.get('year_to')
-        
-        if not all([department_id, year_from, year_to]):
+    POST /api/import/workbook/ - книга с листами Департаменты, Отделы, Группы, Сотрудники
+    (dry_run=1 - только проверка книги)
+    """
+
+    @action(detail=False, methods=['post'])
+    def workbook(self, request):
+        """Загрузка оргструктуры и сотрудников из одной книги (одна транзакция)"""
+        file = request.FILES.get('file')
+        if not file:
+            return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            result = DataLoaderService.import_file(
+                'workbook', file, force=upload_force(request), dry_run=upload_flag(request, 'dry_run')
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response({'success': True, **result})
+
+
+class UploadViewSet(viewsets.ViewSet):
+    """
+    Загрузка больших файлов частями с возобновлением
+
+    POST /api/uploads/ - {loader, file_name, size, sha256, options}: начать загрузку
+    PUT /api/uploads/{id}/ - часть файла в теле запроса, заголовок Content-Range: bytes start-end/size
+    GET /api/uploads/{id}/ - состояние и смещение следующей части (для продолжения после обрыва)
+    POST /api/uploads/{id}/complete/ - проверить sha256 и загрузить файл загрузчиком loader
+    DELETE /api/uploads/{id}/ - отменить загрузку
+    """
+    lookup_value_regex = '[0-9a-fA-F-]{36}'
+
+    def create(self, request):
+        try:
+            session = ChunkedUploadService.create(
+                request.data.get('loader'),
+                request.data.get('file_name'),
+                request.data.get('size'),
+                request.data.get('sha256'),
+                request.data.get('options'),
+            )
+        except (TypeError, ValueError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        data = UploadSessionSerializer(session).data
+        data['chunk_size'] = settings.UPLOAD_CHUNK_MAX_SIZE
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    def retrieve(self, request, pk=None):
+        session = get_object_or_404(UploadSession, pk=pk)
+        return Response(UploadSessionSerializer(session).data)
+
+    def update(self, request, pk=None):
+        """Часть файла: тело запроса копируется в файл блоками, request.data не читается"""
+        session = get_object_or_404(UploadSession, pk=pk)
+        match = re.match(r'^bytes (\d+)-(\d+)/(\d+)$', request.headers.get('Content-Range', ''))
+        if not match:
             return Response(
-                {'error': 'department_id, year_from, year_to are required'},
+                {'error': 'Content-Range header "bytes start-end/size" is required', 'offset': session.received},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
+        start, end, total = (int(value) for value in match.groups())
+        length = end - start + 1
         try:
-            result = AnalyticsService.get_department_delta(
-                int(department_id),
-                int(year_from),
-                int(year_to)
+            content_length = int(request.headers.get('Content-Length') or length)
+        except ValueError:
+            return Response(
+                {'error': 'Content-Length header must be a number', 'offset': session.received},
+                status=status.HTTP_400_BAD_REQUEST
             )
-            if result:
-                return Response(result)
-            else:
-                return Response(
-                    {'error': 'Department not found'},
-                    status=status.HTTP_404_NOT_FOUND
-                )
-        except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        if total != session.file_size or length < 1 or content_length != length:
+            return Response(
+                {'error': 'Content-Range does not match the upload size or the request body',
+                 'offset': session.received},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            offset = ChunkedUploadService.write_chunk(session, start, length, request.stream)
+        except UploadConflict as e:
+            return Response({'error': str(e), 'offset': e.offset}, status=status.HTTP_409_CONFLICT)
+        except ValueError as e:
+            return Response({'error': str(e), 'offset': session.received}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'offset': offset, 'complete': offset == session.file_size})
+
+    def destroy(self, request, pk=None):
+        ChunkedUploadService.cancel(get_object_or_404(UploadSession, pk=pk))
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        """Проверить файл и загрузить его (с UPLOAD_IMPORT_ASYNC - в Celery, ответ 202)"""
+        session = get_object_or_404(UploadSession, pk=pk)
+        try:
+            session = ChunkedUploadService.complete(session, force=upload_force(request))
+        except UploadConflict as e:
+            return Response({'error': str(e), 'offset': e.offset}, status=status.HTTP_409_CONFLICT)
+        response_status = {
+            UploadSession.STATUS_DONE: status.HTTP_200_OK,
+            UploadSession.STATUS_IMPORTING: status.HTTP_202_ACCEPTED,
+        }.get(session.status, status.HTTP_400_BAD_REQUEST)
+        return Response(UploadSessionSerializer(session).data, status=response_status)
+
+
+# Analytics Views
+
+class AnalyticsViewSet(ReplicaReadMixin, viewsets.ViewSet):
+    """
+    ViewSet для аналитики
+
+    GET-отчеты (department_delta, salary_history_report, fot_summary) вынесены
+    в async-view ниже, здесь остается POST custom_report.
+    """
+    replica_actions = ('custom_report',)
     
     @action(detail=False, methods=['post'])
     def custom_report(self, request):
@@ -249,50 +535,225 @@ class AnalyticsViewSet(viewsets.ViewSet):
             return Response(result)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-    
-    @action(detail=False, methods=['get'])
-    def salary_history_report(self, request):
-        """Отчет по истории изменений зарплаты"""
-        employee_id = request.query_params.get('employee_id')
-        department_id = request.query_params.get('department_id')
-        date_from = request.query_params.get('date_from')
-        date_to = request.query_params.get('date_to')
-        
+
+
+class SheetViewSet(ReplicaReadMixin, viewsets.ViewSet):
+    """
+    Запросы к строкам загруженного листа (ExcelRow.data) по колонкам
+
+    POST /api/sheets/{id}/query/ - {filters, sort, limit, offset}
+    POST /api/sheets/{id}/aggregate/ - {group_by, metrics, filters}
+    """
+    replica_actions = ('query', 'aggregate')
+
+    @action(detail=True, methods=['post'])
+    def query(self, request, pk=None):
         try:
-            result = AnalyticsService.get_salary_history_report(
-                employee_id=int(employee_id) if employee_id else None,
-                department_id=int(department_id) if department_id else None,
-                date_from=date_from,
-                date_to=date_to
+            result = SheetQueryService.query(
+                pk,
+                filters=request.data.get('filters'),
+                sort=request.data.get('sort'),
+                limit=request.data.get('limit', 100),
+                offset=request.data.get('offset', 0),
             )
-            return Response(result)
-        except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        except (TypeError, ValueError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
+
+    @action(detail=True, methods=['post'])
+    def aggregate(self, request, pk=None):
+        try:
+            result = SheetQueryService.aggregate(
+                pk,
+                group_by=request.data.get('group_by'),
+                metrics=request.data.get('metrics'),
+                filters=request.data.get('filters'),
+            )
+        except (TypeError, ValueError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'results': result})
+
+
+# Async Analytics Views
+
+# Области данных, от которых зависят отчеты аналитики
+ANALYTICS_SCOPES = ('org', 'employees', 'salary_history')
+
+
+def analytics_response(data, status=200):
+    """JSON-ответ в том же формате, что и JSONRenderer DRF (Decimal как число)"""
+    return JsonResponse(
+        data,
+        status=status,
+        encoder=JSONEncoder,
+        json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')}
+    )
+
+
+def async_analytics_view(view):
+    """
+    Обертка async-view аналитики: GET/HEAD, чтение с реплик, условный GET, ошибки в JSON
+
+    Под ASGI (uvicorn) запросы к БД выполняются через async ORM, и долгая
+    агрегация не занимает поток воркера на время ожидания.
+    """
+    conditional_view = conditional_on(*ANALYTICS_SCOPES)(view)
+
+    @require_safe
+    @wraps(view)
+    async def inner(request, *args, **kwargs):
+        with use_replicas():
+            # condition() вызывает etag_func синхронно, поэтому версию данных
+            # считаем заранее через async ORM; дальше она берется из кэша запроса
+            await aget_request_data_state(request, *ANALYTICS_SCOPES)
+            try:
+                return await conditional_view(request, *args, **kwargs)
+            except Exception as e:
+                return analytics_response({'error': str(e)}, status=500)
+
+    return inner
+
+
+@async_analytics_view
+async def analytics_department_delta(request):
+    """Дельта повышения департамента между годами"""
+    department_id = request.GET.get('department_id')
+    year_from = request.GET.get('year_from')
+    year_to = request.GET.get('year_to')
     
-    @action(detail=False, methods=['get'])
-    def fot_summary(self, request):
-        """Сводный отчет по ФОТ"""
-        date_from = request.query_params.get('date_from')
-        date_to = request.query_params.get('date_to')
-        
+    if not all([department_id, year_from, year_to]):
+        return analytics_response(
+            {'error': 'department_id, year_from, year_to are required'},
+            status=400
+        )
+    
+    result = await AnalyticsService.aget_department_delta(
+        int(department_id),
+        int(year_from),
+        int(year_to)
+    )
+    if result:
+        return analytics_response(result)
+    return analytics_response({'error': 'Department not found'}, status=404)
+
+
+@async_analytics_view
+async def analytics_salary_history_report(request):
+    """Отчет по истории изменений зарплаты"""
+    employee_id = request.GET.get('employee_id')
+    department_id = request.GET.get('department_id')
+    
+    result = await AnalyticsService.aget_salary_history_report(
+        employee_id=int(employee_id) if employee_id else None,
+        department_id=int(department_id) if department_id else None,
+        date_from=request.GET.get('date_from'),
+        date_to=request.GET.get('date_to')
+    )
+    return analytics_response(result)
+
+
+@async_analytics_view
+async def analytics_fot_summary(request):
+    """Сводный отчет по ФОТ"""
+    result = await AnalyticsService.aget_fot_summary(
+        request.GET.get('date_from'),
+        request.GET.get('date_to')
+    )
+    return analytics_response(result)
+
+
+def metrics_access_allowed(request):
+    """Доступ к /metrics по METRICS_TOKEN или METRICS_ALLOWED_IPS (без них - только при DEBUG)"""
+    if settings.METRICS_TOKEN:
+        authorization = request.META.get('HTTP_AUTHORIZATION', '')
+        if hmac.compare_digest(authorization.encode('utf-8'), f'Bearer {settings.METRICS_TOKEN}'.encode('utf-8')):
+            return True
+    if settings.METRICS_ALLOWED_IPS:
         try:
-            result = AnalyticsService.get_fot_summary(date_from, date_to)
-            return Response(result)
-        except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+        except ValueError:
+            return False
+        return any(
+            address in ipaddress.ip_network(network, strict=False) for network in settings.METRICS_ALLOWED_IPS
+        )
+    return settings.DEBUG and not settings.METRICS_TOKEN
+
+
+@require_safe
+def metrics(request):
+    """Метрики в формате Prometheus (требуется prometheus_client)"""
+    if not metrics_access_allowed(request):
+        return HttpResponse('Forbidden\n', status=403, content_type='text/plain')
+    if not PROMETHEUS_AVAILABLE:
+        return HttpResponse('prometheus_client is not installed\n', status=501, content_type='text/plain')
+
+    from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest
+    registry = REGISTRY
+    # Несколько воркеров gunicorn: метрики собираются из PROMETHEUS_MULTIPROC_DIR
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+
+@require_safe
+def profiling_stats(request):
+    """Скользящие перцентили длительности и SQL-статистика по маршрутам (JSON)"""
+    if not (settings.DEBUG or request.user.is_staff):
+        return JsonResponse({'error': 'Staff access required'}, status=403)
+    return JsonResponse({
+        'enabled': settings.QUERY_PROFILING,
+        'window': route_stats.window,
+        'routes': route_stats.snapshot(),
+    })
 
 
 # Web Views
 
+# Разрешенные сортировки списка сотрудников: ключ -> order_by.
+# Каждая сортировка опирается на индекс Employee (частичный, по is_active=True)
+# и заканчивается id, чтобы порядок был стабильным при пагинации.
+EMPLOYEE_SORTS = {
+    'name': ('full_name', 'id'),
+    'hire_date': ('hire_date', 'id'),
+    'salary': ('current_salary', 'id'),
+    'income': ('current_income', 'id'),
+    'department': ('org_path_names', 'full_name', 'id'),
+}
+EMPLOYEE_DEFAULT_SORT = 'name'
+
+
+def resolve_employee_sort(sort_key):
+    """
+    Преобразовать ключ сортировки из запроса в поля order_by
+
+    Поддерживается префикс '-' для обратного порядка. Неизвестный ключ
+    заменяется сортировкой по умолчанию.
+
+    Returns:
+        tuple (sort_key, order_by_fields)
+    """
+    descending = sort_key.startswith('-')
+    base_key = sort_key[1:] if descending else sort_key
+    if base_key not in EMPLOYEE_SORTS:
+        descending, base_key = False, EMPLOYEE_DEFAULT_SORT
+
+    fields = EMPLOYEE_SORTS[base_key]
+    if descending:
+        fields = tuple(f'-{field}' for field in fields)
+    return (f'-{base_key}' if descending else base_key), fields
+
+
 def index(request):
     """Главная страница"""
     departments_count = Department.objects.count()
     employees_count = Employee.objects.filter(is_active=True).count()
     
     # Сводная статистика по ФОТ
-    fot_summary = Employee.objects.filter(is_active=True).with_current_income().aggregate(
-        total_fot=Sum('_annotated_current_income'),
-        avg_fot=Avg('_annotated_current_income'),
+    fot_summary = Employee.objects.filter(is_active=True).aggregate(
+        total_fot=Sum('current_income'),
+        avg_fot=Avg('current_income'),
         total_salary=Sum('current_salary')
     )
     
@@ -308,7 +769,7 @@ def employees_list(request):
     """Список сотрудников с фильтрами"""
     employees = Employee.objects.select_related(
         'department', 'division', 'group'
-    ).filter(is_active=True).with_current_income()
+    ).filter(is_active=True)
     
     # Фильтры
     search = request.GET.get('search', '')
@@ -317,31 +778,25 @@ def employees_list(request):
     group_id = request.GET.get('group', '')
     
     if search:
-        employees = employees.filter(
-            Q(full_name__icontains=search) |
-            Q(login__icontains=search) |
-            Q(position__icontains=search)
-        )
-    if department_id:
-        employees = employees.filter(department_id=department_id)
-    if division_id:
-        employees = employees.filter(division_id=division_id)
-    if group_id:
-        employees = employees.filter(group_id=group_id)
+        employees = EmployeeSearchService.search(employees, search)
+    employees = employees.in_org_unit(department_id, division_id, group_id)
     
-    # Сортировка
-    sort_by = request.GET.get('sort', 'full_name')
-    employees = employees.order_by(sort_by)
+    # Сортировка (при поиске без явной сортировки - по релевантности)
+    sort_by = request.GET.get('sort', '')
+    if sort_by or not search:
+        sort_by, order_fields = resolve_employee_sort(sort_by)
+        employees = employees.order_by(*order_fields)
     
     # Пагинация
     paginator = Paginator(employees, 50)
     page_number = request.GET.get('page', 1)
     page_obj = paginator.get_page(page_number)
     
-    # Справочники для фильтров
-    departments = Department.objects.all().order_by('name')
-    divisions = Division.objects.all().order_by('name') if not department_id else Division.objects.filter(department_id=department_id).order_by('name')
-    groups = Group.objects.all().order_by('name') if not division_id else Group.objects.filter(division_id=division_id).order_by('name')
+    # Справочники для фильтров (из кэшированного дерева оргструктуры)
+    departments, divisions, groups = OrgTreeService.get_choices(
+        department_id=department_id,
+        division_id=division_id
+    )
     
     context = {
         'page_obj': page_obj,
@@ -371,7 +826,7 @@ def employee_detail(request, employee_id):
 
 def analytics(request):
     """Страница аналитики"""
-    departments = Department.objects.all().order_by('name')
+    departments, _, _ = OrgTreeService.get_choices()
     
     context = {
         'departments': departments,
@@ -381,9 +836,7 @@ def analytics(request):
 
 def custom_report_builder(request):
     """Конструктор произвольных отчетов"""
-    departments = Department.objects.all().order_by('name')
-    divisions = Division.objects.all().order_by('name')
-    groups = Group.objects.all().order_by('name')
+    departments, divisions, groups = OrgTreeService.get_choices()
     
     context = {
         'departments': departments,
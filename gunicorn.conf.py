@@ -0,0 +1,37 @@
+"""
+Конфигурация gunicorn для production-профиля
+
+    gunicorn -c gunicorn.conf.py
+
+По умолчанию запускается ASGI-приложение на воркерах uvicorn (async-view
+аналитики не занимают поток на время запроса к БД). Для WSGI с потоками:
+GUNICORN_WORKER_CLASS=gthread.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+# Рекомендация gunicorn: 2 * ядра + 1
+workers = int(os.environ.get('WEB_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'uvicorn_worker.UvicornWorker')
+
+# Потоки на воркер, используются только worker_class=gthread
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+
+if worker_class in ('sync', 'gthread'):
+    wsgi_app = 'config.wsgi:application'
+else:
+    wsgi_app = 'config.asgi:application'
+
+# Загрузка и разбор больших Excel-файлов выполняются в запросе
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = 30
+keepalive = 5
+
+# Периодический перезапуск воркеров ограничивает рост памяти (pandas)
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = 100
+
+accesslog = '-'
+errorlog = '-'